@@ -0,0 +1,265 @@
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+
+from src.PetriNet import PetriNet
+from src.BFS import bfs_reachable
+from src.BDD import bdd_reachable
+from src.Ordering import ORDERINGS
+
+
+def load_net(filename: str):
+    """Đọc file PNML, trả về None (kèm thông báo) nếu file rỗng hoặc lỗi định dạng."""
+    try:
+        return PetriNet.from_pnml(filename)
+    except Exception as e:
+        print(f"[SKIP] {filename}: {e}")
+        return None
+
+
+def bench_workers(files, worker_counts):
+    """Đo thời gian BFS song song (bfs_reachable(workers=k)) so với BFS tuần tự."""
+    print(f"{'File':<28}{'Workers':>8}{'States':>10}{'Time (s)':>12}{'Speedup':>10}")
+    for filename in files:
+        pn = load_net(filename)
+        if pn is None:
+            continue
+
+        start = time.perf_counter()
+        expected = bfs_reachable(pn, packed=True)
+        base_time = time.perf_counter() - start
+        print(f"{filename:<28}{'seq':>8}{len(expected):>10}{base_time:>12.4f}{1.0:>10.2f}")
+
+        for k in worker_counts:
+            start = time.perf_counter()
+            result = bfs_reachable(pn, packed=True, workers=k)
+            elapsed = time.perf_counter() - start
+            assert result == expected, f"{filename}: workers={k} khác kết quả BFS tuần tự"
+            speedup = base_time / elapsed if elapsed > 0 else float("inf")
+            print(f"{filename:<28}{k:>8}{len(result):>10}{elapsed:>12.4f}{speedup:>10.2f}")
+
+
+def bench_bdd_strategies(files, strategies):
+    """So sánh các chiến lược lặp điểm bất động của bdd_reachable: số vòng lặp, node đỉnh và thời gian."""
+    print(f"{'File':<28}{'Strategy':>12}{'States':>10}{'Iters':>8}{'Peak':>8}{'Final':>8}{'Time (s)':>12}")
+    for filename in files:
+        pn = load_net(filename)
+        if pn is None:
+            continue
+
+        expected = None
+        for strategy in strategies:
+            stats = {}
+            # bdd_reachable in log tiến trình -> tắt để bảng kết quả gọn
+            with contextlib.redirect_stdout(io.StringIO()):
+                reach, count = bdd_reachable(pn, strategy=strategy, stats=stats)
+            if expected is None:
+                expected = reach
+            assert reach.equivalent(expected), f"{filename}: strategy={strategy} khác kết quả"
+            print(
+                f"{filename:<28}{strategy:>12}{count:>10}{stats['iterations']:>8}"
+                f"{stats['peak_nodes']:>8}{stats['final_nodes']:>8}{stats['time']:>12.4f}"
+            )
+
+
+def bench_bdd_clusters(files, thresholds, strategy):
+    """So sánh ảnh theo từng transition (threshold None) với quan hệ chuyển trạng thái gom cụm."""
+    print(f"{'File':<28}{'Threshold':>10}{'Clusters':>10}{'States':>10}{'Iters':>8}{'Time (s)':>12}")
+    for filename in files:
+        pn = load_net(filename)
+        if pn is None:
+            continue
+
+        expected = None
+        for threshold in [None] + list(thresholds):
+            stats = {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                reach, count = bdd_reachable(pn, strategy=strategy, stats=stats, cluster_threshold=threshold)
+            if expected is None:
+                expected = reach
+            assert reach.equivalent(expected), f"{filename}: cluster_threshold={threshold} khác kết quả"
+            label = "-" if threshold is None else threshold
+            clusters = len(stats.get('clusters', [])) or "-"
+            print(f"{filename:<28}{label:>10}{clusters:>10}{count:>10}{stats['iterations']:>8}{stats['time']:>12.4f}")
+
+
+def bench_bdd_backends(files, backends, strategy):
+    """So sánh backend BDD (pyeda / array): thời gian lặp, thời gian tổng (kể cả đếm) và số node."""
+    print(f"{'File':<28}{'Backend':>8}{'States':>10}{'Iters':>8}{'Nodes':>8}{'Loop (s)':>12}{'Total (s)':>12}")
+    for filename in files:
+        pn = load_net(filename)
+        if pn is None:
+            continue
+
+        expected = None
+        for backend in backends:
+            stats = {}
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                reach, count = bdd_reachable(pn, strategy=strategy, stats=stats, backend=backend)
+            total = time.perf_counter() - start
+            if expected is None:
+                expected = count
+            assert count == expected, f"{filename}: backend={backend} khác số trạng thái"
+            print(
+                f"{filename:<28}{backend:>8}{count:>10}{stats['iterations']:>8}"
+                f"{stats['final_nodes']:>8}{stats['time']:>12.4f}{total:>12.4f}"
+            )
+
+
+def bench_bdd_orders(files, orders, strategy):
+    """So sánh các heuristic thứ tự biến tĩnh (backend array): số node Reach cuối, số node đỉnh và thời gian."""
+    print(f"{'File':<28}{'Order':>15}{'States':>10}{'Final':>8}{'Peak':>8}{'Time (s)':>12}")
+    for filename in files:
+        pn = load_net(filename)
+        if pn is None:
+            continue
+
+        expected = None
+        for order in orders:
+            stats = {}
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                reach, count = bdd_reachable(pn, strategy=strategy, stats=stats, backend="array", order=order)
+            total = time.perf_counter() - start
+            if expected is None:
+                expected = count
+            assert count == expected, f"{filename}: order={order} khác số trạng thái"
+            print(
+                f"{filename:<28}{order:>15}{count:>10}{stats['final_nodes']:>8}"
+                f"{stats['peak_nodes']:>8}{total:>12.4f}"
+            )
+
+
+def bench_bdd_frontier(files, backend, strategy):
+    """Frontier chính xác so với frontier rút gọn (restrict / constrain): tổng node frontier, node đỉnh, thời gian."""
+    print(f"{'File':<28}{'Simplify':>9}{'States':>10}{'Frontier':>10}{'Peak':>8}{'Time (s)':>12}")
+    for filename in files:
+        pn = load_net(filename)
+        if pn is None:
+            continue
+
+        expected = None
+        for simplify in (False, True):
+            stats = {}
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                reach, count = bdd_reachable(
+                    pn, strategy=strategy, stats=stats, backend=backend, simplify_frontier=simplify
+                )
+            total = time.perf_counter() - start
+            if expected is None:
+                expected = count
+            assert count == expected, f"{filename}: simplify_frontier={simplify} khác số trạng thái"
+            print(
+                f"{filename:<28}{'on' if simplify else 'off':>9}{count:>10}{stats['frontier_nodes']:>10}"
+                f"{stats['peak_nodes']:>8}{total:>12.4f}"
+            )
+
+
+def bench_bdd_trace(filename, backend, strategy, cluster_threshold):
+    """In thống kê từng vòng lặp điểm bất động (dạng CSV) để vẽ đường tăng trưởng của Reach / frontier."""
+    pn = load_net(filename)
+    if pn is None:
+        return
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        bdd_reachable(
+            pn, strategy=strategy, backend=backend, cluster_threshold=cluster_threshold, on_iteration=rows.append
+        )
+    print("iteration,frontier_nodes,reach_nodes,new_states,image_time,unique_table_size,elapsed")
+    for r in rows:
+        print(
+            f"{r.iteration},{r.frontier_nodes},{r.reach_nodes},{r.new_states},"
+            f"{sum(r.image_time):.6f},{r.unique_table_size},{r.elapsed:.6f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các thuật toán reachability")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_workers = sub.add_parser("workers", help="Khả năng mở rộng của BFS song song")
+    p_workers.add_argument(
+        "files", nargs="*",
+        default=["philosophers_N15.pnml", "philosophers_N20.pnml", "testcase5.pnml"],
+    )
+    p_workers.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+
+    p_bdd = sub.add_parser("bdd-strategy", help="So sánh bfs / chaining / level-fixpoint của bdd_reachable")
+    p_bdd.add_argument(
+        "files", nargs="*",
+        default=["philosophers_N5.pnml", "testcase3.pnml", "testcase4.pnml", "philosophers_N15.pnml"],
+    )
+    p_bdd.add_argument(
+        "--strategies", nargs="+", choices=["bfs", "chaining", "level-fixpoint"],
+        default=["bfs", "chaining", "level-fixpoint"],
+    )
+
+    p_cluster = sub.add_parser("bdd-cluster", help="Ảnh theo từng transition so với quan hệ gom cụm")
+    p_cluster.add_argument(
+        "files", nargs="*",
+        default=["testcase4.pnml", "philosophers_N15.pnml", "testcase6.pnml", "philosophers_N20.pnml"],
+    )
+    p_cluster.add_argument("--thresholds", type=int, nargs="+", default=[0, 50, 200, 1000])
+    p_cluster.add_argument("--strategy", choices=["bfs", "chaining", "level-fixpoint"], default="bfs")
+
+    p_backend = sub.add_parser("bdd-backend", help="So sánh backend BDD pyeda và array")
+    p_backend.add_argument(
+        "files", nargs="*",
+        default=[
+            "testcase1.pnml", "testcase2.pnml", "testcase3.pnml", "testcase4.pnml", "testcase6.pnml",
+            "philosophers_N5.pnml", "philosophers_N15.pnml", "philosophers_N20.pnml", "mutex.pnml",
+            "deadlock.pnml", "choice_merge.pnml", "linear_chain.pnml",
+        ],
+    )
+    p_backend.add_argument("--backends", nargs="+", choices=["pyeda", "array"], default=["pyeda", "array"])
+    p_backend.add_argument("--strategy", choices=["bfs", "chaining", "level-fixpoint"], default="bfs")
+
+    p_order = sub.add_parser("bdd-order", help="So sánh các heuristic thứ tự biến BDD trên mọi file *.pnml")
+    p_order.add_argument(
+        "files", nargs="*",
+        default=sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.pnml"))),
+    )
+    p_order.add_argument("--orders", nargs="+", choices=list(ORDERINGS), default=list(ORDERINGS))
+    p_order.add_argument("--strategy", choices=["bfs", "chaining", "level-fixpoint"], default="chaining")
+
+    p_frontier = sub.add_parser("bdd-frontier", help="Số node frontier khi bật / tắt simplify_frontier")
+    p_frontier.add_argument(
+        "files", nargs="*",
+        default=[
+            "testcase4.pnml", "testcase5.pnml", "testcase6.pnml", "testcase8.pnml",
+            "philosophers_N15.pnml", "philosophers_N20.pnml",
+        ],
+    )
+    p_frontier.add_argument("--backend", choices=["pyeda", "array"], default="array")
+    p_frontier.add_argument("--strategy", choices=["bfs", "chaining", "level-fixpoint"], default="bfs")
+
+    p_trace = sub.add_parser("bdd-trace", help="Thống kê từng vòng lặp của bdd_reachable (CSV)")
+    p_trace.add_argument("file")
+    p_trace.add_argument("--backend", choices=["pyeda", "array"], default="array")
+    p_trace.add_argument("--strategy", choices=["bfs", "chaining", "level-fixpoint"], default="bfs")
+    p_trace.add_argument("--cluster-threshold", type=int, default=None)
+
+    args = parser.parse_args()
+    if args.command == "workers":
+        bench_workers(args.files, args.workers)
+    elif args.command == "bdd-strategy":
+        bench_bdd_strategies(args.files, args.strategies)
+    elif args.command == "bdd-cluster":
+        bench_bdd_clusters(args.files, args.thresholds, args.strategy)
+    elif args.command == "bdd-backend":
+        bench_bdd_backends(args.files, args.backends, args.strategy)
+    elif args.command == "bdd-frontier":
+        bench_bdd_frontier(args.files, args.backend, args.strategy)
+    elif args.command == "bdd-trace":
+        bench_bdd_trace(args.file, args.backend, args.strategy, args.cluster_threshold)
+    elif args.command == "bdd-order":
+        bench_bdd_orders([os.path.relpath(f) for f in args.files], args.orders, args.strategy)
+
+
+if __name__ == "__main__":
+    main()
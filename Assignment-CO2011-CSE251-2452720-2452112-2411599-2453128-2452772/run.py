@@ -1,26 +1,38 @@
-from PetriNet import PetriNet
-from src.BDD import bdd_reachable
+from src.PetriNet import PetriNet
+from src.BDD import bdd_reachable_cached
+from src.Ordering import ORDERINGS
 from src.Optimization import max_reachable_marking
 from src.BFS import bfs_reachable
 from src.DFS import dfs_reachable
-from src.Deadlock import deadlock_reachable_marking
+from src.Stream import iter_reachable
+from src.Witness import shortest_firing_sequence
+from src.Deadlock import DeadlockSet, deadlock_reachable_marking, structural_deadlock_check
 from pyeda.inter import * 
 import numpy as np
 import time
 from graphviz import Source
+import argparse
+import os
 import sys
 import tracemalloc
 
-def generate_custom_bdd_image(bdd_obj):
+# Thứ tự biến BDD tốt nhất của từng mạng (theo nội dung), dùng lại cho lần chạy sau
+ORDER_CACHE = ".bdd_order_cache.json"
+# Tập reachable đã tính (file .npz theo mã băm nội dung của mạng)
+REACH_CACHE = ".bdd_reach_cache"
+# Ảnh BDD của mỗi lần chạy (không ghi đè file bdd / bdd.svg mẫu đã có trong repo)
+BDD_IMAGE_DIR = "bdd_output"
+
+def generate_custom_bdd_image(bdd_obj, name="bdd"):
     """
-    Hàm này lấy đối tượng BDD từ PyEDA và vẽ ra ảnh.
+    Hàm này lấy đối tượng BDD từ PyEDA và vẽ ra ảnh <BDD_IMAGE_DIR>/<name>.svg.
     """
     try:
         # PyEDA có hàm .to_dot() để xuất cấu trúc đồ thị
         dot_code = bdd_obj.to_dot()
         
         # Tạo đối tượng Source của Graphviz
-        s = Source(dot_code, filename="bdd", format="svg")
+        s = Source(dot_code, filename=name, directory=BDD_IMAGE_DIR, format="svg")
         
         # Render ra file ảnh
         output_path = s.render(cleanup=True)
@@ -30,7 +42,22 @@ def generate_custom_bdd_image(bdd_obj):
     except Exception as e:
         print(f"\n[ERROR] Không thể vẽ hình BDD thật. Lỗi: {e}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Phân tích mạng Petri 1-safe từ file PNML")
+    parser.add_argument("filename", nargs="?", default="deadlock.pnml", help="File PNML (mặc định deadlock.pnml)")
+    parser.add_argument(
+        "--order", choices=list(ORDERINGS), default="bfs",
+        help="Heuristic thứ tự biến BDD ban đầu (mặc định bfs)",
+    )
+    parser.add_argument(
+        "--structural", action="store_true",
+        help="Chạy kiểm tra siphon/trap (điều kiện Commoner) trước khi dựng BDD; "
+             "nếu chứng minh được không có deadlock thì bỏ qua BDD reachability",
+    )
+    return parser.parse_args(argv)
+
 def main():
+    args = parse_args()
     np.set_printoptions(threshold=sys.maxsize, linewidth=np.inf)
 
     # Bắt đầu tính tổng thời gian chạy chương trình
@@ -38,8 +65,8 @@ def main():
     # ------------------------------------------------------
     # 1. Load Petri Net từ file PNML
     # ------------------------------------------------------
-    # Đảm bảo bạn đã tạo file deadlock.pnml
-    filename = "deadlock.pnml"   
+    # Mặc định deadlock.pnml, có thể truyền file khác qua dòng lệnh
+    filename = args.filename
     print("Loading PNML:", filename)
 
     try:
@@ -52,6 +79,20 @@ def main():
         print("Vui lòng tạo file deadlock.pnml theo hướng dẫn trước đó.")
         return
 
+    # Kiểm tra cấu trúc (siphon / trap) khi bật --structural, trước mọi bước reachability: nếu đã chứng minh
+    # được không có deadlock thì không cần dựng BDD Reach. Mỗi siphon là một lần giải ILP (không có highspy
+    # thì mỗi lần là một tiến trình CBC) nên mặc định tắt.
+    structure = None
+    if args.structural:
+        print("\n--- STRUCTURAL DEADLOCK CHECK ---")
+        structure = structural_deadlock_check(pn)
+        print(
+            f"  > Structural check: {len(structure['siphons'])} minimal siphons, "
+            f"{len(structure['bad_siphons'])} without a marked trap, free-choice = {structure['free_choice']}, "
+            f"1-safe by P-invariants = {structure['safe']} ({structure['time']:.4f}s)"
+        )
+    proven_free = structure is not None and structure['deadlock_free']
+
     # ------------------------------------------------------
     # 2. BFS reachable
     # ------------------------------------------------------
@@ -77,44 +118,65 @@ def main():
     # 3. DFS reachable
     # ------------------------------------------------------
     print("\n---     DFS Reachable Markings    ---")
-    dfs_set = dfs_reachable(pn)
-    for m in dfs_set:
+    # In marking ngay khi được phát hiện, không giữ lại toàn bộ tập trạng thái lần thứ hai
+    dfs_count = 0
+    for m in iter_reachable(pn, order="dfs"):
         print(np.array(m))
-    print("Total DFS reachable =", len(dfs_set))
+        dfs_count += 1
+    print("Total DFS reachable =", dfs_count)
     print("\nTASK 2: [SUCCESS]")
 
     # ------------------------------------------------------
     # 4. BDD reachable
     # ------------------------------------------------------
     print("\n--- TASK 3: BDD-BASED REACHABILITY ---")
-    try:
-        tracemalloc.start()
+    bdd = count = bdd_time = bdd_mem_mb = None
+    if proven_free:
+        print("[SKIP] Commoner's condition holds: deadlock-free without building the Reach BDD.")
+    else:
+        try:
+            tracemalloc.start()
 
-        start_bdd = time.perf_counter()  # [THÊM] Bắt đầu bấm giờ
-        bdd, count = bdd_reachable(pn)
-        end_bdd = time.perf_counter()    # [THÊM] Kết thúc bấm giờ
+            # tracemalloc không thấy bộ nhớ riêng của thư viện BDD -> theo dõi kích thước unique table
+            history = []
+            start_bdd = time.perf_counter()  # [THÊM] Bắt đầu bấm giờ
+            bdd, count = bdd_reachable_cached(
+                pn, REACH_CACHE, backend="array", reorder=True, order_cache=ORDER_CACHE, order=args.order,
+                on_iteration=history.append,
+            )
+            end_bdd = time.perf_counter()    # [THÊM] Kết thúc bấm giờ
 
-        current, peak = tracemalloc.get_traced_memory() # Lấy thông số RAM
-        tracemalloc.stop()
+            current, peak = tracemalloc.get_traced_memory() # Lấy thông số RAM
+            tracemalloc.stop()
         
-        bdd_time = end_bdd - start_bdd # Tính khoảng thời gian
-        bdd_mem_mb = peak / (1024 * 1024) # Đổi sang MB
+            bdd_time = end_bdd - start_bdd # Tính khoảng thời gian
+            bdd_mem_mb = peak / (1024 * 1024) # Đổi sang MB
 
-        print("BDD reachable markings count =", count) 
-        if count < 10000:  # Ngưỡng an toàn
-            generate_custom_bdd_image(bdd)
-        else:
-            print(f"[SKIP] BDD quá lớn ({count} states), bỏ qua vẽ hình.")
-        print("\nTASK 3: [SUCCESS]")
-    except Exception as e:
-        print("Lỗi BDD:", e)
-        return
+            print("BDD reachable markings count =", count) 
+            if history:
+                print(
+                    f"BDD iterations = {len(history)}, "
+                    f"peak Reach nodes = {max(h.reach_nodes for h in history)}, "
+                    f"peak unique table = {max(h.unique_table_size for h in history)} nodes"
+                )
+            if count < 10000:  # Ngưỡng an toàn
+                generate_custom_bdd_image(bdd, os.path.splitext(os.path.basename(filename))[0])
+            else:
+                print(f"[SKIP] BDD quá lớn ({count} states), bỏ qua vẽ hình.")
+            print("\nTASK 3: [SUCCESS]")
+        except Exception as e:
+            print("Lỗi BDD:", e)
+            return
     # ------------------------------------------------------
     # 5. Deadlock detection
     # ------------------------------------------------------
-    print("\n--- TASK 4: ILP + BDD DEADLOCK DETECTION ---")
+    print("\n--- TASK 4: BDD (ILP FALLBACK) DEADLOCK DETECTION ---")
     start_dl = time.perf_counter() # BẮT ĐẦU ĐO
-    dead = deadlock_reachable_marking(pn, bdd)
+    if proven_free:
+        print("  > Commoner's condition holds: deadlock-free without a state-space search.")
+        dead = None
+    else:
+        dead = deadlock_reachable_marking(pn, bdd)
     end_dl = time.perf_counter()   # KẾT THÚC ĐO
 
     dl_time = end_dl - start_dl
@@ -127,6 +189,15 @@ def main():
             print(f"Marking: {dead}")
         else:
             print(f"Marking: (Vector too long to print, length={len(dead)})")
+
+        # Toàn bộ deadlock reachable (Reach ∧ Dead), không cần lặp lại vòng ILP
+        deadlocks = DeadlockSet(pn, bdd)
+        print(f"Reachable deadlocks: {deadlocks.count()}")
+
+        # Dãy bắn ngắn nhất từ M0 tới deadlock (witness)
+        path = shortest_firing_sequence(pn, dead)
+        if path is not None:
+            print(f"Witness ({len(path)} steps): {[pn.trans_ids[t] for t in path]}")
         print("\nTASK 4: [SUCCESS]")
     else:
         print("RESULT: NO Deadlock reachable.")
@@ -171,24 +242,29 @@ def main():
 
     # print("DEBUG MAP:", uuid_map)
 
-    start_opt = time.perf_counter() # BẮT ĐẦU ĐO
-    try:
-        # [FIX 3] Truyền pn.place_ids thay vì place_names để đảm bảo không bị None
-        max_mark, max_val = max_reachable_marking(
-            pn.place_ids,   # Dùng ID để duyệt
-            bdd, 
-            c, 
-            place_uuid_mapping=uuid_map # Dùng Map để tìm tên biến trong BDD
-        )
-        end_opt = time.perf_counter()   # KẾT THÚC ĐO
-        print("Max marking found:", max_mark)
-        print("Max value:", max_val)
+    opt_time = None
+    if bdd is None:
+        print("[SKIP] Không có BDD Reach (đã chứng minh không có deadlock bằng cấu trúc), bỏ qua tối ưu.")
+    else:
+        start_opt = time.perf_counter() # BẮT ĐẦU ĐO
+        try:
+            # [FIX 3] Truyền pn.place_ids thay vì place_names để đảm bảo không bị None
+            max_mark, max_val = max_reachable_marking(
+                pn.place_ids,   # Dùng ID để duyệt
+                bdd, 
+                c, 
+                place_uuid_mapping=uuid_map # Dùng Map để tìm tên biến trong BDD
+            )
+            end_opt = time.perf_counter()   # KẾT THÚC ĐO
+            opt_time = end_opt - start_opt
+            print("Max marking found:", max_mark)
+            print("Max value:", max_val)
         
-    except TypeError as te:
-        print(f"\n[LỖI PARAM] {te}")
-        print("Hãy chắc chắn file src/Optimization.py đã được cập nhật hàm nhận tham số 'place_uuid_mapping'.")
-    except Exception as e:
-        print(f"\n[LỖI] Optimization thất bại: {e}")
+        except TypeError as te:
+            print(f"\n[LỖI PARAM] {te}")
+            print("Hãy chắc chắn file src/Optimization.py đã được cập nhật hàm nhận tham số 'place_uuid_mapping'.")
+        except Exception as e:
+            print(f"\n[LỖI] Optimization thất bại: {e}")
 
     print("\n" + "="*60)
     print("EXPERIMENT FINISHED")
@@ -201,24 +277,29 @@ def main():
 
     print(f"Thời gian chạy BFS: {bfs_time:.6f} giây") # In ra kết quả
 
-    print(f"Thời gian chạy BDD: {bdd_time:.6f} giây") # In ra kết quả
+    if bdd_time is not None:
+        print(f"Thời gian chạy BDD: {bdd_time:.6f} giây") # In ra kết quả
 
-    # So sánh nhanh
-    if bfs_time > 0:
-        diff = bfs_time / bdd_time if bdd_time > 0 else 0
-        print(f"=> BDD nhanh hơn BFS khoảng {diff:.2f} lần" if diff > 1 else f"=> BFS nhanh hơn BDD khoảng {1/diff:.2f} lần")
+        # So sánh nhanh
+        if bfs_time > 0:
+            diff = bfs_time / bdd_time if bdd_time > 0 else 0
+            print(f"=> BDD nhanh hơn BFS khoảng {diff:.2f} lần" if diff > 1 else f"=> BFS nhanh hơn BDD khoảng {1/diff:.2f} lần")
 
     print(f"Total BFS States: {len(bfs_set)}")
     print(f"BFS Time        : {bfs_time:.6f} s")
     print(f"BFS Peak Memory : {bfs_mem_mb:.6f} MB") # In ra kết quả
 
-    print(f"Total BDD States: {count}")
-    print(f"BDD Time        : {bdd_time:.6f} s")
-    print(f"BDD Peak Memory : {bdd_mem_mb:.6f} MB") # In ra kết quả
+    if bdd_time is not None:
+        print(f"Total BDD States: {count}")
+        print(f"BDD Time        : {bdd_time:.6f} s")
+        print(f"BDD Peak Memory : {bdd_mem_mb:.6f} MB") # In ra kết quả
+    else:
+        print("Total BDD States: (skipped, deadlock-free by structural check)")
 
     print(f"Deadlock Time   : {dl_time:.6f} s")
 
-    print(f"Optimization Time: {end_opt - start_opt:.6f} s")
+    if opt_time is not None:
+        print(f"Optimization Time: {opt_time:.6f} s")
 
     
 
@@ -0,0 +1,1055 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Mức (level) của hai node lá: lớn hơn mọi biến
+TERMINAL_LEVEL = np.iinfo(np.int32).max
+
+FALSE = 0
+TRUE = 1
+
+# Giá trị var của node đã bị thu hồi trong lúc sắp xếp lại biến
+FREE = -1
+
+# Ô đã xóa (tombstone) trong unique table
+_DELETED = -1
+
+# Mã phép toán trong computed cache
+_AND, _OR, _DIFF, _XOR, _NOT, _ITE, _EXISTS, _RELPROD, _CONSTRAIN, _SIMPLIFY = range(10)
+
+_H1 = 0x9E3779B1
+_H2 = 0x85EBCA77
+_H3 = 0xC2B2AE3D
+
+
+class BDDManager:
+    """
+    Bộ quản lý BDD lưu node trong mảng NumPy: node id -> (var, lo, hi).
+    - Node 0 / 1 là hai lá FALSE / TRUE; biến có chỉ số nhỏ nằm gần gốc (thứ tự = thứ tự tạo biến).
+    - Unique table: bảng băm địa chỉ mở (open addressing) dạng mảng int32 chứa node id.
+    - Computed cache: bảng ánh xạ trực tiếp có mất mát (lossy, như CUDD) gồm các mảng khóa/kết quả.
+    Các phép toán nhận và trả về node id (int); lớp BDD bên dưới bọc lại thành API giống pyeda.
+    Mảng được truy cập qua memoryview để đọc/ghi số nguyên Python nhanh trong các hàm đệ quy.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, cache_bits: int = 18):
+        capacity = max(capacity, 16)
+        self.var = np.empty(capacity, dtype=np.int32)
+        self.lo = np.empty(capacity, dtype=np.int32)
+        self.hi = np.empty(capacity, dtype=np.int32)
+        self.var[:2] = TERMINAL_LEVEL
+        self.lo[:2] = -1
+        self.hi[:2] = -1
+        self.size = 2
+        # Node id đã thu hồi (var = FREE), được mk dùng lại trước khi cấp id mới
+        self._free: List[int] = []
+        self._bind_nodes()
+
+        # Unique table: 0 = ô trống (lá không bao giờ nằm trong bảng)
+        self._slots = np.zeros(_next_pow2(capacity * 2), dtype=np.int32)
+        self._slots_mv = memoryview(self._slots)
+        self._mask = len(self._slots) - 1
+        self._tombstones = 0
+
+        n = 1 << cache_bits
+        self._c_op = np.full(n, -1, dtype=np.int32)
+        self._c_a = np.zeros(n, dtype=np.int32)
+        self._c_b = np.zeros(n, dtype=np.int32)
+        self._c_c = np.zeros(n, dtype=np.int32)
+        self._c_res = np.zeros(n, dtype=np.int32)
+        self._c_op_mv = memoryview(self._c_op)
+        self._c_a_mv = memoryview(self._c_a)
+        self._c_b_mv = memoryview(self._c_b)
+        self._c_c_mv = memoryview(self._c_c)
+        self._c_res_mv = memoryview(self._c_res)
+        self._c_mask = n - 1
+
+        self.names: List[str] = []
+        self._name_to_index: Dict[str, int] = {}
+        self._variables: List["Variable"] = []
+
+    # ------------------------------------------------------------------ #
+    # Bảng node / unique table / computed cache
+    # ------------------------------------------------------------------ #
+    def _bind_nodes(self):
+        self._var_mv = memoryview(self.var)
+        self._lo_mv = memoryview(self.lo)
+        self._hi_mv = memoryview(self.hi)
+
+    def _grow(self):
+        """Nhân đôi mảng node và dựng lại unique table."""
+        capacity = len(self.var) * 2
+        for name in ("var", "lo", "hi"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=np.int32)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+        self._bind_nodes()
+        self._rehash(_next_pow2(capacity * 2))
+
+    def _rehash(self, table_size: int):
+        """Dựng lại unique table từ các node còn sống (bỏ các tombstone)."""
+        self._slots = np.zeros(table_size, dtype=np.int32)
+        self._slots_mv = memoryview(self._slots)
+        self._mask = table_size - 1
+        self._tombstones = 0
+        slots, mask = self._slots_mv, self._mask
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        for u in np.nonzero(self.var[2:self.size] != FREE)[0].tolist():
+            u += 2
+            h = ((var[u] * _H1) ^ (lo[u] * _H2) ^ (hi[u] * _H3)) & mask
+            while slots[h]:
+                h = (h + 1) & mask
+            slots[h] = u
+
+    def _unlink(self, u: int):
+        """Xóa node u khỏi unique table (đặt tombstone), khóa hiện tại của u phải còn nguyên."""
+        slots, mask = self._slots_mv, self._mask
+        h = ((self._var_mv[u] * _H1) ^ (self._lo_mv[u] * _H2) ^ (self._hi_mv[u] * _H3)) & mask
+        while slots[h] != u:
+            h = (h + 1) & mask
+        slots[h] = _DELETED
+        self._tombstones += 1
+
+    def _link(self, u: int):
+        """
+        Chèn node u (đã có var/lo/hi) vào unique table. Không tự dựng lại bảng: trong swap_levels một số
+        node đang tạm gỡ khỏi bảng, nên chỗ trống được dành trước (_reserve_swap).
+        """
+        slots, mask = self._slots_mv, self._mask
+        h = ((self._var_mv[u] * _H1) ^ (self._lo_mv[u] * _H2) ^ (self._hi_mv[u] * _H3)) & mask
+        while slots[h] > 0:
+            h = (h + 1) & mask
+        slots[h] = u
+
+    def mk(self, v: int, lo: int, hi: int) -> int:
+        """Trả về node duy nhất (v, lo, hi); bỏ qua node thừa khi lo == hi."""
+        if lo == hi:
+            return lo
+        slots, mask = self._slots_mv, self._mask
+        var, lo_mv, hi_mv = self._var_mv, self._lo_mv, self._hi_mv
+        h = ((v * _H1) ^ (lo * _H2) ^ (hi * _H3)) & mask
+        while True:
+            u = slots[h]
+            if not u:
+                break
+            if u > 0 and var[u] == v and lo_mv[u] == lo and hi_mv[u] == hi:
+                return u
+            h = (h + 1) & mask
+
+        if self._free:
+            u = self._free.pop()
+        else:
+            u = self.size
+            if u >= len(self.var) - 1:
+                # Bảng node đầy: nhân đôi (unique table được dựng lại) rồi chèn qua _link
+                self._grow()
+                self.size = u + 1
+                self._var_mv[u] = v
+                self._lo_mv[u] = lo
+                self._hi_mv[u] = hi
+                self._link(u)
+                return u
+            self.size = u + 1
+        var[u] = v
+        lo_mv[u] = lo
+        hi_mv[u] = hi
+        slots[h] = u
+        return u
+
+    def _cache_get(self, op: int, a: int, b: int, c: int) -> int:
+        i = ((a * _H1) ^ (b * _H2) ^ (c * _H3) ^ op) & self._c_mask
+        if self._c_a_mv[i] == a and self._c_b_mv[i] == b and self._c_c_mv[i] == c and self._c_op_mv[i] == op:
+            return self._c_res_mv[i]
+        return -1
+
+    def _cache_put(self, op: int, a: int, b: int, c: int, res: int):
+        i = ((a * _H1) ^ (b * _H2) ^ (c * _H3) ^ op) & self._c_mask
+        self._c_op_mv[i] = op
+        self._c_a_mv[i] = a
+        self._c_b_mv[i] = b
+        self._c_c_mv[i] = c
+        self._c_res_mv[i] = res
+
+    def clear_cache(self):
+        self._c_op[:] = -1
+
+    # ------------------------------------------------------------------ #
+    # Biến
+    # ------------------------------------------------------------------ #
+    @property
+    def num_vars(self) -> int:
+        return len(self.names)
+
+    def add_var(self, name: str) -> "BDD":
+        """Tạo (hoặc lấy lại) biến theo tên; biến mới nằm dưới mọi biến đã có. Trả về literal dương."""
+        name = str(name)
+        index = self._name_to_index.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self._name_to_index[name] = index
+            self._variables.append(Variable(self, index))
+        return BDD(self, self.mk(index, FALSE, TRUE))
+
+    def variable(self, key) -> "Variable":
+        """Chuẩn hóa khóa biến: Variable, literal BDD, tên (str) hoặc chỉ số."""
+        if isinstance(key, Variable):
+            return key
+        if isinstance(key, BDD):
+            return key.top
+        if isinstance(key, str):
+            return self._variables[self._name_to_index[key]]
+        return self._variables[int(key)]
+
+    def cube(self, indices) -> int:
+        """Node hội các literal dương của các biến cho trước (dùng làm tập biến lượng từ hóa)."""
+        node = TRUE
+        for v in sorted(set(indices), reverse=True):
+            node = self.mk(v, FALSE, node)
+        return node
+
+    # ------------------------------------------------------------------ #
+    # Phép toán trên node id
+    # ------------------------------------------------------------------ #
+    def not_(self, f: int) -> int:
+        if f <= TRUE:
+            return 1 - f
+        r = self._cache_get(_NOT, f, 0, 0)
+        if r >= 0:
+            return r
+        r = self.mk(self._var_mv[f], self.not_(self._lo_mv[f]), self.not_(self._hi_mv[f]))
+        self._cache_put(_NOT, f, 0, 0, r)
+        return r
+
+    def and_(self, f: int, g: int) -> int:
+        if f == FALSE or g == FALSE:
+            return FALSE
+        if f == TRUE or f == g:
+            return g
+        if g == TRUE:
+            return f
+        if f > g:
+            f, g = g, f
+        r = self._cache_get(_AND, f, g, 0)
+        if r >= 0:
+            return r
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        vf, vg = var[f], var[g]
+        if vf == vg:
+            r = self.mk(vf, self.and_(lo[f], lo[g]), self.and_(hi[f], hi[g]))
+        elif vf < vg:
+            r = self.mk(vf, self.and_(lo[f], g), self.and_(hi[f], g))
+        else:
+            r = self.mk(vg, self.and_(f, lo[g]), self.and_(f, hi[g]))
+        self._cache_put(_AND, f, g, 0, r)
+        return r
+
+    def or_(self, f: int, g: int) -> int:
+        if f == TRUE or g == TRUE:
+            return TRUE
+        if f == FALSE or f == g:
+            return g
+        if g == FALSE:
+            return f
+        if f > g:
+            f, g = g, f
+        r = self._cache_get(_OR, f, g, 0)
+        if r >= 0:
+            return r
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        vf, vg = var[f], var[g]
+        if vf == vg:
+            r = self.mk(vf, self.or_(lo[f], lo[g]), self.or_(hi[f], hi[g]))
+        elif vf < vg:
+            r = self.mk(vf, self.or_(lo[f], g), self.or_(hi[f], g))
+        else:
+            r = self.mk(vg, self.or_(f, lo[g]), self.or_(f, hi[g]))
+        self._cache_put(_OR, f, g, 0, r)
+        return r
+
+    def diff(self, f: int, g: int) -> int:
+        """f & ~g."""
+        if f == FALSE or g == TRUE or f == g:
+            return FALSE
+        if g == FALSE:
+            return f
+        if f == TRUE:
+            return self.not_(g)
+        r = self._cache_get(_DIFF, f, g, 0)
+        if r >= 0:
+            return r
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        vf, vg = var[f], var[g]
+        if vf == vg:
+            r = self.mk(vf, self.diff(lo[f], lo[g]), self.diff(hi[f], hi[g]))
+        elif vf < vg:
+            r = self.mk(vf, self.diff(lo[f], g), self.diff(hi[f], g))
+        else:
+            r = self.mk(vg, self.diff(f, lo[g]), self.diff(f, hi[g]))
+        self._cache_put(_DIFF, f, g, 0, r)
+        return r
+
+    def xor(self, f: int, g: int) -> int:
+        if f == FALSE:
+            return g
+        if g == FALSE:
+            return f
+        if f == g:
+            return FALSE
+        if f == TRUE:
+            return self.not_(g)
+        if g == TRUE:
+            return self.not_(f)
+        if f > g:
+            f, g = g, f
+        r = self._cache_get(_XOR, f, g, 0)
+        if r >= 0:
+            return r
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        vf, vg = var[f], var[g]
+        if vf == vg:
+            r = self.mk(vf, self.xor(lo[f], lo[g]), self.xor(hi[f], hi[g]))
+        elif vf < vg:
+            r = self.mk(vf, self.xor(lo[f], g), self.xor(hi[f], g))
+        else:
+            r = self.mk(vg, self.xor(f, lo[g]), self.xor(f, hi[g]))
+        self._cache_put(_XOR, f, g, 0, r)
+        return r
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        if g == FALSE and h == TRUE:
+            return self.not_(f)
+        if g == TRUE:
+            return self.or_(f, h)
+        if h == FALSE:
+            return self.and_(f, g)
+        r = self._cache_get(_ITE, f, g, h)
+        if r >= 0:
+            return r
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        v = min(var[f], var[g], var[h])
+        f0, f1 = (lo[f], hi[f]) if var[f] == v else (f, f)
+        g0, g1 = (lo[g], hi[g]) if var[g] == v else (g, g)
+        h0, h1 = (lo[h], hi[h]) if var[h] == v else (h, h)
+        r = self.mk(v, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self._cache_put(_ITE, f, g, h, r)
+        return r
+
+    def exists(self, f: int, cube: int) -> int:
+        """exists vars(cube) . f  (cube là hội các literal dương, xem cube())."""
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        if f <= TRUE:
+            return f
+        vf = var[f]
+        while cube != TRUE and var[cube] < vf:
+            cube = hi[cube]
+        if cube == TRUE:
+            return f
+        r = self._cache_get(_EXISTS, f, cube, 0)
+        if r >= 0:
+            return r
+        if var[cube] == vf:
+            rest = hi[cube]
+            r = self.exists(lo[f], rest)
+            if r != TRUE:
+                r = self.or_(r, self.exists(hi[f], rest))
+        else:
+            r = self.mk(vf, self.exists(lo[f], cube), self.exists(hi[f], cube))
+        self._cache_put(_EXISTS, f, cube, 0, r)
+        return r
+
+    def relprod(self, f: int, g: int, cube: int) -> int:
+        """Tích quan hệ hợp nhất: exists vars(cube) . (f & g), không dựng f & g trung gian."""
+        if f == FALSE or g == FALSE:
+            return FALSE
+        if f == TRUE and g == TRUE:
+            return TRUE
+        if f == TRUE or f == g:
+            return self.exists(g, cube)
+        if g == TRUE:
+            return self.exists(f, cube)
+        if f > g:
+            f, g = g, f
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        vf, vg = var[f], var[g]
+        v = vf if vf < vg else vg
+        while cube != TRUE and var[cube] < v:
+            cube = hi[cube]
+        if cube == TRUE:
+            return self.and_(f, g)
+        r = self._cache_get(_RELPROD, f, g, cube)
+        if r >= 0:
+            return r
+        f0, f1 = (lo[f], hi[f]) if vf == v else (f, f)
+        g0, g1 = (lo[g], hi[g]) if vg == v else (g, g)
+        if var[cube] == v:
+            rest = hi[cube]
+            r = self.relprod(f0, g0, rest)
+            if r != TRUE:
+                r = self.or_(r, self.relprod(f1, g1, rest))
+        else:
+            r = self.mk(v, self.relprod(f0, g0, cube), self.relprod(f1, g1, cube))
+        self._cache_put(_RELPROD, f, g, cube, r)
+        return r
+
+    def constrain(self, f: int, c: int) -> int:
+        """
+        Cofactor tổng quát (generalized cofactor, Coudert-Madre) của f theo tập chăm sóc c:
+        kết quả trùng f trên c; nhánh nào của c bằng FALSE thì đi thẳng sang nhánh còn lại.
+        """
+        if c == FALSE:
+            return FALSE
+        if c == TRUE or f <= TRUE:
+            return f
+        if f == c:
+            return TRUE
+        r = self._cache_get(_CONSTRAIN, f, c, 0)
+        if r >= 0:
+            return r
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        vf, vc = var[f], var[c]
+        v = vf if vf < vc else vc
+        f0, f1 = (lo[f], hi[f]) if vf == v else (f, f)
+        c0, c1 = (lo[c], hi[c]) if vc == v else (c, c)
+        if c0 == FALSE:
+            r = self.constrain(f1, c1)
+        elif c1 == FALSE:
+            r = self.constrain(f0, c0)
+        else:
+            r = self.mk(v, self.constrain(f0, c0), self.constrain(f1, c1))
+        self._cache_put(_CONSTRAIN, f, c, 0, r)
+        return r
+
+    def simplify(self, f: int, c: int) -> int:
+        """
+        Phép restrict của Coudert-Madre: giống constrain nhưng các biến của c không có trong f
+        được lượng từ hóa tồn tại khỏi c, nên kết quả không chứa biến mới và thường nhỏ hơn f.
+        """
+        if c == FALSE:
+            return FALSE
+        if c == TRUE or f <= TRUE:
+            return f
+        if f == c:
+            return TRUE
+        r = self._cache_get(_SIMPLIFY, f, c, 0)
+        if r >= 0:
+            return r
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        vf, vc = var[f], var[c]
+        if vc < vf:
+            r = self.simplify(f, self.or_(lo[c], hi[c]))
+        else:
+            c0, c1 = (lo[c], hi[c]) if vc == vf else (c, c)
+            if c0 == FALSE:
+                r = self.simplify(hi[f], c1)
+            elif c1 == FALSE:
+                r = self.simplify(lo[f], c0)
+            else:
+                r = self.mk(vf, self.simplify(lo[f], c0), self.simplify(hi[f], c1))
+        self._cache_put(_SIMPLIFY, f, c, 0, r)
+        return r
+
+    def restrict(self, f: int, point: Dict[int, int]) -> int:
+        """Gán giá trị 0/1 cho một số biến (point: chỉ số biến -> 0/1)."""
+        if not point:
+            return f
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        deepest = max(point)
+        memo: Dict[int, int] = {}
+
+        def rec(u: int) -> int:
+            if u <= TRUE or var[u] > deepest:
+                return u
+            r = memo.get(u)
+            if r is None:
+                val = point.get(var[u])
+                if val is None:
+                    r = self.mk(var[u], rec(lo[u]), rec(hi[u]))
+                else:
+                    r = rec(hi[u] if val else lo[u])
+                memo[u] = r
+            return r
+
+        return rec(f)
+
+    def rename(self, f: int, mapping: Dict[int, int], monotone: Optional[bool] = None) -> int:
+        """
+        Đổi tên biến (mapping: chỉ số cũ -> chỉ số mới).
+        Nếu phép đổi tên giữ nguyên thứ tự tương đối của các biến trong support thì chỉ cần gán lại
+        nhãn node; ngược lại dựng lại bằng ite. monotone=None -> tự kiểm tra trên support của f.
+        """
+        if not mapping or f <= TRUE:
+            return f
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        if monotone is None:
+            support = sorted(self.support(f))
+            image = [mapping.get(v, v) for v in support]
+            monotone = all(a < b for a, b in zip(image, image[1:]))
+        memo: Dict[int, int] = {}
+
+        def relabel(u: int) -> int:
+            if u <= TRUE:
+                return u
+            r = memo.get(u)
+            if r is None:
+                v = var[u]
+                r = self.mk(mapping.get(v, v), relabel(lo[u]), relabel(hi[u]))
+                memo[u] = r
+            return r
+
+        def rebuild(u: int) -> int:
+            if u <= TRUE:
+                return u
+            r = memo.get(u)
+            if r is None:
+                v = var[u]
+                v = mapping.get(v, v)
+                r = self.ite(self.mk(v, FALSE, TRUE), rebuild(hi[u]), rebuild(lo[u]))
+                memo[u] = r
+            return r
+
+        return relabel(f) if monotone else rebuild(f)
+
+    def compose(self, f: int, mapping: Dict[int, int]) -> int:
+        """Thay biến bằng hàm: mapping chỉ số biến -> node id."""
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        memo: Dict[int, int] = {}
+
+        def rec(u: int) -> int:
+            if u <= TRUE:
+                return u
+            r = memo.get(u)
+            if r is None:
+                v = var[u]
+                g = mapping.get(v)
+                if g is None:
+                    g = self.mk(v, FALSE, TRUE)
+                r = self.ite(g, rec(hi[u]), rec(lo[u]))
+                memo[u] = r
+            return r
+
+        return rec(f)
+
+    # ------------------------------------------------------------------ #
+    # Truy vấn
+    # ------------------------------------------------------------------ #
+    def node_arrays(self) -> Tuple[memoryview, memoryview, memoryview]:
+        """
+        Bảng node hiện tại (var, lo, hi) dạng memoryview chỉ đọc, truy cập theo node id.
+        Chỉ dùng đến lần tạo node / sắp xếp lại kế tiếp: mảng có thể được nới (node mới không có
+        trong ảnh chụp cũ) và sift làm thay đổi var / lo / hi của các node.
+        """
+        return self._var_mv.toreadonly(), self._lo_mv.toreadonly(), self._hi_mv.toreadonly()
+
+    def nodes(self, f: int) -> List[int]:
+        """Các node đạt được từ f (kể cả lá), theo thứ tự duyệt sâu trước."""
+        lo, hi = self._lo_mv, self._hi_mv
+        seen = {f}
+        order = []
+        stack = [f]
+        while stack:
+            u = stack.pop()
+            order.append(u)
+            if u > TRUE:
+                for w in (hi[u], lo[u]):
+                    if w not in seen:
+                        seen.add(w)
+                        stack.append(w)
+        return order
+
+    def node_count(self, f: int) -> int:
+        return len(self.nodes(f))
+
+    def support(self, f: int) -> set:
+        var = self._var_mv
+        return {var[u] for u in self.nodes(f) if u > TRUE}
+
+    def satcount(self, f: int, num_vars: Optional[int] = None) -> int:
+        """
+        Số phép gán thỏa mãn f trên num_vars biến đầu tiên (mặc định: mọi biến của manager).
+        Các biến bị bỏ qua trên một cạnh được tính bằng hệ số 2^(số mức bị nhảy).
+        """
+        n = self.num_vars if num_vars is None else num_vars
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        memo = {FALSE: 0, TRUE: 1}
+
+        def level(u: int) -> int:
+            return n if u <= TRUE else var[u]
+
+        # Duyệt hậu thứ tự không đệ quy
+        stack = [f]
+        while stack:
+            u = stack[-1]
+            if u in memo:
+                stack.pop()
+                continue
+            l, h = lo[u], hi[u]
+            if l in memo and h in memo:
+                stack.pop()
+                lv = var[u]
+                memo[u] = (memo[l] << (level(l) - lv - 1)) + (memo[h] << (level(h) - lv - 1))
+            else:
+                if h not in memo:
+                    stack.append(h)
+                if l not in memo:
+                    stack.append(l)
+        return memo[f] << level(f)
+
+    def pick_one(self, f: int) -> Optional[Dict[int, int]]:
+        """Một phép gán thỏa mãn (chỉ trên các biến nằm trên đường đi), None nếu f = FALSE."""
+        if f == FALSE:
+            return None
+        lo, hi, var = self._lo_mv, self._hi_mv, self._var_mv
+        point = {}
+        u = f
+        while u > TRUE:
+            if lo[u] != FALSE:
+                point[var[u]] = 0
+                u = lo[u]
+            else:
+                point[var[u]] = 1
+                u = hi[u]
+        return point
+
+    def iter_paths(self, f: int) -> Iterator[Dict[int, int]]:
+        """Liệt kê các đường đi tới lá TRUE (mỗi đường là một cube: biến -> 0/1)."""
+        lo, hi, var = self._lo_mv, self._hi_mv, self._var_mv
+        stack: List[Tuple[int, Dict[int, int]]] = [(f, {})]
+        while stack:
+            u, point = stack.pop()
+            if u == TRUE:
+                yield point
+                continue
+            if u == FALSE:
+                continue
+            v = var[u]
+            stack.append((hi[u], {**point, v: 1}))
+            stack.append((lo[u], {**point, v: 0}))
+
+
+    # ------------------------------------------------------------------ #
+    # Sắp xếp lại biến động (dynamic reordering)
+    # ------------------------------------------------------------------ #
+    def _begin_reorder(self, roots: Sequence[int]):
+        """
+        Thu gom rác và dựng đếm tham chiếu cho phiên sắp xếp lại:
+        chỉ các node đạt được từ roots được giữ, mọi node khác bị thu hồi (var = FREE) vào danh sách tự do.
+        """
+        # Literal của mọi biến luôn được giữ (các BDD trả về từ add_var vẫn dùng được)
+        roots = list(roots) + [self.mk(v, FALSE, TRUE) for v in range(self.num_vars)]
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+        live = set()
+        stack = [r for r in roots if r > TRUE]
+        while stack:
+            u = stack.pop()
+            if u in live:
+                continue
+            live.add(u)
+            for w in (lo[u], hi[u]):
+                if w > TRUE and w not in live:
+                    stack.append(w)
+
+        ref = [0] * self.size
+        for u in live:
+            ref[lo[u]] += 1
+            ref[hi[u]] += 1
+        for r in roots:
+            ref[r] += 1
+
+        alive = np.zeros(self.size, dtype=bool)
+        alive[:2] = True
+        if live:
+            alive[np.fromiter(live, dtype=np.int64, count=len(live))] = True
+        self.var[: self.size][~alive] = FREE
+        self._free = (np.nonzero(~alive)[0][::-1]).tolist()
+        self._rehash(len(self._slots))
+
+        levels = [set() for _ in range(self.num_vars)]
+        for u in live:
+            levels[var[u]].add(u)
+        self._ref = ref
+        self._levels = levels
+
+    def _end_reorder(self):
+        del self._ref
+        del self._levels
+        self._rehash(len(self._slots))
+        self.clear_cache()
+
+    def _deref(self, u: int):
+        ref = self._ref
+        ref[u] -= 1
+        if ref[u] == 0 and u > TRUE:
+            self._unlink(u)
+            self._levels[self._var_mv[u]].discard(u)
+            lo, hi = self._lo_mv[u], self._hi_mv[u]
+            self._var_mv[u] = FREE
+            self._free.append(u)
+            self._deref(lo)
+            self._deref(hi)
+
+    def _mk_counted(self, v: int, lo: int, hi: int) -> int:
+        """
+        mk trong phiên sắp xếp lại, trả về node đã được cộng một tham chiếu. Node mới (chưa có tham chiếu)
+        được ghi vào danh sách theo mức và đếm tham chiếu con.
+        """
+        ref = self._ref
+        if lo == hi:
+            ref[lo] += 1
+            return lo
+        u = self.mk(v, lo, hi)
+        if u >= len(ref):
+            ref.append(0)
+        if ref[u] == 0:
+            ref[lo] += 1
+            ref[hi] += 1
+            self._levels[v].add(u)
+        ref[u] += 1
+        return u
+
+    def _reserve_swap(self, upper: int, lower: int):
+        """
+        Dành chỗ cho một lần swap_levels (upper / lower: số node ở hai mức) trước khi gỡ node nào:
+        tối đa 2 * upper node mới, và unique table đủ chỗ cho mọi tombstone phát sinh
+        (node hai mức bị gỡ ra + node chết khi giảm tham chiếu), nên trong lúc đổi mức không phải
+        nới mảng node hay dựng lại bảng.
+        """
+        new_nodes = 2 * upper
+        while self.size + new_nodes >= len(self.var) - 1:
+            self._grow()
+        worst = self.size + new_nodes + upper + lower + self.live_count()
+        if (worst + self._tombstones) * 4 > len(self._slots) * 3:
+            self._rehash(max(len(self._slots), _next_pow2(worst * 2)))
+
+    def swap_levels(self, i: int):
+        """
+        Đổi chỗ hai biến ở mức i và i+1 ngay trên bảng node (chỉ dùng trong phiên sắp xếp lại).
+        Mọi node id vẫn biểu diễn đúng hàm cũ nên các BDD bên ngoài không cần cập nhật.
+        """
+        levels = self._levels
+        upper, lower = levels[i], levels[i + 1]
+        self._reserve_swap(len(upper), len(lower))
+        var, lo, hi = self._var_mv, self._lo_mv, self._hi_mv
+
+        dependent, independent = [], []
+        for u in upper:
+            if lo[u] in lower or hi[u] in lower:
+                dependent.append(u)
+            else:
+                independent.append(u)
+        for u in upper:
+            self._unlink(u)
+        for u in lower:
+            self._unlink(u)
+
+        # Biến dưới lên mức i, node không phụ thuộc biến dưới xuống mức i+1
+        for u in lower:
+            var[u] = i
+            self._link(u)
+        for u in independent:
+            var[u] = i + 1
+            self._link(u)
+        levels[i] = set(lower)
+        levels[i + 1] = set(independent)
+
+        for u in dependent:
+            f0, f1 = lo[u], hi[u]
+            f00, f01 = (lo[f0], hi[f0]) if var[f0] == i else (f0, f0)
+            f10, f11 = (lo[f1], hi[f1]) if var[f1] == i else (f1, f1)
+            g0 = self._mk_counted(i + 1, f00, f10)
+            g1 = self._mk_counted(i + 1, f01, f11)
+            lo[u] = g0
+            hi[u] = g1
+            self._link(u)
+            levels[i].add(u)
+            self._deref(f0)
+            self._deref(f1)
+
+        names = self.names
+        names[i], names[i + 1] = names[i + 1], names[i]
+        variables = self._variables
+        variables[i], variables[i + 1] = variables[i + 1], variables[i]
+        variables[i].index = i
+        variables[i + 1].index = i + 1
+        self._name_to_index[names[i]] = i
+        self._name_to_index[names[i + 1]] = i + 1
+
+    def table_size(self) -> int:
+        """Số node trong (không tính lá) đang có trong unique table."""
+        return int(np.count_nonzero(self.var[2:self.size] != FREE))
+
+    def live_count(self) -> int:
+        """Tổng số node trong là (không tính lá) trong phiên sắp xếp lại."""
+        return sum(len(level) for level in self._levels)
+
+    def sift(self, roots: Sequence[int], blocks: Optional[List[List["Variable"]]] = None,
+             max_growth: float = 1.2) -> int:
+        """
+        Sắp xếp lại biến bằng sifting (Rudell): lần lượt dời từng khối biến (lớn trước) qua mọi vị trí,
+        dừng một hướng khi kích thước vượt max_growth * tốt nhất, rồi đặt khối ở vị trí tốt nhất.
+        - roots: các node id cần giữ (node không đạt được từ roots hoặc literal của biến bị thu hồi).
+        - blocks: các nhóm biến luôn đi liền nhau (vd. cặp x, x'); mặc định mỗi biến một khối.
+          Các biến của một khối phải đang nằm liền nhau.
+        Trả về tổng số node (trong) sau khi sắp xếp.
+        """
+        if blocks is None:
+            blocks = [[v] for v in self._variables]
+        blocks = sorted(blocks, key=lambda b: b[0].index)
+        self._begin_reorder(roots)
+        try:
+            size = self.live_count()
+            by_size = sorted(blocks, key=lambda b: -sum(len(self._levels[v.index]) for v in b))
+            for block in by_size:
+                pos = blocks.index(block)
+                best_size, best_pos = size, pos
+
+                for step in (1, -1):
+                    while 0 <= pos + step < len(blocks):
+                        self._swap_blocks(blocks, min(pos, pos + step))
+                        pos += step
+                        size = self.live_count()
+                        if size < best_size:
+                            best_size, best_pos = size, pos
+                        elif size > max_growth * best_size:
+                            break
+                while pos != best_pos:
+                    step = 1 if best_pos > pos else -1
+                    self._swap_blocks(blocks, min(pos, pos + step))
+                    pos += step
+                size = self.live_count()
+        finally:
+            self._end_reorder()
+        return size
+
+    def _swap_blocks(self, blocks: List[List["Variable"]], k: int):
+        """Đổi chỗ hai khối kề nhau blocks[k] và blocks[k+1] bằng các phép đổi mức liền kề."""
+        first, second = blocks[k], blocks[k + 1]
+        start = first[0].index
+        for j in range(len(second)):
+            # Đưa biến thứ j của khối sau lên trên toàn bộ khối trước
+            for level in range(start + len(first) + j - 1, start + j - 1, -1):
+                self.swap_levels(level)
+        blocks[k], blocks[k + 1] = second, first
+
+    def order(self) -> List[str]:
+        """Tên biến theo thứ tự mức hiện tại (gốc -> lá)."""
+        return list(self.names)
+
+
+def _next_pow2(n: int) -> int:
+    p = 1
+    while p < n:
+        p <<= 1
+    return p
+
+
+class Variable:
+    """Biến BDD của một BDDManager (str() trả về tên biến, giống pyeda)."""
+
+    def __init__(self, manager: BDDManager, index: int):
+        self.manager = manager
+        self.name = manager.names[index]
+        # Mức hiện tại của biến (thay đổi khi sắp xếp lại biến)
+        self.index = index
+
+    @property
+    def uniqid(self) -> int:
+        return self.index
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return self.name
+
+    def __hash__(self) -> int:
+        return hash((id(self.manager), self.name))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Variable) and other.manager is self.manager and other.name == self.name
+
+    def __lt__(self, other: "Variable") -> bool:
+        return self.index < other.index
+
+
+class BDD:
+    """
+    Hàm Boolean biểu diễn bởi một node của BDDManager.
+    API tương thích với phần pyeda mà dự án dùng: & | ^ ~, is_zero/is_one, top, support, inputs,
+    restrict, compose, smoothing, satisfy_count, satisfy_one, satisfy_all, equivalent, to_dot.
+    """
+
+    __slots__ = ("manager", "node")
+
+    def __init__(self, manager: BDDManager, node: int):
+        self.manager = manager
+        self.node = node
+
+    def _wrap(self, node: int) -> "BDD":
+        return BDD(self.manager, node)
+
+    def _node_of(self, other) -> int:
+        if isinstance(other, BDD):
+            return other.node
+        if other in (0, 1):
+            return int(other)
+        raise TypeError(f"Cannot combine BDD with {other!r}")
+
+    # Toán tử
+    def __and__(self, other) -> "BDD":
+        return self._wrap(self.manager.and_(self.node, self._node_of(other)))
+
+    def __or__(self, other) -> "BDD":
+        return self._wrap(self.manager.or_(self.node, self._node_of(other)))
+
+    def __xor__(self, other) -> "BDD":
+        return self._wrap(self.manager.xor(self.node, self._node_of(other)))
+
+    def __invert__(self) -> "BDD":
+        return self._wrap(self.manager.not_(self.node))
+
+    __rand__ = __and__
+    __ror__ = __or__
+
+    def __sub__(self, other) -> "BDD":
+        """self & ~other (tính trực tiếp, không dựng ~other)."""
+        return self._wrap(self.manager.diff(self.node, self._node_of(other)))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BDD) and other.manager is self.manager and other.node == self.node
+
+    def __hash__(self) -> int:
+        return hash((id(self.manager), self.node))
+
+    def __repr__(self) -> str:
+        if self.node <= TRUE:
+            return str(self.node)
+        return f"<BDD node={self.node} top={self.top}>"
+
+    # Truy vấn
+    def is_zero(self) -> bool:
+        return self.node == FALSE
+
+    def is_one(self) -> bool:
+        return self.node == TRUE
+
+    @property
+    def top(self) -> Optional[Variable]:
+        if self.node <= TRUE:
+            return None
+        return self.manager._variables[self.manager._var_mv[self.node]]
+
+    @property
+    def low(self) -> "BDD":
+        """Nhánh 0 của node gốc (lấy trực tiếp từ bảng node)."""
+        return self._wrap(self.manager._lo_mv[self.node]) if self.node > TRUE else self
+
+    @property
+    def high(self) -> "BDD":
+        """Nhánh 1 của node gốc."""
+        return self._wrap(self.manager._hi_mv[self.node]) if self.node > TRUE else self
+
+    @property
+    def support(self) -> frozenset:
+        return frozenset(self.manager._variables[v] for v in self.manager.support(self.node))
+
+    @property
+    def inputs(self) -> Tuple[Variable, ...]:
+        return tuple(sorted(self.support))
+
+    def node_count(self) -> int:
+        return self.manager.node_count(self.node)
+
+    def _point(self, point) -> Dict[int, int]:
+        mgr = self.manager
+        return {mgr.variable(k).index: int(v) for k, v in point.items()}
+
+    def restrict(self, point) -> "BDD":
+        """point: {biến: 0/1}; biến có thể là Variable, literal BDD hoặc tên."""
+        npoint = self._point(point)
+        # Trường hợp thường gặp (Optimization): gán biến gốc -> lấy con trực tiếp
+        if len(npoint) == 1 and self.node > TRUE:
+            (v, val), = npoint.items()
+            if self.manager._var_mv[self.node] == v:
+                return self.high if val else self.low
+        return self._wrap(self.manager.restrict(self.node, npoint))
+
+    def constrain(self, care) -> "BDD":
+        """Cofactor tổng quát theo tập chăm sóc care (xem BDDManager.constrain)."""
+        return self._wrap(self.manager.constrain(self.node, self._node_of(care)))
+
+    def simplify(self, care) -> "BDD":
+        """Restrict của Coudert-Madre theo tập chăm sóc care (xem BDDManager.simplify)."""
+        return self._wrap(self.manager.simplify(self.node, self._node_of(care)))
+
+    def compose(self, mapping) -> "BDD":
+        mgr = self.manager
+        return self._wrap(mgr.compose(self.node, {mgr.variable(k).index: g.node for k, g in mapping.items()}))
+
+    def smoothing(self, vs=None) -> "BDD":
+        """exists vs . f (mặc định: mọi biến trong support)."""
+        mgr = self.manager
+        if vs is None:
+            indices = mgr.support(self.node)
+        else:
+            if isinstance(vs, (BDD, Variable, str)):
+                vs = [vs]
+            indices = [mgr.variable(v).index for v in vs]
+        return self._wrap(mgr.exists(self.node, mgr.cube(indices)))
+
+    def satisfy_count(self) -> int:
+        """Số phép gán thỏa mãn trên các biến thuộc support (cùng ngữ nghĩa với pyeda)."""
+        mgr = self.manager
+        support = sorted(mgr.support(self.node))
+        if not support:
+            return 1 if self.node == TRUE else 0
+        # Đếm trên toàn bộ biến rồi chia cho các biến không thuộc support
+        return mgr.satcount(self.node) >> (mgr.num_vars - len(support))
+
+    def satisfy_one(self) -> Optional[Dict[Variable, int]]:
+        point = self.manager.pick_one(self.node)
+        if point is None:
+            return None
+        return {self.manager._variables[v]: val for v, val in point.items()}
+
+    def satisfy_all(self) -> Iterator[Dict[Variable, int]]:
+        """Liệt kê mọi phép gán thỏa mãn trên support (mở rộng các biến don't-care của từng cube)."""
+        mgr = self.manager
+        support = sorted(mgr.support(self.node))
+        for cube in mgr.iter_paths(self.node):
+            free = [v for v in support if v not in cube]
+            for bits in range(1 << len(free)):
+                point = dict(cube)
+                for k, v in enumerate(free):
+                    point[v] = (bits >> k) & 1
+                yield {mgr._variables[v]: point[v] for v in support}
+
+    def equivalent(self, other) -> bool:
+        return self.node == self._node_of(other)
+
+    def dfs_preorder(self) -> Iterator[int]:
+        return iter(self.manager.nodes(self.node))
+
+    def to_dot(self, name: str = "BDD") -> str:
+        mgr = self.manager
+        lines = [f"graph {name} {{"]
+        for u in mgr.nodes(self.node):
+            if u <= TRUE:
+                lines.append(f'  n{u} [label={u},shape=box];')
+            else:
+                lines.append(f'  n{u} [label="{mgr.names[mgr._var_mv[u]]}",shape=circle];')
+        for u in mgr.nodes(self.node):
+            if u > TRUE:
+                lines.append(f"  n{u} -- n{mgr._lo_mv[u]} [label=0,style=dashed];")
+                lines.append(f"  n{u} -- n{mgr._hi_mv[u]} [label=1];")
+        lines.append("}")
+        return "\n".join(lines)
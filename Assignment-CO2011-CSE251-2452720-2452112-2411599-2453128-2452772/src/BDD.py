@@ -1,114 +1,641 @@
-import collections
-from typing import Tuple
+import hashlib
+import json
+import os
+from typing import Callable, List, Optional, Tuple
 from pyeda.inter import *
+from pyeda.boolalg import bdd as _pyeda_bdd
+from pyeda.boolalg.bdd import BDDNODEONE, BDDNODEZERO, BDDONE, BDDZERO
 from src.PetriNet import PetriNet
+from src.ArrayBDD import BDD as ArrayBDD, BDDManager
+from src.Counting import SatCounter, count_states
+from src.Firing import get_firing_table
+from src.Ordering import ORDERINGS, compute_order, order_bfs
 import numpy as np
 import time
 
+# Node PyEDA cấp thấp: PyEDA không có API công khai để dựng node từ (root, lo, hi), bọc node thành BDD
+# hay đọc kích thước unique table. Các phép toán node trong module này chỉ đi qua ba tên dưới đây
+# (đúng với pyeda==0.29.0 trong requirements.txt); module khác dùng các hàm công khai
+# node_count / bdd_minus thay vì chạm vào node.
+try:
+    _bddnode = _pyeda_bdd._bddnode
+    _bdd = _pyeda_bdd._bdd
+    _pyeda_nodes = _pyeda_bdd._NODES
+except AttributeError as e:
+    raise ImportError(f"Unsupported pyeda version (missing BDD node internals): {e}") from None
+
 def reorder_places_bfs(pn: PetriNet) -> list:
     """
     Sắp xếp lại thứ tự biến BDD dựa trên cấu trúc đồ thị (BFS).
     Giúp tối ưu hóa kích thước BDD bằng cách đặt các Place có quan hệ gần nhau nằm cạnh nhau.
+    (Giữ lại cho tương thích; các heuristic khác xem src.Ordering.)
     """
-    # 1. Xây dựng đồ thị kề (Adjacency Graph) giữa các Place
-    adj = collections.defaultdict(set)
-    
-    if hasattr(pn, "I"): I = np.array(getattr(pn, "I"), dtype=int)
-    else: I = np.array(getattr(pn, "pre"), dtype=int)
-    
-    if hasattr(pn, "O"): O = np.array(getattr(pn, "O"), dtype=int)
-    else: O = np.array(getattr(pn, "post"), dtype=int)
-    
-    # Xác định chiều của ma trận để duyệt đúng Transition
-    num_places_obj = len(pn.place_ids)
-    r, c = I.shape
-    
-    # --- FIX: Đồng bộ logic xác định chiều ma trận với hàm chính ---
-    if c == num_places_obj: 
-        row_is_trans = True # Standard: Hàng là Transition
-        num_trans = r
+    return order_bfs(pn)
+
+def net_fingerprint(pn) -> str:
+    """Mã băm nội dung của mạng (place, ma trận I/O dạng P x T, M0) - không phụ thuộc tên file."""
+    table = get_firing_table(pn)
+    h = hashlib.sha256()
+    h.update(json.dumps([str(p) for p in pn.place_ids]).encode())
+    for arr in (table.I, table.O, np.asarray(pn.M0).reshape(-1)):
+        arr = np.ascontiguousarray(arr, dtype=np.int64)
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+def load_cached_order(path: str, fingerprint: str) -> Optional[List[str]]:
+    """Đọc thứ tự biến đã lưu cho mạng có fingerprint tương ứng (None nếu chưa có)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get(fingerprint)
+    except (OSError, ValueError):
+        return None
+
+def save_cached_order(path: str, fingerprint: str, order: List[str]):
+    """Ghi thứ tự biến tốt nhất của một mạng vào file cache JSON (giữ nguyên các mạng khác)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data[fingerprint] = list(order)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+# Phiên bản định dạng file .npz của tập reachable
+# (2: I/O đọc qua FiringTable - các file cũ của mạng vuông được tính với hướng ma trận sai)
+REACH_FORMAT_VERSION = 2
+
+def save_reachable(path: str, pn, reach, count: Optional[int] = None, fingerprint: Optional[str] = None):
+    """
+    Lưu BDD tập reachable (backend pyeda hoặc array) ra file .npz:
+    - var / lo / hi : bảng node trong (int32); id 0 / 1 là lá, node trong đánh số từ 2 theo mức tăng dần
+                      nên con luôn có id lớn hơn cha; var là mức trong order
+    - root          : id node gốc
+    - order         : tên place theo thứ tự biến BDD
+    - fingerprint   : net_fingerprint(pn), dùng để kiểm tra khi đọc lại
+    - count         : số marking (lưu dạng chuỗi, không giới hạn 64 bit)
+    """
+    counter = SatCounter(reach, pn.place_ids)
+    np.savez_compressed(
+        path,
+        version=np.array(REACH_FORMAT_VERSION),
+        var=np.array(counter.level[2:], dtype=np.int32),
+        lo=np.array(counter.lo[2:], dtype=np.int32),
+        hi=np.array(counter.hi[2:], dtype=np.int32),
+        root=np.array(counter.root),
+        order=np.array(counter.order, dtype=str),
+        fingerprint=np.array(fingerprint or net_fingerprint(pn)),
+        count=np.array(str(counter.count() if count is None else count)),
+    )
+
+def load_reachable(path: str, fingerprint: Optional[str] = None) -> Optional[Tuple[ArrayBDD, int]]:
+    """
+    Đọc lại tập reachable đã lưu bằng save_reachable thành BDD của backend array (biến đặt tên theo place,
+    dùng được trực tiếp cho Deadlock / Optimization). Trả về (BDD, số marking), hoặc None nếu file không
+    tồn tại, sai phiên bản hay fingerprint không khớp.
+    """
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != REACH_FORMAT_VERSION:
+                return None
+            if fingerprint is not None and str(data["fingerprint"]) != fingerprint:
+                return None
+            var, lo, hi = data["var"].tolist(), data["lo"].tolist(), data["hi"].tolist()
+            root = int(data["root"])
+            order = data["order"].tolist()
+            count = int(str(data["count"]))
+    except (OSError, KeyError, ValueError):
+        return None
+
+    mgr = BDDManager(capacity=max(len(var) + 2, 16))
+    for name in order:
+        mgr.add_var(name)
+    # Dựng từ đáy lên: id trong file -> node id của manager
+    ids = [0, 1] + [0] * len(var)
+    for k in range(len(var) - 1, -1, -1):
+        ids[k + 2] = mgr.mk(var[k], ids[lo[k]], ids[hi[k]])
+    return ArrayBDD(mgr, ids[root]), count
+
+def bdd_reachable_cached(pn, cache_dir: str, **kwargs) -> Tuple[BinaryDecisionDiagram, int]:
+    """
+    bdd_reachable có cache trên đĩa: file <cache_dir>/<net_fingerprint>.npz. Nếu đã có thì đọc lại
+    (backend array), nếu chưa thì tính bằng bdd_reachable(pn, **kwargs) rồi lưu.
+    Cache chỉ dùng cho mã hóa 1-safe (bound=1); với bound > 1 luôn tính lại.
+    """
+    if kwargs.get("bound", 1) != 1:
+        return bdd_reachable(pn, **kwargs)
+    fingerprint = net_fingerprint(pn)
+    path = os.path.join(cache_dir, f"{fingerprint}.npz")
+    loaded = load_reachable(path, fingerprint)
+    if loaded is not None:
+        print(f"   [BDD] Loaded reachable set from cache ({path})")
+        return loaded
+    reach, count = bdd_reachable(pn, **kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = os.path.join(cache_dir, f"{fingerprint}.tmp.npz")
+    save_reachable(tmp, pn, reach, count, fingerprint)
+    os.replace(tmp, path)
+    return reach, count
+
+class IterationStats:
+    """
+    Thống kê một vòng lặp điểm bất động của bdd_reachable (gửi cho callback on_iteration).
+    - iteration         : số thứ tự vòng lặp (bắt đầu từ 1, đếm cả các vòng của mọi tầng level-fixpoint)
+    - frontier_nodes    : số node của frontier dùng cho vòng sau (0 nếu không còn trạng thái mới)
+    - reach_nodes       : số node của Reach sau vòng lặp
+    - new_states        : số marking mới tìm được trong vòng
+    - image_time        : thời gian tính ảnh (giây) trong vòng của từng phần tử transitions_data
+                          (từng transition, hoặc từng cụm khi dùng cluster_threshold)
+    - unique_table_size : số node trong bảng unique của thư viện BDD (toàn bộ BDD đang sống)
+    - elapsed           : thời gian từ đầu vòng lặp điểm bất động (giây)
+    """
+
+    def __init__(self, iteration, frontier_nodes, reach_nodes, new_states, image_time, unique_table_size, elapsed):
+        self.iteration = iteration
+        self.frontier_nodes = frontier_nodes
+        self.reach_nodes = reach_nodes
+        self.new_states = new_states
+        self.image_time = image_time
+        self.unique_table_size = unique_table_size
+        self.elapsed = elapsed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return (
+            f"IterationStats(iteration={self.iteration}, frontier_nodes={self.frontier_nodes}, "
+            f"reach_nodes={self.reach_nodes}, new_states={self.new_states}, "
+            f"image_time={sum(self.image_time):.4f}s, unique_table_size={self.unique_table_size})"
+        )
+
+def _unique_table_size(bdd) -> int:
+    """Số node trong unique table của backend chứa bdd."""
+    if isinstance(bdd, ArrayBDD):
+        return bdd.manager.table_size()
+    return len(_pyeda_nodes)
+
+def _image(S, t_data):
+    """
+    Ảnh của tập S qua một transition (hoặc một cụm transition nếu t_data có 'relation').
+    - Transition đơn: (exists involved_vars . S & Enable) & Update.
+    - Cụm: (exists X_c . S & R_c(X_c, X'_c)) rồi đổi tên X'_c -> X_c.
+    Trả về None nếu không bắn được từ trạng thái nào trong S.
+    """
+    if 'relation' in t_data:
+        start = time.perf_counter()
+        if isinstance(S, ArrayBDD):
+            mgr = S.manager
+            node = mgr.relprod(S.node, t_data['relation'].node, t_data['quant'])
+            result = None if node == 0 else ArrayBDD(mgr, mgr.rename(node, t_data['rename'], t_data['adjacent']))
+        else:
+            node = _and_exists(S.node, t_data['relation'].node, t_data['quant'], {}, {})
+            if node is BDDNODEZERO:
+                result = None
+            elif t_data['adjacent']:
+                result = _bdd(_rename(node, t_data['rename'], {}))
+            else:
+                result = _bdd(_rename_general(node, t_data['rename'], {}, {}, {}))
+        t_data['time'] += time.perf_counter() - start
+        t_data['calls'] += 1
+        return result
+
+    start = time.perf_counter()
+    S_en = _intersect(S, t_data['enable'])
+    if S_en.is_zero():
+        result = None
     else:
-        row_is_trans = False # Non-standard: Cột là Transition
-        num_trans = c
-
-    for t in range(num_trans):
-        # Lấy danh sách Input và Output places của transition t
-        if row_is_trans:
-            inputs = np.where(I[t, :] > 0)[0]
-            outputs = np.where(O[t, :] > 0)[0]
+        if t_data['smooth_vars']:
+            S_en = S_en.smoothing(t_data['smooth_vars'])
+        result = _intersect(S_en, t_data['update'])
+    t_data['time'] += time.perf_counter() - start
+    t_data['calls'] += 1
+    return result
+
+def _or_node(f, g, cache):
+    """f | g trên node PyEDA, có bảng nhớ (ite của PyEDA không có computed cache)."""
+    if f is BDDNODEONE or g is BDDNODEONE:
+        return BDDNODEONE
+    if f is BDDNODEZERO or f is g:
+        return g
+    if g is BDDNODEZERO:
+        return f
+    key = (f, g) if id(f) < id(g) else (g, f)
+    ret = cache.get(key)
+    if ret is None:
+        root = min(f.root, g.root)
+        f0, f1 = (f.lo, f.hi) if f.root == root else (f, f)
+        g0, g1 = (g.lo, g.hi) if g.root == root else (g, g)
+        ret = _bddnode(root, _or_node(f0, g0, cache), _or_node(f1, g1, cache))
+        cache[key] = ret
+    return ret
+
+def _and_node(f, g, cache):
+    """f & g trên node PyEDA, có bảng nhớ."""
+    if f is BDDNODEZERO or g is BDDNODEZERO:
+        return BDDNODEZERO
+    if f is BDDNODEONE or f is g:
+        return g
+    if g is BDDNODEONE:
+        return f
+    key = (f, g) if id(f) < id(g) else (g, f)
+    ret = cache.get(key)
+    if ret is None:
+        root = min(f.root, g.root)
+        f0, f1 = (f.lo, f.hi) if f.root == root else (f, f)
+        g0, g1 = (g.lo, g.hi) if g.root == root else (g, g)
+        ret = _bddnode(root, _and_node(f0, g0, cache), _and_node(f1, g1, cache))
+        cache[key] = ret
+    return ret
+
+def _diff_node(f, g, cache):
+    """f & ~g trên node PyEDA, có bảng nhớ."""
+    if f is BDDNODEZERO or g is BDDNODEONE or f is g:
+        return BDDNODEZERO
+    if g is BDDNODEZERO:
+        return f
+    ret = cache.get((f, g))
+    if ret is None:
+        if f is BDDNODEONE:
+            root = g.root
         else:
-            inputs = np.where(I[:, t] > 0)[0]
-            outputs = np.where(O[:, t] > 0)[0]
-            
-        # Nối tất cả các node liên quan với nhau trong đồ thị vô hướng
-        nodes = np.concatenate((inputs, outputs))
-        for i in range(len(nodes)):
-            for j in range(i + 1, len(nodes)):
-                u, v = nodes[i], nodes[j]
-                adj[u].add(v)
-                adj[v].add(u)
-
-    # 2. Duyệt BFS để tạo thứ tự mới
-    visited = [False] * len(pn.place_ids)
-    new_order_indices = []
-    
-    # Duyệt qua tất cả các thành phần liên thông
-    for start_node in range(len(pn.place_ids)):
-        if not visited[start_node]:
-            queue = collections.deque([start_node])
-            visited[start_node] = True
-            new_order_indices.append(start_node)
-            
-            while queue:
-                u = queue.popleft()
-                # Sort neighbors để đảm bảo tính tất định (deterministic)
-                neighbors = sorted(list(adj[u]))
-                for v in neighbors:
-                    if not visited[v]:
-                        visited[v] = True
-                        new_order_indices.append(v)
-                        queue.append(v)
-    
-    # Trả về danh sách ID theo thứ tự mới
-    return [pn.place_ids[i] for i in new_order_indices]
+            root = min(f.root, g.root)
+        f0, f1 = (f.lo, f.hi) if f.root == root else (f, f)
+        g0, g1 = (g.lo, g.hi) if g.root == root else (g, g)
+        ret = _bddnode(root, _diff_node(f0, g0, cache), _diff_node(f1, g1, cache))
+        cache[(f, g)] = ret
+    return ret
+
+def _constrain_node(f, c, cache):
+    """Cofactor tổng quát (constrain) của f theo tập chăm sóc c trên node PyEDA."""
+    if c is BDDNODEZERO:
+        return BDDNODEZERO
+    if c is BDDNODEONE or f is BDDNODEZERO or f is BDDNODEONE:
+        return f
+    if f is c:
+        return BDDNODEONE
+    ret = cache.get((f, c))
+    if ret is None:
+        root = min(f.root, c.root)
+        f0, f1 = (f.lo, f.hi) if f.root == root else (f, f)
+        c0, c1 = (c.lo, c.hi) if c.root == root else (c, c)
+        if c0 is BDDNODEZERO:
+            ret = _constrain_node(f1, c1, cache)
+        elif c1 is BDDNODEZERO:
+            ret = _constrain_node(f0, c0, cache)
+        else:
+            ret = _bddnode(root, _constrain_node(f0, c0, cache), _constrain_node(f1, c1, cache))
+        cache[(f, c)] = ret
+    return ret
+
+def _simplify_node(f, c, cache, or_cache):
+    """Restrict của Coudert-Madre trên node PyEDA (biến chỉ có trong c bị lượng từ hóa khỏi c)."""
+    if c is BDDNODEZERO:
+        return BDDNODEZERO
+    if c is BDDNODEONE or f is BDDNODEZERO or f is BDDNODEONE:
+        return f
+    if f is c:
+        return BDDNODEONE
+    ret = cache.get((f, c))
+    if ret is None:
+        if c.root < f.root:
+            ret = _simplify_node(f, _or_node(c.lo, c.hi, or_cache), cache, or_cache)
+        else:
+            c0, c1 = (c.lo, c.hi) if c.root == f.root else (c, c)
+            if c0 is BDDNODEZERO:
+                ret = _simplify_node(f.hi, c1, cache, or_cache)
+            elif c1 is BDDNODEZERO:
+                ret = _simplify_node(f.lo, c0, cache, or_cache)
+            else:
+                ret = _bddnode(
+                    f.root, _simplify_node(f.lo, c0, cache, or_cache), _simplify_node(f.hi, c1, cache, or_cache)
+                )
+        cache[(f, c)] = ret
+    return ret
+
+def _simplify_frontier(New, Reach_old):
+    """
+    Thay frontier New bằng BDD nhỏ nhất nằm giữa New và New | Reach_old: các trạng thái đã reach
+    là don't-care (ảnh của chúng đã được tính), nên dùng restrict / constrain với tập chăm sóc ~Reach_old.
+    """
+    if isinstance(New, ArrayBDD):
+        care = ~Reach_old
+        candidates = [New, New.simplify(care), New.constrain(care)]
+    else:
+        care = _diff_node(BDDNODEONE, Reach_old.node, {})
+        candidates = [
+            New,
+            _bdd(_simplify_node(New.node, care, {}, {})),
+            _bdd(_constrain_node(New.node, care, {})),
+        ]
+    return min(candidates, key=node_count)
+
+def _union(f, g):
+    if isinstance(f, ArrayBDD):
+        return f | g
+    return _bdd(_or_node(f.node, g.node, {}))
+
+def _intersect(f, g):
+    if isinstance(f, ArrayBDD):
+        return f & g
+    return _bdd(_and_node(f.node, g.node, {}))
+
+def bdd_minus(f, g):
+    """f & ~g trên cả hai backend (pyeda: phép trừ trên node có bảng nhớ)."""
+    if isinstance(f, ArrayBDD):
+        return f - g
+    return _bdd(_diff_node(f.node, g.node, {}))
+
+def _and_exists(f, g, quant, cache, or_cache):
+    """
+    Phép and-exists hợp nhất (relational product): exists quant . (f & g),
+    lượng từ hóa ngay trong lúc đệ quy thay vì dựng f & g rồi mới smoothing.
+    - quant: tập root (uniqid) của các biến cần lượng từ hóa.
+    """
+    if f is BDDNODEZERO or g is BDDNODEZERO:
+        return BDDNODEZERO
+    if f is BDDNODEONE and g is BDDNODEONE:
+        return BDDNODEONE
+    key = (f, g) if id(f) < id(g) else (g, f)
+    ret = cache.get(key)
+    if ret is None:
+        root = min(n.root for n in (f, g) if n.root > 0)
+        f0, f1 = (f.lo, f.hi) if f.root == root else (f, f)
+        g0, g1 = (g.lo, g.hi) if g.root == root else (g, g)
+        lo = _and_exists(f0, g0, quant, cache, or_cache)
+        if root in quant:
+            if lo is BDDNODEONE:
+                ret = BDDNODEONE
+            else:
+                ret = _or_node(lo, _and_exists(f1, g1, quant, cache, or_cache), or_cache)
+        else:
+            ret = _bddnode(root, lo, _and_exists(f1, g1, quant, cache, or_cache))
+        cache[key] = ret
+    return ret
+
+def _rename(node, mapping, cache):
+    """Đổi tên biến bằng cách gán lại root của node (chỉ đúng khi phép đổi tên giữ nguyên thứ tự biến)."""
+    if node is BDDNODEZERO or node is BDDNODEONE:
+        return node
+    ret = cache.get(node)
+    if ret is None:
+        ret = _bddnode(mapping.get(node.root, node.root), _rename(node.lo, mapping, cache), _rename(node.hi, mapping, cache))
+        cache[node] = ret
+    return ret
+
+def _rename_general(node, mapping, cache, and_cache, or_cache):
+    """Đổi tên biến trong trường hợp tổng quát (thứ tự biến có thể bị đảo): dựng lại bằng ite(v, hi, lo)."""
+    if node is BDDNODEZERO or node is BDDNODEONE:
+        return node
+    ret = cache.get(node)
+    if ret is None:
+        lo = _rename_general(node.lo, mapping, cache, and_cache, or_cache)
+        hi = _rename_general(node.hi, mapping, cache, and_cache, or_cache)
+        root = mapping.get(node.root, node.root)
+        ret = _or_node(
+            _and_node(_bddnode(root, BDDNODEZERO, BDDNODEONE), hi, and_cache),
+            _and_node(_bddnode(root, BDDNODEONE, BDDNODEZERO), lo, and_cache),
+            or_cache,
+        )
+        cache[node] = ret
+    return ret
+
+def _build_clusters(transitions_data, X_vars, Y_vars, threshold, one):
+    """
+    Gom các transition có tập biến giao nhau thành quan hệ chuyển trạng thái chung R_c(X_c, X'_c),
+    miễn là số node của R_c không vượt quá threshold (cụm một transition luôn được chấp nhận).
+    Transition được duyệt theo thứ tự top (từ đáy BDD lên) như chiến lược chaining.
+    """
+    def identity(idxs):
+        rel = one
+        for i in sorted(idxs):
+            rel = _intersect(rel, ~(X_vars[i] ^ Y_vars[i]))
+        return rel
+
+    def local_relation(t_data):
+        if 'local' in t_data:
+            # Quan hệ đã dựng sẵn (mạng k-bounded)
+            return t_data['local']
+        rel = t_data['enable']
+        for i, value in t_data['assign'].items():
+            rel = _intersect(rel, Y_vars[i] if value else ~Y_vars[i])
+        return rel
+
+    clusters = []
+    current = None
+    for t_data in sorted(transitions_data, key=lambda d: -d['top']):
+        t_vars = set(t_data['local_vars'] if 'local' in t_data else t_data['assign'])
+        t_rel = local_relation(t_data)
+        if current is not None and current['vars'] & t_vars:
+            merged = _union(
+                _intersect(current['relation'], identity(t_vars - current['vars'])),
+                _intersect(t_rel, identity(current['vars'] - t_vars)),
+            )
+            if node_count(merged) <= threshold:
+                current['relation'] = merged
+                current['vars'] |= t_vars
+                current['members'].append(t_data)
+                current['top'] = min(current['top'], t_data['top'])
+                continue
+        current = {'relation': t_rel, 'vars': set(t_vars), 'members': [t_data], 'top': t_data['top']}
+        clusters.append(current)
+
+    # Đổi tên X' -> X bằng cách gán lại root chỉ an toàn khi mỗi x' đứng ngay sau x trong thứ tự biến
+    X_ids = [x.top.uniqid for x in X_vars]
+    Y_ids = [y.top.uniqid for y in Y_vars]
+    position = {r: k for k, r in enumerate(sorted(X_ids + Y_ids))}
+    adjacent = all(position[y] == position[x] + 1 for x, y in zip(X_ids, Y_ids))
+
+    for c in clusters:
+        if isinstance(one, ArrayBDD):
+            c['quant'] = one.manager.cube(X_ids[i] for i in c['vars'])
+        else:
+            c['quant'] = {X_ids[i] for i in c['vars']}
+        c['rename'] = {Y_ids[i]: X_ids[i] for i in c['vars']}
+        c['adjacent'] = adjacent
+        c['time'] = 0.0
+        c['calls'] = 0
+    return clusters
+
+def _add_const(xs, d: int, zero, one):
+    """
+    Bộ cộng / trừ hằng số trên số nhị phân xs (danh sách bit, bit thấp trước).
+    Trả về (các bit của xs + d, điều kiện không tràn / không âm).
+    """
+    n = len(xs)
+    if abs(d) >> n:
+        return list(xs), zero
+    out = []
+    carry = zero
+    if d >= 0:
+        for j, x in enumerate(xs):
+            if (d >> j) & 1:
+                out.append(~(x ^ carry))
+                carry = x | carry
+            else:
+                out.append(x ^ carry)
+                carry = x & carry
+    else:
+        # Trừ: carry đóng vai trò bit mượn (borrow)
+        e = -d
+        for j, x in enumerate(xs):
+            if (e >> j) & 1:
+                out.append(~(x ^ carry))
+                carry = ~x | carry
+            else:
+                out.append(x ^ carry)
+                carry = ~x & carry
+    return out, ~carry
+
+def _leq_const(xs, k: int, one):
+    """Điều kiện số nhị phân xs (bit thấp trước) <= k."""
+    if k >> len(xs):
+        return one
+    le = one
+    for j, x in enumerate(xs):
+        le = (~x | le) if (k >> j) & 1 else (~x & le)
+    return le
+
+def _geq_const(xs, k: int, zero, one):
+    """Điều kiện số nhị phân xs (bit thấp trước) >= k."""
+    if k <= 0:
+        return one
+    if k >> len(xs):
+        return zero
+    ge = one
+    for j, x in enumerate(xs):
+        ge = (x & ge) if (k >> j) & 1 else (x | ge)
+    return ge
+
+def _bounded_transitions(I, O, new_idx_to_old_idx, X_vars, Y_vars, bound, zero, one):
+    """
+    Quan hệ chuyển trạng thái của mạng k-bounded với place mã hóa nhị phân (I, O dạng P x T).
+    Place thứ k (theo thứ tự biến) chiếm các biến X_vars[k*b:(k+1)*b] (bit cao trước), b = bound.bit_length().
+    Với mỗi place p thuộc pre/post của t (w_in = I, d = O - I):
+        R_p = (x_p >= w_in) & (x'_p == x_p + d, không tràn) & (x'_p <= bound)
+    R_t là hội các R_p; các place khác giữ nguyên (không xuất hiện trong R_t, xử lý qua quan hệ cụm).
+    """
+    b = bound.bit_length()
+    transitions_data = []
+    for t in range(I.shape[1]):
+        pre_raw, post_raw = I[:, t], O[:, t]
+        rel = one
+        local_vars = []
+        for k, old_idx in enumerate(new_idx_to_old_idx):
+            w_in, w_out = int(pre_raw[old_idx]), int(post_raw[old_idx])
+            if w_in == 0 and w_out == 0:
+                continue
+            idxs = list(range(k * b, (k + 1) * b))
+            xs = [X_vars[i] for i in reversed(idxs)]
+            ys = [Y_vars[i] for i in reversed(idxs)]
+            total, ok = _add_const(xs, w_out - w_in, zero, one)
+            place_rel = ok & _geq_const(xs, w_in, zero, one) & _leq_const(ys, bound, one)
+            for y, s in zip(ys, total):
+                place_rel &= ~(y ^ s)
+            rel &= place_rel
+            local_vars.extend(idxs)
+        transitions_data.append({
+            'local': rel,
+            'local_vars': local_vars,
+            'top': min(local_vars) if local_vars else len(X_vars),
+            'time': 0.0,
+            'calls': 0,
+        })
+    return transitions_data
+
+def node_count(bdd) -> int:
+    """Số node của BDD (kể cả hai node lá)."""
+    if isinstance(bdd, ArrayBDD):
+        return bdd.node_count()
+    return sum(1 for _ in bdd.dfs_preorder())
 
-def bdd_reachable(pn: PetriNet) -> Tuple[BinaryDecisionDiagram, int]:
+def bdd_reachable(
+    pn: PetriNet,
+    strategy: str = "bfs",
+    stats: Optional[dict] = None,
+    cluster_threshold: Optional[int] = None,
+    backend: str = "pyeda",
+    reorder: bool = False,
+    reorder_threshold: int = 1000,
+    order_cache: Optional[str] = None,
+    order: str = "bfs",
+    simplify_frontier: bool = False,
+    on_iteration: Optional[Callable[[IterationStats], None]] = None,
+    bound: int = 1,
+) -> Tuple[BinaryDecisionDiagram, int]:
+    """
+    Tính tập marking reachable (mạng 1-safe, hoặc k-bounded với bound=k) bằng BDD.
+    - strategy:
+        "bfs"            : lặp theo frontier, mỗi vòng hợp ảnh của mọi transition (mặc định).
+        "chaining"       : bắn các transition lần lượt theo thứ tự biến; trạng thái mới được dùng ngay
+                           trong cùng một vòng -> ít vòng lặp hơn trên các chuỗi tuần tự dài.
+                           Đây là chế độ nên dùng khi cần giảm số vòng lặp.
+        "level-fixpoint" : gom transition theo biến top, lặp tới điểm bất động từng tầng từ dưới lên.
+                           Không phải saturation theo từng node (Ciardo): điểm bất động của mỗi tầng
+                           được tính trên toàn bộ Reach, nên thường tốn nhiều vòng hơn cả "bfs"
+                           (philosophers N15: 30 vòng, so với 8 của bfs và 2 của chaining).
+    - stats: dict tùy chọn, được điền 'iterations', 'peak_nodes', 'final_nodes', 'frontier_nodes', 'time'
+      (và 'clusters' khi dùng cluster_threshold).
+    - cluster_threshold: None -> ảnh tính riêng từng transition (enable/smoothing/update).
+      Số nguyên N -> gom transition thành các quan hệ cụm trên biến X/X' có tối đa N node,
+      ảnh tính bằng and-exists hợp nhất; in thời gian ảnh của từng cụm.
+    - backend: "pyeda" (mặc định) hoặc "array" (src.ArrayBDD: node lưu trong mảng NumPy).
+      Kết quả của backend "array" dùng được trực tiếp cho Deadlock / Optimization.
+    - reorder: (chỉ backend "array") bật sắp xếp lại biến động bằng sifting, kích hoạt khi số node
+      của Reach + Frontier vượt reorder_threshold (ngưỡng sau đó tăng gấp đôi kích thước mới).
+    - order_cache: đường dẫn file JSON lưu thứ tự biến theo net_fingerprint(pn); nếu đã có thứ tự
+      cho mạng này thì dùng thay cho heuristic tĩnh, và thứ tự tìm được khi reorder được ghi lại.
+    - order: heuristic thứ tự biến tĩnh (xem src.Ordering.ORDERINGS): "bfs" (mặc định), "dfs",
+      "original", "force", "cuthill-mckee", "p-invariant".
+    - simplify_frontier: thay frontier bằng BDD nhỏ nhất giữa New và Reach (restrict / constrain
+      với tập chăm sóc ~Reach cũ) trước khi tính ảnh. stats['frontier_nodes'] là tổng số node
+      các frontier đã dùng, để so sánh khi bật / tắt.
+    - on_iteration: callback nhận một IterationStats sau mỗi vòng lặp điểm bất động (số node frontier /
+      Reach, số marking mới, thời gian ảnh từng transition hoặc cụm, kích thước unique table).
+    - bound: số token tối đa mỗi place. bound=1 (mặc định): một biến mỗi place, luật contact 1-safe.
+      bound=k > 1: mỗi place mã hóa bằng ceil(log2(k+1)) bit (biến "p[j]"), quan hệ chuyển trạng thái
+      dựng bằng bộ cộng / trừ theo trọng số I/O; transition chỉ bắn được khi mọi place sau khi bắn
+      vẫn <= k (cùng ngữ nghĩa với bfs_reachable(pn, bound=k)).
+    Trả về (BDD của tập reachable, số marking).
+    """
+    if bound < 1:
+        raise ValueError(f"bound must be >= 1, got {bound}")
+    if order not in ORDERINGS:
+        raise ValueError(f"Unknown variable ordering: {order} (choose from {', '.join(ORDERINGS)})")
     print("   [BDD] Starting Symbolic Reachability...")
     
     # --- 1. Chuẩn bị dữ liệu Ma trận ---
-    if hasattr(pn, "I"): I = np.array(getattr(pn, "I"), dtype=int)
-    else: I = np.array(getattr(pn, "pre"), dtype=int)
-    
-    if hasattr(pn, "O"): O = np.array(getattr(pn, "O"), dtype=int)
-    else: O = np.array(getattr(pn, "post"), dtype=int)
-    
     if hasattr(pn, "M0"): M0 = np.array(getattr(pn, "M0"), dtype=int).reshape(-1)
     else: M0 = np.array(getattr(pn, "initial_marking"), dtype=int).reshape(-1)
 
     num_places = M0.shape[0]
     
-    # Xác định orientation của ma trận (Hàng là Trans hay Cột là Trans)
-    r, c = I.shape
-    if c == num_places: 
-        row_is_transition = True # Standard: Trans x Place
-        num_trans = r
-    else: 
-        row_is_transition = False # Non-standard: Place x Trans
-        num_trans = c
+    # Ma trận I/O dạng chuẩn P x T lấy từ FiringTable (cùng hướng với BFS/DFS, kể cả mạng vuông)
+    table = get_firing_table(pn)
+    I, O = table.I, table.O
+    num_trans = table.num_transitions
 
     def get_row_as_vector(matrix, t_idx):
-        """Helper lấy vector tương ứng với transition t"""
-        return matrix[t_idx, :] if row_is_transition else matrix[:, t_idx]
+        """Helper lấy vector tương ứng với transition t (cột t của ma trận P x T)"""
+        return matrix[:, t_idx]
 
     # --- 2. Tối ưu hóa thứ tự biến (Variable Reordering) ---
-    print("   [BDD] Optimizing variable order (BFS Reordering)...")
-    
     # Mapping từ ID cũ sang Index cũ
     old_ids = getattr(pn, "place_ids", [f"p{i}" for i in range(num_places)])
     old_id_to_idx = {pid: i for i, pid in enumerate(old_ids)}
     
     # Lấy thứ tự mới
-    new_places_ids = reorder_places_bfs(pn)
+    fingerprint = net_fingerprint(pn) if order_cache else None
+    cached = load_cached_order(order_cache, fingerprint) if order_cache else None
+    if cached is not None and sorted(cached) == sorted(old_ids):
+        print("   [BDD] Using cached variable order.")
+        new_places_ids = list(cached)
+    else:
+        print(f"   [BDD] Optimizing variable order ({order} ordering)...")
+        new_places_ids = compute_order(pn, order)
     
     # Map lại M0 theo thứ tự mới
     new_M0_list = []
@@ -120,15 +647,53 @@ def bdd_reachable(pn: PetriNet) -> Tuple[BinaryDecisionDiagram, int]:
     # --- 3. Khởi tạo biến BDD ---
     print(f"   [BDD] Creating BDD variables for {num_places} places...")
     # Tạo biến BDD theo thứ tự đã tối ưu
-    X_vars = [bddvar(str(p)) for p in new_places_ids]
+    # Biến next-state X' (chỉ cần khi gom cụm) được tạo xen kẽ ngay sau biến X tương ứng
+    if reorder and backend != "array":
+        raise ValueError("Dynamic reordering requires backend='array'")
+    if backend == "pyeda":
+        new_var = bddvar
+        next_name = lambda p: (p, "next")
+        bit_var = lambda p, j: bddvar(p, j)
+        ZERO, ONE = BDDZERO, BDDONE
+    elif backend == "array":
+        mgr = BDDManager()
+        new_var = mgr.add_var
+        next_name = lambda p: f"{p}'"
+        bit_var = lambda p, j: mgr.add_var(f"{p}[{j}]" if isinstance(p, str) else f"{p[0]}[{j}]'")
+        ZERO, ONE = ArrayBDD(mgr, 0), ArrayBDD(mgr, 1)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    X_vars, Y_vars = [], []
+    if bound > 1:
+        # Mỗi place dùng ceil(log2(bound + 1)) bit, từ bit cao xuống bit thấp; X' xen kẽ ngay sau X
+        num_bits = bound.bit_length()
+        for p in new_places_ids:
+            for j in reversed(range(num_bits)):
+                X_vars.append(bit_var(str(p), j))
+                Y_vars.append(bit_var((str(p), "next"), j))
+    else:
+        for p in new_places_ids:
+            X_vars.append(new_var(str(p)))
+            if cluster_threshold is not None:
+                Y_vars.append(new_var(next_name(str(p))))
     
     # --- 4. Tạo Trạng thái Ban đầu (Initial State) ---
     init_lits = []
-    for bit, x in zip(M0, X_vars):
-        init_lits.append(x if int(bit) == 1 else ~x)
+    if bound > 1:
+        for k, tokens in enumerate(M0):
+            tokens = int(tokens)
+            if tokens > bound:
+                raise ValueError(f"Initial marking of {new_places_ids[k]} exceeds bound {bound}")
+            for j in range(num_bits):
+                x = X_vars[(k + 1) * num_bits - 1 - j]
+                init_lits.append(x if (tokens >> j) & 1 else ~x)
+    else:
+        for bit, x in zip(M0, X_vars):
+            init_lits.append(x if int(bit) == 1 else ~x)
     
     if not init_lits: 
-        Reach = bddvar('1')
+        Reach = ONE
     else:
         # Tạo biểu thức logic AND cho toàn bộ marking M0
         # M0 = (p1=1) & (p2=0) & ...
@@ -146,124 +711,281 @@ def bdd_reachable(pn: PetriNet) -> Tuple[BinaryDecisionDiagram, int]:
     # new_idx_to_old_idx[i] = index trong ma trận gốc của biến BDD thứ i
     new_idx_to_old_idx = [old_id_to_idx[pid] for pid in new_places_ids]
     
-    for t in range(num_trans):
-        # Lấy vector Pre và Post từ ma trận gốc
-        pre_t_raw = get_row_as_vector(I, t)
-        post_t_raw = get_row_as_vector(O, t)
+    if bound > 1:
+        # Mạng k-bounded: mỗi place là một số nhị phân, quan hệ chuyển trạng thái dựng bằng bộ cộng / trừ
+        transitions_data = _bounded_transitions(
+            I, O, new_idx_to_old_idx, X_vars, Y_vars, bound, ZERO, ONE
+        )
+    else:
+        for t in range(num_trans):
+            # Lấy vector Pre và Post từ ma trận gốc
+            pre_t_raw = get_row_as_vector(I, t)
+            post_t_raw = get_row_as_vector(O, t)
         
-        # Sắp xếp lại vector theo thứ tự biến BDD
-        pre_t = np.array([pre_t_raw[old_idx] for old_idx in new_idx_to_old_idx])
-        post_t = np.array([post_t_raw[old_idx] for old_idx in new_idx_to_old_idx])
+            # Sắp xếp lại vector theo thứ tự biến BDD
+            pre_t = np.array([pre_t_raw[old_idx] for old_idx in new_idx_to_old_idx])
+            post_t = np.array([post_t_raw[old_idx] for old_idx in new_idx_to_old_idx])
         
-        # Tìm các index (trong hệ qui chiếu mới) có tham gia vào transition
-        idx_inputs = set(np.where(pre_t > 0)[0])
-        idx_outputs = set(np.where(post_t > 0)[0])
+            # Tìm các index (trong hệ qui chiếu mới) có tham gia vào transition
+            idx_inputs = set(np.where(pre_t > 0)[0])
+            idx_outputs = set(np.where(post_t > 0)[0])
         
-        # --- A. Xây dựng điều kiện Enable (Enable Condition) ---
-        # Transition t bắn được nếu:
-        # 1. Input places có token (p=1)
-        # 2. Output places (mà không phải input) KHÔNG có token (p=0) -> 1-safe property
-        pre_cond = []
+            # --- A. Xây dựng điều kiện Enable (Enable Condition) ---
+            # Transition t bắn được nếu:
+            # 1. Input places có token (p=1)
+            # 2. Output places (mà không phải input) KHÔNG có token (p=0) -> 1-safe property
+            pre_cond = []
         
-        # Ràng buộc Input: p=1
-        for idx in idx_inputs: 
-            pre_cond.append(X_vars[idx])
+            # Ràng buộc Input: p=1
+            for idx in idx_inputs: 
+                pre_cond.append(X_vars[idx])
             
-        # Ràng buộc Output (Contact-free): p=0 (chỉ áp dụng nếu p không phải là input)
-        for idx in idx_outputs:
-            if idx in idx_inputs: # Nếu không phải self-loop
-                continue
-            else:
-                pre_cond.append(~X_vars[idx])
+            # Ràng buộc Output (Contact-free): p=0 (chỉ áp dụng nếu p không phải là input)
+            for idx in idx_outputs:
+                if idx in idx_inputs: # Nếu không phải self-loop
+                    continue
+                else:
+                    pre_cond.append(~X_vars[idx])
         
-        if not pre_cond: 
-            En_Expr = bddvar('1') # Luôn enable (transition source)
-        else:
-            En_Expr = pre_cond[0]
-            for l in pre_cond[1:]: En_Expr &= l
+            if not pre_cond: 
+                En_Expr = ONE # Luôn enable (transition source)
+            else:
+                En_Expr = pre_cond[0]
+                for l in pre_cond[1:]: En_Expr &= l
 
-        # --- B. Xây dựng Logic Cập nhật (Update Logic) ---
-        # Phương pháp: "Local Transition Relation"
-        # 1. Smoothing: Xóa giá trị cũ của các biến thay đổi (exists x)
-        # 2. Conjunction: Gán giá trị mới cho các biến đó
+            # --- B. Xây dựng Logic Cập nhật (Update Logic) ---
+            # Phương pháp: "Local Transition Relation"
+            # 1. Smoothing: Xóa giá trị cũ của các biến thay đổi (exists x)
+            # 2. Conjunction: Gán giá trị mới cho các biến đó
         
-        vars_involved = idx_inputs.union(idx_outputs) # Tập biến thay đổi
-        vars_to_smooth = [X_vars[i] for i in vars_involved]
+            vars_involved = idx_inputs.union(idx_outputs) # Tập biến thay đổi
+            vars_to_smooth = [X_vars[i] for i in vars_involved]
         
-        update_lits = []
-        for idx in vars_involved:
-            if idx in idx_outputs:
-                # Nếu là output -> Token mới sinh ra -> Giá trị = 1
-                # (Kể cả self-loop: Input lấy đi, Output trả lại -> Kết quả là 1)
-                update_lits.append(X_vars[idx])
-            elif idx in idx_inputs:
-                # Nếu là input (và không phải output) -> Token bị lấy đi -> Giá trị = 0
-                update_lits.append(~X_vars[idx])
+            update_lits = []
+            for idx in vars_involved:
+                if idx in idx_outputs:
+                    # Nếu là output -> Token mới sinh ra -> Giá trị = 1
+                    # (Kể cả self-loop: Input lấy đi, Output trả lại -> Kết quả là 1)
+                    update_lits.append(X_vars[idx])
+                elif idx in idx_inputs:
+                    # Nếu là input (và không phải output) -> Token bị lấy đi -> Giá trị = 0
+                    update_lits.append(~X_vars[idx])
             
-        if not update_lits: 
-            Up_Expr = bddvar('1')
-        else:
-            Up_Expr = update_lits[0]
-            for l in update_lits[1:]: Up_Expr &= l
+            if not update_lits: 
+                Up_Expr = ONE
+            else:
+                Up_Expr = update_lits[0]
+                for l in update_lits[1:]: Up_Expr &= l
             
-        transitions_data.append({
-            'enable': En_Expr,
-            'smooth_vars': vars_to_smooth,
-            'update': Up_Expr
-        })
+            transitions_data.append({
+                'enable': En_Expr,
+                'smooth_vars': vars_to_smooth,
+                'update': Up_Expr,
+                # Giá trị mới của từng biến bị thay đổi (dùng khi dựng quan hệ cụm)
+                'assign': {idx: idx in idx_outputs for idx in vars_involved},
+                # Biến đầu tiên (theo thứ tự BDD) mà transition đọc/ghi; transition nguồn xếp cuối
+                'top': min(vars_involved) if vars_involved else num_places,
+                # Thời gian / số lần tính ảnh (để thống kê)
+                'time': 0.0,
+                'calls': 0,
+            })
 
     # --- 6. Vòng lặp tính toán Reachability (Fixed Point Iteration) ---
-    print("   [BDD] Starting Fixed Point Iteration...")
+    if strategy not in ("bfs", "chaining", "level-fixpoint"):
+        raise ValueError(f"Unknown strategy: {strategy}")
+    print(f"   [BDD] Starting Fixed Point Iteration ({strategy})...")
+    # Mạng k-bounded luôn dùng quan hệ X/X' (mặc định mỗi transition một cụm)
+    if bound > 1 and cluster_threshold is None:
+        cluster_threshold = 0
+    if cluster_threshold is not None:
+        transitions_data = _build_clusters(transitions_data, X_vars, Y_vars, cluster_threshold, ONE)
+        print(f"   [BDD] Built {len(transitions_data)} clusters (threshold {cluster_threshold} nodes)")
+
     iter_count = 0
+    peak_nodes = node_count(Reach) if stats is not None else 0
     start_loop = time.time()
-    
-    while True:
-        iter_count += 1
-        S_new_accum = None # Tập hợp các trạng thái tìm được trong bước này
-        
-        # Duyệt qua từng transition (Disjunctive Partitioning)
+
+    def track(R):
+        # Chỉ đếm node khi có yêu cầu thống kê (duyệt BDD tốn thời gian)
+        nonlocal peak_nodes
+        if stats is not None:
+            peak_nodes = max(peak_nodes, node_count(R))
+
+    frontier_nodes = 0
+
+    def next_frontier(New, Reach_old):
+        # Frontier cho vòng sau: New, hoặc BDD nhỏ hơn trong khoảng [New, Reach] khi bật simplify_frontier
+        nonlocal frontier_nodes
+        F = _simplify_frontier(New, Reach_old) if simplify_frontier else New
+        if stats is not None:
+            frontier_nodes += node_count(F)
+        return F
+
+    last_image_time = [0.0] * len(transitions_data)
+
+    def report(New, Frontier):
+        # Gửi thống kê của vòng vừa xong cho on_iteration (chỉ tính khi có callback)
+        if on_iteration is None:
+            return
+        times = [t_data['time'] for t_data in transitions_data]
+        image_time = [now - before for now, before in zip(times, last_image_time)]
+        last_image_time[:] = times
+        on_iteration(IterationStats(
+            iteration=iter_count,
+            frontier_nodes=0 if New.is_zero() else node_count(Frontier),
+            reach_nodes=node_count(Reach),
+            new_states=count_states(New, X_vars),
+            image_time=image_time,
+            unique_table_size=_unique_table_size(Reach),
+            elapsed=time.time() - start_loop,
+        ))
+
+    reorder_count = 0
+    reorder_time = 0.0
+    next_reorder = reorder_threshold
+
+    def maybe_reorder(*live):
+        # Sifting trên toàn bộ các BDD đang dùng; node id giữ nguyên nên không cần cập nhật biến ngoài
+        nonlocal next_reorder, reorder_count, reorder_time
+        if not reorder:
+            return
+        size = sum(node_count(b) for b in live)
+        if size <= next_reorder:
+            return
+        t0 = time.perf_counter()
+        roots = [b.node for b in live] + [b.node for b in X_vars + Y_vars]
         for t_data in transitions_data:
-            # 1. Tìm tập trạng thái thỏa mãn điều kiện bắn (Image Computation)
-            # S_en = Reach & Enable
-            S_en = Frontier & t_data['enable']
-            
-            if S_en.is_zero(): 
-                continue
-            
-            # 2. Tính trạng thái tiếp theo (Next State)
-            # Next = (exists involved_vars . S_en) AND Update_Logic
-            if t_data['smooth_vars']:
-                S_core = S_en.smoothing(t_data['smooth_vars'])
-            else:
-                S_core = S_en
-                
-            S_next = S_core & t_data['update']
-            
-            # Gộp vào tập trạng thái mới tìm được
-            if S_new_accum is None: 
-                S_new_accum = S_next
-            else: 
-                S_new_accum |= S_next
-            
-        # Điều kiện dừng: Không tìm thấy trạng thái mới nào
-        if S_new_accum is None: 
-            break
-            
-        # Chỉ giữ lại những trạng thái THỰC SỰ mới (chưa từng có trong Reach)
-        New = S_new_accum & ~Reach
-        
-        if New.is_zero(): 
-            break
-            
-        # Cập nhật tập Reach và Frontier
-        Reach = Reach | New
-        Frontier = New
-        
-        # print(f"      -> Iter {iter_count}: Found new states.")
+            for key in ('enable', 'update', 'relation'):
+                if key in t_data:
+                    roots.append(t_data[key].node)
+            if 'relation' in t_data:
+                roots.append(t_data['quant'])
+                for member in t_data['members']:
+                    roots += [member[key].node for key in ('enable', 'update', 'local') if key in member]
+        if Y_vars:
+            blocks = [[x.top, y.top] for x, y in zip(X_vars, Y_vars)]
+        else:
+            blocks = [[x.top] for x in X_vars]
+        mgr.sift(roots, blocks)
+        if Y_vars:
+            for c in transitions_data:
+                c['rename'] = {Y_vars[i].top.index: X_vars[i].top.index for i in c['vars']}
+        after = sum(node_count(b) for b in live)
+        next_reorder = max(next_reorder, 2 * after)
+        reorder_count += 1
+        reorder_time += time.perf_counter() - t0
+        print(f"   [BDD] Reordered variables: {size} -> {after} nodes ({time.perf_counter() - t0:.3f}s)")
+
+    if strategy == "bfs":
+        while True:
+            iter_count += 1
+            S_new_accum = None # Tập hợp các trạng thái tìm được trong bước này
+
+            # Duyệt qua từng transition (Disjunctive Partitioning)
+            for t_data in transitions_data:
+                S_next = _image(Frontier, t_data)
+                if S_next is None:
+                    continue
+
+                # Gộp vào tập trạng thái mới tìm được
+                if S_new_accum is None:
+                    S_new_accum = S_next
+                else:
+                    S_new_accum = _union(S_new_accum, S_next)
+
+            # Chỉ giữ lại những trạng thái THỰC SỰ mới (chưa từng có trong Reach)
+            New = ZERO if S_new_accum is None else bdd_minus(S_new_accum, Reach)
+
+            # Điều kiện dừng: Không tìm thấy trạng thái mới nào
+            if New.is_zero():
+                report(New, Frontier)
+                break
+
+            # Cập nhật tập Reach và Frontier
+            Frontier = next_frontier(New, Reach)
+            Reach = _union(Reach, New)
+            track(Reach)
+            report(New, Frontier)
+            maybe_reorder(Reach, Frontier)
+
+    else:
+        # Sắp xếp transition theo biến cao nhất (top) mà nó tác động, từ đáy BDD lên gốc
+        ordered = sorted(transitions_data, key=lambda d: -d['top'])
+
+        if strategy == "chaining":
+            # Chaining: trong một vòng, trạng thái mới của transition trước được dùng ngay cho transition sau
+            groups = [ordered]
+        else:
+            # Level-fixpoint: gom nhóm theo top, lặp từng tầng (cùng các tầng dưới) tới điểm bất động
+            # rồi mới thêm nhóm của tầng phía trên
+            groups = []
+            for t_data in ordered:
+                if groups and groups[-1][0]['top'] == t_data['top']:
+                    groups[-1].append(t_data)
+                else:
+                    groups.append([t_data])
+
+        active = []
+        for group in groups:
+            fresh = {id(t_data) for t_data in group}
+            active.extend(group)
+            # Các nhóm cũ đã bão hòa trên Reach: vòng đầu chỉ bắn nhóm mới trên toàn bộ Reach,
+            # nhóm cũ chỉ cần bắn trên các trạng thái vừa sinh ra
+            Frontier = ZERO if len(active) > len(group) else Reach
+            first = True
+            while True:
+                iter_count += 1
+                Reach_before = Reach
+                for t_data in active:
+                    source = Reach if first and id(t_data) in fresh else Frontier
+                    S_next = _image(source, t_data)
+                    if S_next is None:
+                        continue
+                    New_t = bdd_minus(S_next, Reach)
+                    if New_t.is_zero():
+                        continue
+                    Reach = _union(Reach, New_t)
+                    Frontier = _union(Frontier, New_t)
+                    track(Reach)
+
+                first = False
+                New = bdd_minus(Reach, Reach_before)
+                if New.is_zero():
+                    report(New, Frontier)
+                    break
+                Frontier = next_frontier(New, Reach_before)
+                report(New, Frontier)
+                maybe_reorder(Reach, Frontier)
 
     elapsed = time.time() - start_loop
-    print(f"   [BDD] Finished in {elapsed:.4f}s. Counting states...")
-    
-    # Đếm số lượng nghiệm thỏa mãn BDD (số marking reachable)
-    count = int(Reach.satisfy_count())
-    return Reach, count
\ No newline at end of file
+    if reorder_count and order_cache and bound == 1:
+        order = [name for name in mgr.order() if name in old_id_to_idx]
+        save_cached_order(order_cache, fingerprint, order)
+    print(f"   [BDD] Finished in {elapsed:.4f}s ({iter_count} iterations). Counting states...")
+    if cluster_threshold is not None:
+        for k, c in enumerate(transitions_data):
+            print(
+                f"      Cluster {k}: {len(c['members'])} transitions, {node_count(c['relation'])} nodes, "
+                f"{c['calls']} images, {c['time']:.4f}s"
+            )
+
+    # Đếm số lượng nghiệm thỏa mãn BDD (số marking reachable) trên toàn bộ biến X:
+    # place không thuộc support của Reach vẫn được tính cả hai giá trị
+    count = count_states(Reach, X_vars)
+
+    if stats is not None:
+        stats['strategy'] = strategy
+        stats['iterations'] = iter_count
+        stats['peak_nodes'] = peak_nodes
+        stats['final_nodes'] = node_count(Reach)
+        stats['frontier_nodes'] = frontier_nodes
+        stats['time'] = elapsed
+        stats['reorderings'] = reorder_count
+        stats['reorder_time'] = reorder_time
+        if cluster_threshold is not None:
+            stats['clusters'] = [
+                {'transitions': len(c['members']), 'nodes': node_count(c['relation']),
+                 'images': c['calls'], 'time': c['time']}
+                for c in transitions_data
+            ]
+    return Reach, count
@@ -1,81 +1,228 @@
 from collections import deque
 import numpy as np
 from PetriNet import PetriNet
-from typing import Set, Tuple
+from src.Firing import get_firing_table, pack_marking
+from src.ParallelBFS import parallel_bfs_reachable
+from typing import Set, Tuple, Union
 
-def bfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
+def bfs_reachable(
+    pn: PetriNet,
+    packed: bool = False,
+    layered: bool = False,
+    workers: int = 1,
+    bound: int = 1,
+) -> Union[Set[Tuple[int, ...]], Set[int]]:
     """
     Thuật toán tìm kiếm theo chiều rộng (BFS) để liệt kê không gian trạng thái.
     Sử dụng Hàng đợi (Queue) - Cơ chế FIFO (Vào trước ra trước).
+    - packed=True: mỗi marking được lưu dưới dạng một số nguyên (bit i <-> place i),
+      trả về Set[int]; dùng src.Firing.unpack_markings để lấy lại Set[Tuple[int, ...]].
+    - layered=True: duyệt theo từng tầng, bắn toàn bộ frontier bằng phép toán ma trận NumPy.
+    - workers > 1: BFS song song nhiều tiến trình, phân vùng marking theo giá trị băm
+      (xem src.ParallelBFS); M0 phải là marking 1-safe (ValueError nếu không).
+    - bound: số token tối đa mỗi place (mặc định 1 = mạng 1-safe); marking vượt bound bị bỏ qua.
+      Các chế độ packed / layered / song song chỉ hỗ trợ bound=1.
     """
-    
+    if bound != 1 and (packed or layered or workers > 1):
+        raise ValueError("packed, layered and parallel BFS require bound=1")
+    if workers > 1:
+        if max(map(int, pn.M0), default=0) > 1:
+            raise ValueError("parallel BFS requires a 1-safe initial marking")
+        return parallel_bfs_reachable(pn, workers, packed=packed)
+    if layered:
+        return _bfs_layered(pn, packed=packed)
+    if packed:
+        return _bfs_packed(pn)
+
     # 1. Chuẩn bị trạng thái ban đầu (M0)
     # Chuyển từ numpy array sang tuple số nguyên (int) để có thể dùng làm key trong set (hashable)
     # Việc map(int, ...) giúp tránh lỗi so sánh giữa numpy.int64 và int thường của Python
     initial_m = tuple(map(int, pn.M0))
-    
-    # Số lượng place (dựa vào độ dài vector marking)
-    num_places = len(initial_m)
-    
+
     # 2. Khởi tạo cấu trúc dữ liệu cho BFS
     # queue: Hàng đợi chứa các marking đang chờ duyệt
     # visited: Tập hợp (Set) lưu các marking đã duyệt để tránh vòng lặp vô tận
     queue = deque([initial_m])
     visited = {initial_m}
-    
-    # 3. Xử lý sự không nhất quán về kích thước ma trận trong Testcase
-    # Lấy kích thước dòng và cột của ma trận Input (I)
-    rows, cols = pn.I.shape
-    
-    # Mặc định theo lý thuyết Petri Net: Số dòng = Số Place (P x T)
-    is_standard_shape = True 
-    num_transitions = cols
-    
-    # Kiểm tra: Nếu số dòng KHÁC số place, nhưng số cột lại BẰNG số place
-    # => Dữ liệu test đang viết ma trận theo dạng (Transition x Place) thay vì chuẩn
-    if rows != num_places and cols == num_places:
-        is_standard_shape = False
-        num_transitions = rows # Lúc này số transition là số dòng
-    
+
+    # 3. Lấy bảng bắn đã biên dịch sẵn (dùng chung với DFS)
+    # Hướng ma trận (P x T hay T x P) đã được xử lý một lần trong FiringTable,
+    # mỗi transition chỉ giữ các cung thực sự tồn tại (pre-set / post-set).
+    table = get_firing_table(pn)
+    pre, delta, gain = table.pre, table.delta, table.gain
+    num_transitions = table.num_transitions
+
     # 4. Vòng lặp chính duyệt không gian trạng thái
     while queue:
         # Lấy trạng thái hiện tại ra khỏi đầu hàng đợi (FIFO)
-        current_m_tuple = queue.popleft()
-        current_m_arr = np.array(current_m_tuple)
-        
+        current_m = queue.popleft()
+
+        # Chỉ M0 mới có thể chứa place > bound token; khi đó phải kiểm tra toàn bộ marking mới
+        current_is_safe = max(current_m, default=0) <= bound
+
         # Duyệt qua tất cả các transition (sự kiện) trong hệ thống
         for t in range(num_transitions):
-            
-            # Lấy vector Input (điều kiện bắn) và Output (kết quả bắn) của transition t
-            if is_standard_shape:
-                # Trường hợp chuẩn: Mỗi cột là một transition
-                in_vec = pn.I[:, t]
-                out_vec = pn.O[:, t]
-            else:
-                # Trường hợp Testcase bị xoay: Mỗi dòng là một transition (như Test 004, 005)
-                in_vec = pn.I[t, :]
-                out_vec = pn.O[t, :]
-            
+
             # 5. Kiểm tra điều kiện bắn (Firing Rule)
             # Transition t chỉ bắn được nếu Marking hiện tại chứa đủ token yêu cầu (M >= I)
-            if np.all(current_m_arr >= in_vec):
-                
-                # Tính toán trạng thái mới: M' = M - Input + Output
-                next_m_arr = current_m_arr - in_vec + out_vec
-                
-                # 6. Kiểm tra thuộc tính 1-safe (Quan trọng)
-                # Bài toán yêu cầu 1-safe Petri net, tức là mỗi place chỉ chứa tối đa 1 token.
-                # Nếu trạng thái mới có place nào chứa > 1 token, ta bỏ qua trạng thái đó.
-                if np.any(next_m_arr > 1):
+            # Chỉ duyệt các place trong pre-set của t
+            for p, w in pre[t]:
+                if current_m[p] < w:
+                    break
+            else:
+                # Tính toán trạng thái mới: M' = M - Input + Output (chỉ trên các place bị thay đổi)
+                next_m = list(current_m)
+                for p, d in delta[t]:
+                    next_m[p] += d
+
+                # 6. Kiểm tra giới hạn token (1-safe khi bound=1)
+                # Mặc định bài toán yêu cầu 1-safe Petri net, tức là mỗi place chỉ chứa tối đa 1 token.
+                # Nếu trạng thái mới có place nào chứa > bound token, ta bỏ qua trạng thái đó.
+                if current_is_safe:
+                    if any(next_m[p] > bound for p in gain[t]):
+                        continue
+                elif max(next_m) > bound:
                     continue
-                
+
                 # Chuyển đổi trạng thái mới về dạng tuple chuẩn để lưu trữ
-                next_m_tuple = tuple(map(int, next_m_arr))
-                
+                next_m_tuple = tuple(next_m)
+
                 # Nếu trạng thái này chưa từng xuất hiện, thêm vào danh sách duyệt
                 if next_m_tuple not in visited:
                     visited.add(next_m_tuple)
                     queue.append(next_m_tuple)
-                    
+
     # Trả về tập hợp tất cả các marking tìm thấy
-    return visited
\ No newline at end of file
+    return visited
+
+
+def _bfs_packed(pn: PetriNet) -> Set[int]:
+    """
+    BFS trên marking bit-packed (chỉ dành cho mạng 1-safe).
+    Enable: (m & must_one) == must_one và (m & must_zero) == 0; bắn: (m & keep) | set_bits.
+    """
+    table = get_firing_table(pn)
+    rules = table.packed_rules
+
+    # M0 phải là marking nhị phân thì mới mã hóa được thành bit
+    initial_m = pack_marking(pn.M0)
+
+    queue = deque([initial_m])
+    visited = {initial_m}
+
+    while queue:
+        m = queue.popleft()
+        for _, must_one, must_zero, keep, set_bits in rules:
+            if m & must_one == must_one and not m & must_zero:
+                next_m = (m & keep) | set_bits
+                if next_m not in visited:
+                    visited.add(next_m)
+                    queue.append(next_m)
+
+    return visited
+
+
+# Số marking tối đa của frontier được xử lý trong một lần (giới hạn bộ nhớ của ma trận F x T)
+LAYER_CHUNK_SIZE = 4096
+
+
+def _row_keys(rows: np.ndarray) -> np.ndarray:
+    """Nén mỗi hàng marking 0/1 thành một khóa kích thước cố định (dùng cho np.unique / np.isin)."""
+    bits = np.packbits(rows.astype(np.uint8), axis=1, bitorder="little")
+    if bits.shape[1] <= 8:
+        # Đủ nhỏ để gói vào một số uint64 -> sắp xếp nhanh hơn kiểu void
+        padded = np.zeros((bits.shape[0], 8), dtype=np.uint8)
+        padded[:, :bits.shape[1]] = bits
+        return padded.view("<u8").ravel()
+    bits = np.ascontiguousarray(bits)
+    return bits.view(np.dtype((np.void, bits.shape[1]))).ravel()
+
+
+def _key_rows(keys: np.ndarray, num_places: int) -> np.ndarray:
+    """Giải nén khóa (từ _row_keys) về ma trận marking 0/1 kích thước K x P."""
+    raw = np.frombuffer(np.ascontiguousarray(keys).tobytes(), dtype=np.uint8)
+    raw = raw.reshape(keys.shape[0], keys.dtype.itemsize)
+    return np.unpackbits(raw, axis=1, count=num_places, bitorder="little")
+
+
+def _bfs_layered(
+    pn: PetriNet,
+    packed: bool = False,
+    chunk_size: int = LAYER_CHUNK_SIZE,
+) -> Union[Set[Tuple[int, ...]], Set[int]]:
+    """
+    BFS theo tầng (layered BFS) được vector hóa bằng NumPy.
+    - Cả frontier được xếp thành ma trận F x P.
+    - Enable của mọi cặp (marking, transition) được tính cùng lúc: frontier @ pre^T == |pre|.
+    - Marking kế tiếp được sinh hàng loạt: frontier[f] + (O - I)[t].
+    - Khử trùng lặp bằng np.unique / np.isin trên các hàng đã nén bit,
+      các tầng đã duyệt chỉ được giữ dưới dạng khóa nén.
+    """
+    table = get_firing_table(pn)
+    I = table.I.T.astype(np.int32)  # T x P
+    D = (table.O - table.I).T.astype(np.int32)  # T x P: thay đổi token khi bắn
+    num_places = table.num_places
+
+    # Dùng phép nhân ma trận khi mọi trọng số cung vào đều là 1
+    pre_mask = (I > 0).astype(np.int32)
+    pre_count = pre_mask.sum(axis=1)
+    unit_weights = bool(np.all(I <= 1))
+
+    M0 = np.asarray(pn.M0, dtype=np.int32).reshape(1, -1)
+    if packed:
+        pack_marking(M0[0])  # packed chỉ hỗ trợ M0 nhị phân
+
+    # Mọi marking kế tiếp đều <= 1 token nên khóa bit chỉ cần cho các marking nhị phân.
+    # Nếu M0 có place > 1 token, M0 không thể trùng với marking nào khác -> giữ riêng.
+    m0_is_binary = bool(np.all(M0 <= 1))
+    if m0_is_binary:
+        visited_keys = _row_keys(M0)
+    else:
+        visited_keys = _row_keys(np.zeros((0, num_places), dtype=np.int32))
+    layers = [visited_keys]
+    frontier = M0
+
+    while frontier.shape[0] > 0:
+        chunk_keys = []
+        for start in range(0, frontier.shape[0], chunk_size):
+            block = frontier[start:start + chunk_size].astype(np.int32)
+
+            # 1. Ma trận enable (F x T)
+            if unit_weights and block.max(initial=0) <= 1:
+                enabled = (block @ pre_mask.T) == pre_count
+            else:
+                enabled = np.all(block[:, None, :] >= I[None, :, :], axis=2)
+
+            # 2. Bắn hàng loạt: M' = M - I + O
+            f_idx, t_idx = np.nonzero(enabled)
+            if f_idx.size == 0:
+                continue
+            nxt = block[f_idx] + D[t_idx]
+
+            # 3. Loại marking vi phạm 1-safe, nén và khử trùng lặp ngay trong block
+            nxt = nxt[nxt.max(axis=1) <= 1]
+            if nxt.shape[0] > 0:
+                chunk_keys.append(np.unique(_row_keys(nxt)))
+
+        if not chunk_keys:
+            break
+
+        # 4. Khử trùng lặp trong tầng mới và với các tầng trước
+        keys = np.unique(np.concatenate(chunk_keys))
+        new_keys = keys[~np.isin(keys, visited_keys, assume_unique=True)]
+        if new_keys.shape[0] == 0:
+            break
+        visited_keys = np.union1d(visited_keys, new_keys)
+        layers.append(new_keys)
+        frontier = _key_rows(new_keys, num_places)
+
+    reached_keys = np.concatenate(layers)
+    if packed:
+        if reached_keys.dtype == np.dtype("<u8"):
+            return set(reached_keys.tolist())
+        return {int.from_bytes(key.tobytes(), "little") for key in reached_keys}
+
+    result = set(map(tuple, _key_rows(reached_keys, num_places).tolist()))
+    if not m0_is_binary:
+        result.add(tuple(map(int, pn.M0)))
+    return result
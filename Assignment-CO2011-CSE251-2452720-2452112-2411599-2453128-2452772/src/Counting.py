@@ -0,0 +1,205 @@
+from typing import Dict, List, Optional, Sequence
+
+from pyeda.boolalg.bdd import BDDNODEONE, BDDNODEZERO
+from pyeda.boolalg.boolfunc import VARIABLES
+
+from src.ArrayBDD import BDD as ArrayBDD, TRUE as ARRAY_TRUE
+
+
+class SatCounter:
+    """
+    Đếm chính xác số phép gán thỏa mãn một BDD trên một tập biến cho trước (số nguyên Python,
+    không giới hạn 64 bit), không dùng đệ quy.
+    - variables: các biến của miền đếm (tên, literal BDD hoặc Variable), ví dụ pn.place_ids cho
+      tập Reach của bdd_reachable. Biến không nằm trong support của BDD vẫn được tính (hệ số 2),
+      khác với satisfy_count của pyeda chỉ đếm trên support.
+    - Bảng node được chụp một lần; down[u] = số phép gán các biến từ mức của u trở xuống,
+      up[u] = số phép gán các biến phía trên dẫn từ gốc tới u. Các mức bị nhảy qua trên một cạnh
+      được tính bằng hệ số 2^(số mức bị nhảy).
+    - count_where(v, value) trả lời "bao nhiêu phép gán có v = value" trong O(1) sau một lượt
+      duyệt cạnh duy nhất (tính cho mọi biến cùng lúc).
+    """
+
+    def __init__(self, f, variables: Sequence):
+        self.variables = list(variables)
+        n = len(self.variables)
+        self.num_vars = n
+
+        if isinstance(f, ArrayBDD):
+            mgr = f.manager
+            try:
+                keys = [mgr.variable(v).index for v in self.variables]
+            except KeyError as e:
+                raise ValueError(f"Unknown BDD variable: {e.args[0]}") from None
+            var, lo, hi = mgr.node_arrays()
+            root = f.node
+            nodes = [u for u in mgr.nodes(root) if u > ARRAY_TRUE]
+            raw = {u: (var[u], lo[u], hi[u]) for u in nodes}
+            zero, one = 0, ARRAY_TRUE
+        else:
+            keys = [_pyeda_uniqid(v) for v in self.variables]
+            root = f.node
+            raw = {}
+            stack = [root]
+            while stack:
+                u = stack.pop()
+                if u is BDDNODEZERO or u is BDDNODEONE or u in raw:
+                    continue
+                raw[u] = (u.root, u.lo, u.hi)
+                stack.append(u.hi)
+                stack.append(u.lo)
+            zero, one = BDDNODEZERO, BDDNODEONE
+
+        if len(set(keys)) != n:
+            raise ValueError("Duplicate variables in counting domain")
+        # Mức trong miền đếm: theo thứ tự biến của BDD
+        order = sorted(range(n), key=lambda i: keys[i])
+        rank = {keys[i]: r for r, i in enumerate(order)}
+        self._position = {self._name(self.variables[i]): r for r, i in enumerate(order)}
+        self._ordered = [self.variables[i] for i in order]
+        # Tên biến theo thứ tự mức (mức 0 gần gốc nhất)
+        self.order = [self._name(v) for v in self._ordered]
+
+        # Bảng node: id nội bộ 0 / 1 là lá, các node trong đánh số theo mức tăng dần
+        try:
+            internal = sorted(raw, key=lambda u: rank[raw[u][0]])
+        except KeyError:
+            raise ValueError("BDD depends on a variable outside the counting domain")
+        ids = {zero: 0, one: 1}
+        for k, u in enumerate(internal):
+            ids[u] = k + 2
+        self.level = [n, n] + [rank[raw[u][0]] for u in internal]
+        self.lo = [-1, -1] + [ids[raw[u][1]] for u in internal]
+        self.hi = [-1, -1] + [ids[raw[u][2]] for u in internal]
+        self.root = ids[root]
+        self._ones: Optional[List[int]] = None
+
+        # down: từ đáy lên (node có mức lớn xử lý trước)
+        level, lo, hi = self.level, self.lo, self.hi
+        down = [0, 1] + [0] * len(internal)
+        for u in range(len(level) - 1, 1, -1):
+            lv = level[u]
+            down[u] = (down[lo[u]] << (level[lo[u]] - lv - 1)) + (down[hi[u]] << (level[hi[u]] - lv - 1))
+        self.down = down
+
+    @staticmethod
+    def _name(v) -> str:
+        if isinstance(v, str):
+            return v
+        top = getattr(v, "top", None)
+        return str(top if top is not None else v)
+
+    def count(self) -> int:
+        """Tổng số phép gán thỏa mãn trên toàn bộ miền đếm."""
+        return self.down[self.root] << self.level[self.root]
+
+    def _marginals(self) -> List[int]:
+        """ones[r] = số phép gán thỏa mãn có biến mức r bằng 1 (một lượt duyệt cạnh cho mọi biến)."""
+        if self._ones is not None:
+            return self._ones
+        n = self.num_vars
+        level, lo, hi, down = self.level, self.lo, self.hi, self.down
+        up = [0] * len(level)
+        ones = [0] * (n + 1)
+        skip = [0] * (n + 1)   # mảng hiệu: phần đóng góp cho các mức bị nhảy qua
+
+        r = self.root
+        total = self.count()
+        if level[r] > 0 and total:
+            skip[0] += total >> 1
+            skip[level[r]] -= total >> 1
+        up[r] = 1 << level[r]
+
+        # up: từ gốc xuống (node có mức nhỏ xử lý trước)
+        for u in range(2, len(level)):
+            if not up[u]:
+                continue
+            lv = level[u]
+            for c, bit in ((lo[u], 0), (hi[u], 1)):
+                gap = level[c] - lv - 1
+                if c > 1:
+                    up[c] += up[u] << gap
+                paths = up[u] * down[c]
+                if not paths:
+                    continue
+                if bit:
+                    ones[lv] += paths << gap
+                if gap > 0:
+                    half = paths << (gap - 1)
+                    skip[lv + 1] += half
+                    skip[level[c]] -= half
+
+        acc = 0
+        for k in range(n):
+            acc += skip[k]
+            ones[k] += acc
+        self._ones = ones[:n]
+        return self._ones
+
+    def count_where(self, v, value: int = 1) -> int:
+        """Số phép gán thỏa mãn có biến v = value (v: tên, literal hoặc Variable)."""
+        try:
+            r = self._position[self._name(v)]
+        except KeyError:
+            raise ValueError(f"Variable {self._name(v)} is not in the counting domain")
+        ones = self._marginals()[r]
+        return ones if value else self.count() - ones
+
+    def marginals(self) -> Dict[str, int]:
+        """Tên biến -> số phép gán thỏa mãn có biến đó bằng 1."""
+        ones = self._marginals()
+        return {self._name(v): ones[r] for r, v in enumerate(self._ordered)}
+
+    def count_point(self, point: Dict) -> int:
+        """
+        Số phép gán thỏa mãn khớp với point ({biến: 0/1}); một lượt duyệt trên bảng node đã chụp,
+        không tạo BDD mới.
+        """
+        n = self.num_vars
+        fixed = {}
+        for v, val in point.items():
+            try:
+                fixed[self._position[self._name(v)]] = int(val)
+            except KeyError:
+                raise ValueError(f"Variable {self._name(v)} is not in the counting domain")
+        # free[k] = số biến chưa gán trong các mức < k
+        free = [0] * (n + 1)
+        for k in range(n):
+            free[k + 1] = free[k] + (k not in fixed)
+
+        level, lo, hi = self.level, self.lo, self.hi
+        down = [0, 1] + [0] * (len(level) - 2)
+        for u in range(len(level) - 1, 1, -1):
+            lv = level[u]
+            val = fixed.get(lv)
+            total = 0
+            for c, bit in ((lo[u], 0), (hi[u], 1)):
+                if val is not None and val != bit:
+                    continue
+                # Các biến đã gán bị nhảy qua trên cạnh không ảnh hưởng (hệ số 1)
+                total += down[c] << (free[level[c]] - free[lv + 1])
+            down[u] = total
+        r = self.root
+        return down[r] << free[level[r]]
+
+
+def _pyeda_uniqid(v) -> int:
+    """
+    uniqid (vị trí trong thứ tự biến của pyeda) của biến v (tên hoặc literal BDD).
+    Tên chỉ được tra trong các biến đã có: bddvar(name) sẽ tạo biến toàn cục mới (uniqid mới),
+    nên tên gõ sai sẽ lặng lẽ thành một biến tự do. ValueError nếu chưa có biến nào mang tên đó.
+    """
+    if isinstance(v, str):
+        known = VARIABLES.get(((v,), ()))
+        if known is None:
+            raise ValueError(f"Unknown BDD variable: {v}")
+        return known.uniqid
+    uniqid = getattr(v, "uniqid", None)
+    if uniqid is None:
+        uniqid = v.top.uniqid
+    return uniqid
+
+
+def count_states(f, variables: Sequence) -> int:
+    """Số phép gán thỏa mãn f trên miền variables (xem SatCounter)."""
+    return SatCounter(f, variables).count()
@@ -1,23 +1,40 @@
 from collections import deque
 import numpy as np
 from PetriNet import PetriNet
-from typing import Set, Tuple
+from src.Firing import get_firing_table, pack_marking
+from typing import Iterable, List, Optional, Set, Tuple, Union
 
-def dfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
+def dfs_reachable(
+    pn: PetriNet,
+    packed: bool = False,
+    stubborn: bool = False,
+    visible: Optional[Iterable[int]] = None,
+    bound: int = 1,
+) -> Union[Set[Tuple[int, ...]], Set[int]]:
     """
     Thực hiện thuật toán Tìm kiếm theo chiều sâu (DFS) để khám phá không gian trạng thái.
     - Input: Mạng Petri (chứa M0, ma trận Input I, ma trận Output O).
     - Output: Tập hợp tất cả các marking có thể đạt được (Reachable Set).
+    - packed=True: marking được mã hóa thành số nguyên (bit i <-> place i), trả về Set[int];
+      dùng src.Firing.unpack_markings để giải mã về Set[Tuple[int, ...]].
+    - stubborn=True: duyệt rút gọn theo thứ tự bộ phận (stubborn set). Chỉ trả về MỘT PHẦN
+      không gian trạng thái nhưng giữ nguyên mọi deadlock reachable.
+      visible (danh sách chỉ số place) giữ thêm tính chất an toàn trên các place đó.
+    - bound: số token tối đa mỗi place (mặc định 1 = mạng 1-safe); marking vượt bound bị bỏ qua.
+      Các chế độ packed / stubborn chỉ hỗ trợ bound=1.
     """
+    if bound != 1 and (packed or stubborn):
+        raise ValueError("packed and stubborn DFS require bound=1")
+    if stubborn:
+        return _dfs_stubborn(pn, visible)
+    if packed:
+        return _dfs_packed(pn)
     
     # 1. Chuẩn hóa trạng thái ban đầu (Initial Marking - M0)
     # Chuyển đổi từ numpy array sang tuple(int) để đảm bảo tính "hashable" (có thể lưu vào set).
     # map(int, ...) giúp loại bỏ sự phụ thuộc vào kiểu dữ liệu numpy.int64.
     initial_m = tuple(map(int, pn.M0))
     
-    # Xác định số lượng Place dựa trên độ dài vector marking
-    num_places = len(initial_m)
-    
     # 2. Khởi tạo cấu trúc dữ liệu cho DFS
     # 'stack': Ngăn xếp lưu các marking chờ duyệt (Cơ chế LIFO - Vào sau ra trước)
     stack = [initial_m]
@@ -25,58 +42,50 @@ def dfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
     # 'visited': Tập hợp lưu các marking đã duyệt để tránh vòng lặp vô tận
     visited = {initial_m}
     
-    # --- 3. TỰ ĐỘNG PHÁT HIỆN HƯỚNG CỦA MA TRẬN (Matrix Orientation Detection) ---
-    # Mục đích: Xử lý trường hợp dữ liệu đầu vào không nhất quán (Testcase lúc thì PxT, lúc thì TxP).
-    rows, cols = pn.I.shape
-    
-    # Giả định mặc định: Cấu trúc chuẩn (Hàng = Place, Cột = Transition)
-    is_row_place = True 
-    num_transitions = cols
-    
-    # Logic kiểm tra: Nếu số dòng ma trận KHÁC số lượng Place thực tế, 
-    # nhưng số cột lại BẰNG số Place => Ma trận đang bị xoay ngang (Transition x Place).
-    if rows != num_places and cols == num_places:
-        is_row_place = False
-        num_transitions = rows # Lúc này số transition tương ứng với số dòng
+    # --- 3. BẢNG BẮN ĐÃ BIÊN DỊCH (Compiled Firing Table) ---
+    # Hướng ma trận (PxT hay TxP) được xác định một lần trong FiringTable và cache trên pn,
+    # mỗi transition chỉ giữ danh sách cung vào (pre) và các place bị thay đổi (delta).
+    table = get_firing_table(pn)
+    pre, delta, gain = table.pre, table.delta, table.gain
+    num_transitions = table.num_transitions
     # -----------------------------------------------------------------------------
     
     # 4. Vòng lặp chính duyệt không gian trạng thái
     while stack:
         # Lấy trạng thái từ ĐỈNH ngăn xếp (Pop phần tử mới nhất)
-        current_m_tuple = stack.pop()
+        current_m = stack.pop()
         
-        # Chuyển về dạng numpy array để thực hiện phép toán vector (cộng/trừ ma trận)
-        current_m_arr = np.array(current_m_tuple)
+        # Chỉ M0 mới có thể chứa place > bound token; khi đó phải kiểm tra toàn bộ marking mới
+        current_is_safe = max(current_m, default=0) <= bound
         
         # Duyệt qua từng transition để tìm trạng thái kế tiếp
         for t in range(num_transitions):
             
-            # Trích xuất vector Input (Pre) và Output (Post) của transition t
-            if is_row_place:
-                # Trường hợp chuẩn: Lấy dữ liệu theo cột
-                in_vec = pn.I[:, t]
-                out_vec = pn.O[:, t]
-            else:
-                # Trường hợp ma trận bị xoay: Lấy dữ liệu theo hàng
-                in_vec = pn.I[t, :]
-                out_vec = pn.O[t, :]
-            
             # 5. Kiểm tra điều kiện bắn (Firing Rule)
             # Transition t chỉ được kích hoạt nếu số token hiện tại >= số token yêu cầu (Input)
-            if np.all(current_m_arr >= in_vec):
-                
+            # Chỉ cần duyệt các place thuộc pre-set của t
+            for p, w in pre[t]:
+                if current_m[p] < w:
+                    break
+            else:
                 # Tính toán trạng thái mới theo công thức: M' = M - Input + Output
-                next_m_arr = current_m_arr - in_vec + out_vec
+                # (chỉ cập nhật các place thực sự thay đổi)
+                next_m = list(current_m)
+                for p, d in delta[t]:
+                    next_m[p] += d
                 
                 # --- 6. KIỂM TRA TÍNH CHẤT 1-SAFE (Quan trọng) ---
-                # Bài toán yêu cầu mạng 1-safe (mỗi place tối đa 1 token).
-                # Nếu trạng thái mới vi phạm (có place > 1 token) -> Bỏ qua nhánh này.
-                if np.any(next_m_arr > 1):
+                # Mặc định bài toán yêu cầu mạng 1-safe (mỗi place tối đa 1 token, bound=1).
+                # Nếu trạng thái mới vi phạm (có place > bound token) -> Bỏ qua nhánh này.
+                if current_is_safe:
+                    if any(next_m[p] > bound for p in gain[t]):
+                        continue
+                elif max(next_m) > bound:
                     continue
                 # -------------------------------------------------
                 
                 # Chuyển trạng thái mới về dạng tuple chuẩn
-                next_m_tuple = tuple(map(int, next_m_arr))
+                next_m_tuple = tuple(next_m)
                 
                 # Nếu trạng thái này chưa từng được duyệt
                 if next_m_tuple not in visited:
@@ -86,4 +95,176 @@ def dfs_reachable(pn: PetriNet) -> Set[Tuple[int, ...]]:
                     stack.append(next_m_tuple)
                     
     # Trả về toàn bộ tập trạng thái tìm được
-    return visited
\ No newline at end of file
+    return visited
+
+
+def _dfs_packed(pn: PetriNet) -> Set[int]:
+    """
+    DFS trên marking bit-packed (chỉ dành cho mạng 1-safe).
+    Enable: (m & must_one) == must_one và (m & must_zero) == 0; bắn: (m & keep) | set_bits.
+    """
+    table = get_firing_table(pn)
+    rules = table.packed_rules
+
+    # M0 phải là marking nhị phân thì mới mã hóa được thành bit
+    initial_m = pack_marking(pn.M0)
+
+    stack = [initial_m]
+    visited = {initial_m}
+
+    while stack:
+        m = stack.pop()
+        for _, must_one, must_zero, keep, set_bits in rules:
+            if m & must_one == must_one and not m & must_zero:
+                next_m = (m & keep) | set_bits
+                if next_m not in visited:
+                    visited.add(next_m)
+                    stack.append(next_m)
+
+    return visited
+
+
+class _StubbornInfo:
+    """
+    Thông tin tĩnh (tính một lần từ I/O) để dựng stubborn set.
+    - guard[t]  : các place quyết định t có bắn được không (pre-set và các place được tăng token - 1-safe)
+    - writes[t] : các place bị t thay đổi số token
+    - deps[t]   : các transition phụ thuộc với t (u ghi vào guard của t hoặc t ghi vào guard của u)
+    - increasers[p] / decreasers[p]: các transition làm tăng / giảm token của place p
+    """
+
+    def __init__(self, table):
+        T = table.num_transitions
+        self.increasers = [[] for _ in range(table.num_places)]
+        self.decreasers = [[] for _ in range(table.num_places)]
+        guard_of_place = [[] for _ in range(table.num_places)]
+        writers_of_place = [[] for _ in range(table.num_places)]
+        self.writes = []
+
+        for t in range(T):
+            guard = {p for p, _ in table.pre[t]} | set(table.gain[t])
+            writes = {p for p, _ in table.delta[t]}
+            self.writes.append(writes)
+            for p in guard:
+                guard_of_place[p].append(t)
+            for p, d in table.delta[t]:
+                writers_of_place[p].append(t)
+                (self.increasers if d > 0 else self.decreasers)[p].append(t)
+
+        self.deps = []
+        for t in range(T):
+            dep = set()
+            for p, _ in table.pre[t]:
+                dep.update(writers_of_place[p])
+            for p in table.gain[t]:
+                dep.update(writers_of_place[p])
+            for p in self.writes[t]:
+                dep.update(guard_of_place[p])
+            dep.discard(t)
+            self.deps.append(sorted(dep))
+
+
+def _stubborn_set(table, info, m, enabled, visible_trans) -> List[int]:
+    """
+    Dựng stubborn set tại marking m (m phải 1-safe), trả về các transition ENABLED trong đó.
+    - t enabled trong S   -> thêm mọi transition phụ thuộc với t.
+    - t disabled trong S  -> chọn một place "lý do": thiếu token (thêm các transition tăng token place đó)
+                             hoặc vi phạm 1-safe (thêm các transition giảm token place đó).
+    - Nếu có visible: S chứa transition visible enabled -> thêm mọi transition visible.
+    Thử lần lượt từng transition enabled làm hạt giống, chọn tập có ít transition enabled nhất.
+    """
+    best = None
+    for seed in enabled:
+        in_set = {seed}
+        work = [seed]
+        chosen = []
+        visible_added = False
+        while work:
+            t = work.pop()
+            if t in enabled:
+                chosen.append(t)
+                if best is not None and len(chosen) >= len(best):
+                    break
+                add = info.deps[t]
+                if visible_trans and not visible_added and t in visible_trans:
+                    visible_added = True
+                    add = list(add) + sorted(visible_trans)
+            else:
+                add = ()
+                for p, w in table.pre[t]:
+                    if m[p] < w:
+                        add = info.increasers[p]
+                        break
+                else:
+                    for p, d in table.delta[t]:
+                        if d > 0 and m[p] + d > 1:
+                            add = info.decreasers[p]
+                            break
+            for u in add:
+                if u not in in_set:
+                    in_set.add(u)
+                    work.append(u)
+        else:
+            if best is None or len(chosen) < len(best):
+                best = chosen
+                if len(best) == 1:
+                    break
+    return sorted(best) if best is not None else []
+
+
+def _dfs_stubborn(pn: PetriNet, visible: Optional[Iterable[int]] = None) -> Set[Tuple[int, ...]]:
+    """
+    DFS rút gọn bằng stubborn set (partial-order reduction).
+    - Chỉ bắn các transition enabled thuộc stubborn set tại mỗi marking.
+    - Bảo toàn mọi deadlock reachable (mọi deadlock của dfs_reachable đều có trong kết quả).
+    - Với visible: bảo toàn thêm các tổ hợp giá trị của các place visible; dùng điều kiện
+      proviso theo ngăn xếp (nếu một marking kế tiếp đang nằm trên ngăn xếp -> mở rộng đầy đủ).
+    """
+    table = get_firing_table(pn)
+    info = getattr(table, "_stubborn_info", None)
+    if info is None:
+        info = _StubbornInfo(table)
+        table._stubborn_info = info
+
+    visible_places = set(visible) if visible is not None else set()
+    visible_trans = {t for t in range(table.num_transitions) if info.writes[t] & visible_places}
+
+    def expand(m):
+        # Trả về (danh sách marking kế tiếp đầy đủ, danh sách rút gọn)
+        succ = {}
+        for t in range(table.num_transitions):
+            next_m = table.fire(m, t)
+            if next_m is not None:
+                succ[t] = next_m
+        if len(succ) <= 1 or max(m, default=0) > 1:
+            # Marking không 1-safe (chỉ có thể là M0): không rút gọn
+            full = list(succ.values())
+            return full, full
+        reduced = [succ[t] for t in _stubborn_set(table, info, m, succ, visible_trans)]
+        return list(succ.values()), reduced
+
+    initial_m = tuple(map(int, pn.M0))
+    visited = {initial_m}
+    on_stack = {initial_m}
+
+    full, reduced = expand(initial_m)
+    if visible_places and any(n in on_stack for n in reduced):
+        reduced = full
+    stack = [(initial_m, iter(reduced))]
+
+    while stack:
+        m, successors = stack[-1]
+        for next_m in successors:
+            if next_m not in visited:
+                visited.add(next_m)
+                on_stack.add(next_m)
+                full, reduced = expand(next_m)
+                if visible_places and any(n in on_stack for n in reduced):
+                    reduced = full
+                stack.append((next_m, iter(reduced)))
+                break
+        else:
+            stack.pop()
+            on_stack.discard(m)
+
+    return visited
@@ -1,65 +1,101 @@
+import heapq
+import itertools
 import numpy as np
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import pulp
 import random
-from pyeda.inter import BinaryDecisionDiagram
+import time
+from pyeda.inter import BinaryDecisionDiagram, bddvar
 from src.PetriNet import PetriNet
+from src.ArrayBDD import BDD as ArrayBDD
+from src.BDD import bdd_minus, node_count
+from src.Counting import SatCounter
+from src.Firing import get_firing_table
+from src.Ordering import transition_arcs, p_semiflows
+
+try:
+    import highspy
+except ImportError:
+    highspy = None
+
+# Giới hạn số node của BDD trung gian Reach ∧ Dead ở chế độ "auto"; vượt quá thì chuyển sang ILP
+BDD_NODE_LIMIT = 200000
 
 def deadlock_reachable_marking(
     pn: PetriNet,
     reachable_bdd: "BinaryDecisionDiagram",
+    method: str = "auto",
+    bdd_node_limit: int = BDD_NODE_LIMIT,
+    solver: str = "auto",
+    strengthen: bool = True,
+    stats: Optional[dict] = None,
 ) -> Optional[List[int]]:
     """
-    Tìm một deadlock marking sử dụng phương pháp lai giữa ILP và BDD (Task 4).
-    Đã tối ưu hóa bằng cách Randomize hàm mục tiêu để thoát khỏi các vùng deadlock giả.
+    Tìm một deadlock marking reachable (Task 4). Trả về marking (list 0/1 theo pn.place_ids) hoặc None.
+    - method="bdd" : ký hiệu thuần túy. Dead = AND_t ~En_t (En_t: mọi place vào có token và mọi place
+      ra thuần đều rỗng, luật 1-safe), Reach ∧ Dead tính một lượt; kết quả chính xác, witness là một
+      phép gán thỏa mãn (place don't-care lấy 0).
+    - method="ilp" : phương pháp lai ILP + BDD. CBC tìm marking chết về mặt cấu trúc, kiểm tra bằng
+      Reach.restrict, thêm canonical cut cho mỗi nghiệm giả (tối đa 100 lần gọi solver; hàm mục tiêu
+      được randomize để thoát khỏi các vùng deadlock giả).
+    - method="auto": dùng "bdd" nếu có reachable_bdd và mọi biến của nó ứng với một place; nếu BDD
+      trung gian vượt quá bdd_node_limit node thì bỏ và chạy "ilp".
+    - solver: model ILP của vòng lặp cut. "auto" dùng HiGHS trong tiến trình (highspy, nếu đã cài):
+      một model duy nhất, cut được thêm tăng dần và giải lại; nếu không có thì dùng CBC qua PuLP.
+    - stats: nếu truyền dict vào, ghi lại solver, attempts và solve_times (thời gian từng lần gọi solver)
+      của vòng lặp ILP.
+    - strengthen: thêm vào ILP các ràng buộc xấp xỉ trên của tập reachable, loại marking chết giả trước
+      khi phải kiểm tra BDD:
+        * phương trình trạng thái M = M0 + C·σ, σ >= 0 nguyên (C = O - I theo cung, như luật bắn 1-safe);
+          mọi P-bất biến y (y^T C = 0) đã được suy ra từ ràng buộc này (y^T M = y^T M0);
+        * ràng buộc trap, sinh dần: nếu nghiệm để trống một trap Q có token ở M0 thì thêm sum_Q m >= 1
+          (trap đã có token thì không bao giờ bị rút hết).
     """
-    print("  > Initializing ILP for Deadlock Detection...")
+    if method not in ("auto", "bdd", "ilp"):
+        raise ValueError(f"Unknown deadlock method: {method} (choose from auto, bdd, ilp)")
 
     # --- 1. Lấy ma trận Incidence và thông tin Petri Net -------------------
-    if hasattr(pn, "I"):
-        I = np.array(pn.I, dtype=int)
-    elif hasattr(pn, "pre"):
-        I = np.array(pn.pre, dtype=int)
-    else:
-        raise AttributeError("PetriNet object must have attribute I or pre")
-
-    if hasattr(pn, "O"):
-        O = np.array(pn.O, dtype=int)
-    elif hasattr(pn, "post"):
-        O = np.array(pn.post, dtype=int)
-    else:
-        raise AttributeError("PetriNet object must have attribute O or post")
+    # Dạng chuẩn P x T từ FiringTable (cùng hướng với BFS/DFS/BDD, kể cả mạng vuông)
+    table = get_firing_table(pn)
+    I, O = table.I, table.O
 
     # Lấy danh sách tên Place chuẩn
     if hasattr(pn, "place_ids"):
         place_names = list(pn.place_ids)
     else:
         # Fallback nếu không có place_ids
-        num_places_temp = I.shape[1] if I.shape[0] != len(getattr(pn, 'transitions', [])) else I.shape[0]
-        place_names = [f"p{i+1}" for i in range(num_places_temp)]
+        place_names = [f"p{i+1}" for i in range(table.num_places)]
     
     num_places = len(place_names)
-    
-    # --- XỬ LÝ ORIENTATION (QUAN TRỌNG) ---
-    r, c = I.shape
-    row_is_place = False 
-    if hasattr(pn, "transitions"):
-        if len(pn.transitions) == c and len(pn.transitions) != r:
-            row_is_place = True
-    if row_is_place is False and r == num_places and c != num_places:
-        row_is_place = True
-
-    num_trans = c if row_is_place else r
+    num_trans = table.num_transitions
 
     def get_input_places(t_idx):
-        return np.where(I[:, t_idx] > 0)[0] if row_is_place else np.where(I[t_idx, :] > 0)[0]
+        return np.where(I[:, t_idx] > 0)[0]
 
     def get_output_places(t_idx):
-        return np.where(O[:, t_idx] > 0)[0] if row_is_place else np.where(O[t_idx, :] > 0)[0]
+        return np.where(O[:, t_idx] > 0)[0]
+
+    if method != "ilp":
+        if reachable_bdd is None:
+            if method == "bdd":
+                raise ValueError("method='bdd' requires the reachable set BDD")
+        else:
+            limit = bdd_node_limit if method == "auto" else None
+            try:
+                return _deadlock_bdd(reachable_bdd, place_names, num_trans,
+                                     get_input_places, get_output_places, limit)
+            except ValueError:
+                if method == "bdd":
+                    raise
+                print("  > Reach BDD does not match the place list. Falling back to ILP...")
+            except _BDDTooLarge:
+                print(f"  > Reach ∧ Dead exceeded {bdd_node_limit} nodes. Falling back to ILP...")
+
+    print("  > Initializing ILP for Deadlock Detection...")
 
     # --- 2. Khởi tạo bài toán ILP ------------------------------------------
-    prob = pulp.LpProblem("Deadlock_Detection", pulp.LpMinimize)
-    m_vars = [pulp.LpVariable(f"m_{i}", cat='Binary') for i in range(num_places)]
+    # Biến 0..num_places-1: m_i (marking), sau đó một biến delta_t cho mỗi transition
+    rows = []
 
     # --- 3. Thêm ràng buộc Structural Deadlock -------------------
     # Transition disabled <==> (Inputs Missing) OR (Safety Violation)
@@ -71,19 +107,43 @@ def deadlock_reachable_marking(
         pure_outputs = [idx for idx in outputs if idx not in inputs]
         n_inputs = len(inputs)
         
-        delta = pulp.LpVariable(f"delta_t{t}", cat='Binary')
+        delta = num_places + t
         
-        # Condition 1: Missing tokens input
+        # Condition 1: Missing tokens input: sum(inputs) <= (n_inputs - 1) + big_M * delta
         if n_inputs > 0:
-            prob += pulp.lpSum([m_vars[i] for i in inputs]) <= (n_inputs - 1) + big_M * delta
+            rows.append(([int(i) for i in inputs] + [delta], [1] * n_inputs + [-big_M], None, n_inputs - 1))
         else:
-            prob += 0 <= -1 + big_M * delta # Source transition -> always enabled unless delta=1
+            rows.append(([delta], [big_M], 1, None)) # Source transition -> always enabled unless delta=1
 
-        # Condition 2: Output place full (1-safe property)
+        # Condition 2: Output place full (1-safe property): sum(pure_outputs) >= 1 - big_M * (1 - delta)
         if len(pure_outputs) > 0:
-             prob += pulp.lpSum([m_vars[i] for i in pure_outputs]) >= 1 - big_M * (1 - delta)
+            rows.append(([int(i) for i in pure_outputs] + [delta], [1] * len(pure_outputs) + [-big_M], 1 - big_M, None))
         else:
-            prob += 0 >= 1 - big_M * (1 - delta)
+            rows.append(([delta], [big_M], None, big_M - 1))
+
+    num_vars = num_places + num_trans
+    upper = [1] * num_vars
+    M0 = np.array(getattr(pn, "M0", getattr(pn, "initial_marking", [])), dtype=int).reshape(-1)
+    # Các ràng buộc chỉ đúng cho marking 0/1: bỏ qua nếu M0 đã không 1-safe
+    strengthen = strengthen and M0.shape[0] == num_places and M0.max(initial=0) <= 1
+    input_sets = [set(int(i) for i in get_input_places(t)) for t in range(num_trans)]
+    output_sets = [set(int(i) for i in get_output_places(t)) for t in range(num_trans)]
+
+    if strengthen:
+        # Phương trình trạng thái: m_p - sum_t C[p, t] * sigma_t = M0[p], biến sigma_t nguyên >= 0
+        sigma = num_vars
+        for p in range(num_places):
+            indices, values = [p], [1]
+            for t in range(num_trans):
+                delta_pt = int(p in output_sets[t]) - int(p in input_sets[t])
+                if delta_pt:
+                    indices.append(sigma + t)
+                    values.append(-delta_pt)
+            rows.append((indices, values, int(M0[p]), int(M0[p])))
+        num_vars += num_trans
+        upper += [None] * num_trans
+
+    model = _make_cut_model(solver, num_vars, rows, upper)
 
     # --- 4. Hàm kiểm tra BDD (Robust Mapping) ---------------------------
     # Tạo map từ tên biến trong BDD sang index của m_vars
@@ -115,13 +175,28 @@ def deadlock_reachable_marking(
         return result_bdd.is_one()
 
     # --- 5. Vòng lặp giải ILP (HEURISTIC OPTIMIZATION) ----------------------
-    # Sử dụng solver mặc định nhưng tắt log để đỡ rối
-    solver = pulp.PULP_CBC_CMD(msg=False) 
-    
+    # Một model duy nhất sống suốt vòng lặp: mỗi lần chỉ đổi hàm mục tiêu hoặc thêm một cut rồi giải lại
     attempt = 0
     max_attempts = 100 # Giới hạn số lần thử để tránh treo máy quá lâu
+    solve_times = []
+    if stats is not None:
+        stats['solver'] = model.name
+        stats['solve_times'] = solve_times
     
-    print(f"  > Starting Iterative Search (Max {max_attempts} attempts)...")
+    print(f"  > Starting Iterative Search (Max {max_attempts} attempts, solver {model.name})...")
+
+    def finish(result, message):
+        if stats is not None:
+            stats['attempts'] = attempt
+        if solve_times:
+            print(
+                f"  > {message} Solver calls: {len(solve_times)}, total {sum(solve_times):.4f}s, "
+                f"first {solve_times[0]:.4f}s, mean of the rest "
+                f"{(sum(solve_times[1:]) / max(1, len(solve_times) - 1)):.4f}s"
+            )
+        else:
+            print(f"  > {message}")
+        return result
 
     while attempt < max_attempts:
         attempt += 1
@@ -132,30 +207,33 @@ def deadlock_reachable_marking(
         mode = attempt % 3
         if mode == 0:
             # Ưu tiên tìm marking có ít token nhất (thường deadlock là trạng thái cạn kiệt)
-            prob.setObjective(pulp.lpSum(m_vars)) 
+            model.set_objective([1] * num_places)
         elif mode == 1:
             # Ưu tiên tìm marking nhiều token (bị kẹt do safety)
-            prob.setObjective(-pulp.lpSum(m_vars))
+            model.set_objective([-1] * num_places)
         else:
             # Random hoàn toàn để nhảy cóc
-            weights = [random.randint(-2, 2) for _ in range(num_places)]
-            prob.setObjective(pulp.lpSum([w * v for w, v in zip(weights, m_vars)]))
+            model.set_objective([random.randint(-2, 2) for _ in range(num_places)])
 
-        prob.solve(solver)
+        start = time.perf_counter()
+        solution = model.solve()
+        solve_times.append(time.perf_counter() - start)
 
-        if prob.status != pulp.LpStatusOptimal:
-            print("  > ILP Infeasible. No structural deadlock exists.")
-            return None
+        if solution is None:
+            return finish(None, "ILP Infeasible. No (structurally) dead marking satisfies the constraints.")
 
-        try:
-            current_marking = [int(round(var.varValue)) for var in m_vars]
-        except:
-            return None
+        current_marking = [int(round(v)) for v in solution[:num_places]]
+
+        if strengthen:
+            # Trap có token ban đầu nằm trọn trong các place rỗng -> marking không reachable
+            trap = _maximal_trap([p for p in range(num_places) if current_marking[p] == 0], input_sets, output_sets)
+            if any(M0[p] for p in trap):
+                model.add_row(sorted(trap), [1] * len(trap), 1, None)
+                continue
         
         # Check BDD
         if check_reachability_bdd(current_marking):
-            print(f"  > FOUND Reachable Deadlock at attempt {attempt}!")
-            return current_marking
+            return finish(current_marking, f"FOUND Reachable Deadlock at attempt {attempt}!")
         else:
             # Nếu không reachable, thêm Canonical Cut để loại bỏ nghiệm này
             if attempt % 10 == 0:
@@ -166,11 +244,439 @@ def deadlock_reachable_marking(
             
             # Constraint: Sum(Ones) - Sum(Zeros) <= |Ones| - 1
             # Ràng buộc này chỉ loại bỏ DUY NHẤT marking hiện tại
-            prob += (
-                pulp.lpSum([m_vars[i] for i in ones]) - 
-                pulp.lpSum([m_vars[j] for j in zeros]) 
-                <= len(ones) - 1
-            ), f"Cut_{attempt}"
+            model.add_row(ones + zeros, [1] * len(ones) + [-1] * len(zeros), None, len(ones) - 1)
     
-    print("  > Max attempts reached. Could not find reachable deadlock.")
-    return None
\ No newline at end of file
+    return finish(None, "Max attempts reached. Could not find reachable deadlock.")
+
+
+class _HighsCutModel:
+    """
+    Model ILP 0/1 giữ trong một tiến trình HiGHS (highspy): thêm cut bằng addRow và giải lại trên
+    cùng đối tượng Highs, không ghi file và không tạo tiến trình mới. HiGHS giữ lại model, presolve và
+    basis của LP relaxation giữa các lần gọi run().
+    """
+
+    name = "highs"
+
+    def __init__(self, num_vars: int, rows, upper):
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self.num_vars = num_vars
+        for ub in upper:
+            self.highs.addVar(0, highspy.kHighsInf if ub is None else ub)
+        for j in range(num_vars):
+            self.highs.changeColIntegrality(j, highspy.HighsVarType.kInteger)
+        for row in rows:
+            self.add_row(*row)
+
+    def add_row(self, indices, values, lower, upper):
+        inf = highspy.kHighsInf
+        self.highs.addRow(
+            -inf if lower is None else lower, inf if upper is None else upper,
+            len(indices), np.array(indices, dtype=np.int32), np.array(values, dtype=np.float64),
+        )
+
+    def set_objective(self, weights):
+        for j in range(self.num_vars):
+            self.highs.changeColCost(j, weights[j] if j < len(weights) else 0)
+
+    def solve(self) -> Optional[List[float]]:
+        self.highs.run()
+        if self.highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            return None
+        return list(self.highs.getSolution().col_value)
+
+
+class _PulpCutModel:
+    """
+    Phương án dự phòng khi không có highspy: LpProblem của PuLP giữ nguyên giữa các lần lặp, cut được
+    thêm vào model có sẵn; CBC vẫn chạy dưới dạng tiến trình riêng cho mỗi lần giải.
+    """
+
+    name = "cbc"
+
+    def __init__(self, num_vars: int, rows, upper):
+        self.prob = pulp.LpProblem("Deadlock_Detection", pulp.LpMinimize)
+        self.vars = [
+            pulp.LpVariable(f"x_{j}", lowBound=0, upBound=ub, cat='Integer') for j, ub in enumerate(upper)
+        ]
+        # Sử dụng solver mặc định nhưng tắt log để đỡ rối
+        self.solver = pulp.PULP_CBC_CMD(msg=False)
+        for row in rows:
+            self.add_row(*row)
+
+    def add_row(self, indices, values, lower, upper):
+        expr = pulp.lpSum(v * self.vars[j] for j, v in zip(indices, values))
+        if lower is not None:
+            self.prob += expr >= lower
+        if upper is not None:
+            self.prob += expr <= upper
+
+    def set_objective(self, weights):
+        self.prob.setObjective(pulp.lpSum(w * v for w, v in zip(weights, self.vars)))
+
+    def solve(self) -> Optional[List[float]]:
+        self.prob.solve(self.solver)
+        if self.prob.status != pulp.LpStatusOptimal:
+            return None
+        try:
+            return [v.varValue for v in self.vars]
+        except TypeError:
+            return None
+
+
+def _make_cut_model(solver: str, num_vars: int, rows, upper):
+    """
+    Model ILP nguyên không âm với num_vars biến (upper: cận trên từng biến, None = không giới hạn) và các
+    hàng (chỉ số, hệ số, cận dưới, cận trên). solver: "auto" (HiGHS nếu cài highspy, ngược lại CBC qua
+    PuLP), "highs" hoặc "cbc"."""
+    if solver not in ("auto", "highs", "cbc"):
+        raise ValueError(f"Unknown ILP solver: {solver} (choose from auto, highs, cbc)")
+    if solver == "highs" and highspy is None:
+        raise ImportError("solver='highs' requires the highspy package")
+    if solver != "cbc" and highspy is not None:
+        return _HighsCutModel(num_vars, rows, upper)
+    return _PulpCutModel(num_vars, rows, upper)
+
+
+def _maximal_trap(places, input_sets, output_sets) -> set:
+    """
+    Trap lớn nhất nằm trong tập places (điểm bất động): bỏ dần place p nếu có transition lấy token
+    từ p mà không trả token nào về tập còn lại. Trap Q thỏa Q• ⊆ •Q; rỗng nếu không có.
+    """
+    trap = set(places)
+    changed = True
+    while changed:
+        changed = False
+        for t, inputs in enumerate(input_sets):
+            if inputs & trap and not output_sets[t] & trap:
+                trap -= inputs
+                changed = True
+    return trap
+
+class _BDDTooLarge(Exception):
+    """BDD trung gian của chế độ "auto" vượt quá giới hạn node."""
+
+
+def _place_literals(reachable_bdd, place_names):
+    """
+    Literal BDD của từng place, cùng thư viện (và cùng manager) với reachable_bdd. Biến trong support
+    được khớp theo tên (không phân biệt hoa thường như cách kiểm tra của ILP); place không thuộc support
+    dùng biến cùng tên. ValueError nếu support có biến không ứng với place nào (vd. mã hóa k-bounded).
+    """
+    by_name = {}
+    for var in reachable_bdd.support:
+        by_name[str(var)] = var
+    index = {}
+    for name in by_name:
+        for key in (name, name.lower(), name.upper()):
+            if key in place_names:
+                index[name] = key
+                break
+        else:
+            raise ValueError(f"BDD variable {name} does not correspond to a place")
+    var_of = {pname: by_name[vname] for vname, pname in index.items()}
+
+    literals = []
+    for pname in place_names:
+        var = var_of.get(pname)
+        if isinstance(reachable_bdd, ArrayBDD):
+            mgr = reachable_bdd.manager
+            literals.append(mgr.add_var(str(var) if var is not None else pname))
+        else:
+            literals.append(bddvar(str(var) if var is not None else pname))
+    return literals
+
+
+def _reach_and_dead(reachable_bdd, X, input_lists, output_lists, limit=None):
+    """
+    Reach ∧ AND_t ~En_t, trừ dần từng En_t (En_t: mọi place vào có token, mọi place ra thuần rỗng);
+    dừng ngay khi kết quả rỗng. X: literal của từng place, input_lists / output_lists: place vào / ra
+    của từng transition.
+    """
+    result = reachable_bdd
+    for inputs, outputs in zip(input_lists, output_lists):
+        if result.is_zero():
+            break
+        inputs = set(inputs)
+        pure_outputs = [p for p in outputs if p not in inputs]
+        enabled = None
+        for p in sorted(inputs):
+            enabled = X[p] if enabled is None else enabled & X[p]
+        for p in pure_outputs:
+            enabled = ~X[p] if enabled is None else enabled & ~X[p]
+        if enabled is None:
+            # Transition không có place vào / ra thuần: luôn bắn được, không có deadlock
+            return bdd_minus(result, result)
+        result = bdd_minus(result, enabled)
+        if limit is not None and node_count(result) > limit:
+            raise _BDDTooLarge()
+    return result
+
+
+def _deadlock_bdd(reachable_bdd, place_names, num_trans, get_input_places, get_output_places, limit):
+    """Một deadlock reachable từ Reach ∧ Dead (place don't-care lấy 0), None nếu rỗng."""
+    print("  > Symbolic deadlock check (Reach ∧ Dead)...")
+    X = _place_literals(reachable_bdd, place_names)
+    result = _reach_and_dead(
+        reachable_bdd, X,
+        [get_input_places(t).tolist() for t in range(num_trans)],
+        [get_output_places(t).tolist() for t in range(num_trans)],
+        limit,
+    )
+
+    if result.is_zero():
+        print("  > Reach ∧ Dead is empty. No reachable deadlock.")
+        return None
+    point = {str(v): int(val) for v, val in result.satisfy_one().items()}
+    marking = [point.get(str(x.top), 0) for x in X]
+    print("  > FOUND Reachable Deadlock (symbolic).")
+    return marking
+
+
+def minimal_siphons(pn: PetriNet, max_siphons: int = 1000, solver: str = "auto"):
+    """
+    Liệt kê các siphon tối tiểu (S khác rỗng, •S ⊆ S•) bằng ILP 0/1 trên biến s_p:
+    với mỗi transition t và place p ∈ t•: s_p <= sum_{q ∈ •t} s_q. Mỗi lần giải cực tiểu |S| rồi thêm
+    cut loại mọi tập chứa S, nên nghiệm tìm được luôn tối tiểu (một siphon con thực sự sẽ có lực lượng
+    nhỏ hơn). Trả về (danh sách siphon - mỗi siphon là list chỉ số place tăng dần, đã liệt kê hết chưa).
+    """
+    inputs, outputs = transition_arcs(pn)
+    num_places = len(pn.place_ids)
+    rows = []
+    for t in range(len(inputs)):
+        for p in outputs[t]:
+            coeffs = {p: 1}
+            for q in inputs[t]:
+                coeffs[q] = coeffs.get(q, 0) - 1
+            if any(coeffs.values()):
+                indices = sorted(coeffs)
+                rows.append((indices, [coeffs[j] for j in indices], None, 0))
+    rows.append((list(range(num_places)), [1] * num_places, 1, None))
+
+    model = _make_cut_model(solver, num_places, rows, [1] * num_places)
+    model.set_objective([1] * num_places)
+    siphons = []
+    while len(siphons) < max_siphons:
+        solution = model.solve()
+        if solution is None:
+            return siphons, True
+        siphon = [p for p in range(num_places) if round(solution[p]) == 1]
+        siphons.append(siphon)
+        model.add_row(siphon, [1] * len(siphon), None, len(siphon) - 1)
+    return siphons, False
+
+
+def is_free_choice(pn: PetriNet) -> bool:
+    """Mạng free-choice (mở rộng): hai transition có chung place vào thì có cùng tập place vào."""
+    inputs, _ = transition_arcs(pn)
+    pre = [frozenset(i) for i in inputs]
+    for t in range(len(pre)):
+        for u in range(t + 1, len(pre)):
+            if pre[t] & pre[u] and pre[t] != pre[u]:
+                return False
+    return True
+
+
+def _safe_by_semiflows(pn: PetriNet, M0) -> bool:
+    """
+    Mọi place bị chặn bởi 1 theo một P-semiflow y >= 0 (y_p > 0 và y^T M0 <= y_p). Khi đó luật bắn
+    thường không bao giờ đặt 2 token vào một place, nên luật contact 1-safe không chặn transition nào
+    và lập luận siphon/trap cổ điển áp dụng được.
+    """
+    num_places = len(pn.place_ids)
+    covered = [False] * num_places
+    for y in p_semiflows(pn):
+        weight = sum(int(a) * int(b) for a, b in zip(y, M0))
+        for p in range(num_places):
+            if y[p] > 0 and weight <= y[p]:
+                covered[p] = True
+    return all(covered)
+
+
+def structural_deadlock_check(pn: PetriNet, max_siphons: int = 1000, solver: str = "auto") -> dict:
+    """
+    Phân tích cấu trúc trước mọi phép tính reachability (chỉ dùng I, O, M0).
+    Điều kiện Commoner: mọi siphon tối tiểu chứa một trap có token ở M0 (trap lớn nhất trong siphon,
+    tính bằng điểm bất động). Ở marking chết của mạng thường, các place rỗng chứa một siphon khác rỗng;
+    siphon chứa trap có token không bao giờ rỗng, nên Commoner => không có deadlock. Với mạng free-choice,
+    Commoner <=> live (định lý Commoner/Hack), nên vi phạm Commoner nghĩa là mạng không live.
+    Kết quả chỉ có giá trị khi mạng là mạng thường (mọi cung trọng số 1, lập luận siphon ở trên chỉ đúng
+    cho mạng thường) và mọi place được chứng minh 1-bounded bằng P-semiflow (luật contact không bao giờ
+    chặn transition); ngược lại trả về deadlock_free = None và live = None.
+
+    Trả về dict:
+    - siphons          : các siphon tối tiểu (list tên place)
+    - complete         : đã liệt kê hết siphon tối tiểu chưa (False nếu vượt max_siphons)
+    - bad_siphons      : các siphon không chứa trap có token ở M0
+    - free_choice      : mạng có phải free-choice (mở rộng) không
+    - ordinary         : mọi cung có trọng số 1
+    - safe             : mọi place 1-bounded theo P-semiflow
+    - commoner         : điều kiện Commoner (None nếu chưa liệt kê hết siphon)
+    - deadlock_free    : True nếu chứng minh được không có deadlock, None nếu không kết luận được
+    - live             : True / False với mạng thường free-choice an toàn, None nếu không kết luận được
+    - time             : thời gian phân tích (giây)
+    """
+    start = time.perf_counter()
+    inputs, outputs = transition_arcs(pn)
+    input_sets = [set(i) for i in inputs]
+    output_sets = [set(o) for o in outputs]
+    M0 = np.array(getattr(pn, "M0", getattr(pn, "initial_marking", [])), dtype=int).reshape(-1)
+
+    siphons, complete = minimal_siphons(pn, max_siphons, solver)
+    bad = [S for S in siphons if not any(M0[p] for p in _maximal_trap(S, input_sets, output_sets))]
+    commoner = (not bad) if complete else (False if bad else None)
+    free_choice = is_free_choice(pn)
+    safe = _safe_by_semiflows(pn, M0)
+    table = get_firing_table(pn)
+    ordinary = all(w == 1 for arcs in table.pre + table.post for _, w in arcs)
+
+    sound = safe and ordinary
+    deadlock_free = True if sound and commoner and len(inputs) > 0 else None
+    live = commoner if sound and free_choice and commoner is not None else None
+    names = lambda S: [pn.place_ids[p] for p in S]
+    return {
+        'siphons': [names(S) for S in siphons],
+        'complete': complete,
+        'bad_siphons': [names(S) for S in bad],
+        'free_choice': free_choice,
+        'ordinary': ordinary,
+        'safe': safe,
+        'commoner': commoner,
+        'deadlock_free': deadlock_free,
+        'live': live,
+        'time': time.perf_counter() - start,
+    }
+
+
+class DeadlockSet:
+    """
+    Mọi deadlock reachable, lấy từ BDD Reach ∧ Dead (cùng luật 1-safe với method="bdd"), không cần
+    gọi lại vòng lặp ILP. Bảng node được chụp một lần (SatCounter) nên mọi truy vấn chỉ duyệt mảng:
+    - count()            : số deadlock reachable (số nguyên chính xác)
+    - cubes()            : duyệt các cube (đường đi tới lá 1), mỗi cube là {place id: 0/1}; place
+                           không có mặt là don't-care
+    - iter() / __iter__  : từng marking (tuple 0/1 theo pn.place_ids), mở rộng don't-care dần dần
+    - top_k(k, weights)  : k deadlock có chi phí weights·M nhỏ nhất (hoặc lớn nhất), duyệt best-first
+                           trên BDD với cận dưới chính xác; key=callable thì xếp hạng theo hàm tùy ý
+    """
+
+    def __init__(self, pn: PetriNet, reachable_bdd):
+        self.place_ids = list(pn.place_ids)
+        inputs, outputs = transition_arcs(pn)
+        self.literals = _place_literals(reachable_bdd, self.place_ids)
+        self.bdd = _reach_and_dead(reachable_bdd, self.literals, inputs, outputs)
+        self._counter = SatCounter(self.bdd, self.literals)
+        index = {SatCounter._name(x): i for i, x in enumerate(self.literals)}
+        # Mức r của BDD ứng với place _place_at[r]
+        self._place_at = [index[name] for name in self._counter.order]
+
+    def count(self) -> int:
+        return self._counter.count()
+
+    def is_empty(self) -> bool:
+        return self._counter.root == 0
+
+    def _paths(self) -> Iterator[Dict[int, int]]:
+        """Các đường đi tới lá 1 theo mức: {mức: 0/1}."""
+        counter = self._counter
+        level, lo, hi = counter.level, counter.lo, counter.hi
+        stack = [(counter.root, {})]
+        while stack:
+            u, cube = stack.pop()
+            if u == 0:
+                continue
+            if u == 1:
+                yield cube
+                continue
+            lv = level[u]
+            hi_cube = dict(cube)
+            hi_cube[lv] = 1
+            stack.append((hi[u], hi_cube))
+            cube[lv] = 0
+            stack.append((lo[u], cube))
+
+    def cubes(self) -> Iterator[Dict[str, int]]:
+        for cube in self._paths():
+            yield {self.place_ids[self._place_at[r]]: bit for r, bit in cube.items()}
+
+    def iter(self) -> Iterator[Tuple[int, ...]]:
+        n = len(self._place_at)
+        for cube in self._paths():
+            marking = [0] * n
+            for r, bit in cube.items():
+                marking[self._place_at[r]] = bit
+            free = [self._place_at[r] for r in range(n) if r not in cube]
+            for bits in itertools.product((0, 1), repeat=len(free)):
+                for p, bit in zip(free, bits):
+                    marking[p] = bit
+                yield tuple(marking)
+
+    __iter__ = iter
+
+    def top_k(
+        self,
+        k: int,
+        weights: Optional[Sequence[float]] = None,
+        maximize: bool = False,
+        key: Optional[Callable[[Tuple[int, ...]], float]] = None,
+    ) -> List[Tuple[float, Tuple[int, ...]]]:
+        """
+        k deadlock tốt nhất dạng (chi phí, marking), chi phí tăng dần (giảm dần nếu maximize).
+        - weights: vector chi phí theo pn.place_ids, chi phí = weights·M. Duyệt best-first (A*) theo
+          mức biến; cận dưới best[u] (chi phí nhỏ nhất từ node u tới lá 1, biến bị nhảy qua lấy min(0, c))
+          là chính xác nên marking thứ i được lấy ra sau O(số mức) bước, không liệt kê toàn bộ tập.
+        - key: hàm chi phí tùy ý trên marking; khi đó phải duyệt hết các marking (heapq).
+        """
+        if key is not None:
+            pick = heapq.nlargest if maximize else heapq.nsmallest
+            return [(key(m), m) for m in pick(k, self.iter(), key=key)]
+        if weights is None:
+            raise ValueError("top_k needs either weights or key")
+        if len(weights) != len(self.place_ids):
+            raise ValueError(f"Expected {len(self.place_ids)} weights, got {len(weights)}")
+
+        counter = self._counter
+        level, lo, hi = counter.level, counter.lo, counter.hi
+        n = len(self._place_at)
+        sign = -1 if maximize else 1
+        cost = [sign * weights[p] for p in self._place_at]
+        # free[r] = tổng min(0, c) của các mức < r (chi phí nhỏ nhất của các biến bị nhảy qua)
+        free = [0] * (n + 1)
+        for r in range(n):
+            free[r + 1] = free[r] + min(0, cost[r])
+        inf = float("inf")
+        best = [inf, 0] + [inf] * (len(level) - 2)
+        for u in range(len(level) - 1, 1, -1):
+            lv = level[u]
+            b_lo = best[lo[u]] + free[level[lo[u]]] - free[lv + 1]
+            b_hi = cost[lv] + best[hi[u]] + free[level[hi[u]]] - free[lv + 1]
+            best[u] = min(b_lo, b_hi)
+
+        result = []
+        root = counter.root
+        if best[root] == inf:
+            return result
+        tie = itertools.count()
+        # Phần tử heap: (cận dưới, thứ tự, mức kế tiếp, node, chi phí đã có, đường đi dạng (bit, cha))
+        heap = [(free[level[root]] + best[root], next(tie), 0, root, 0, None)]
+        while heap and len(result) < k:
+            bound, _, r, u, g, path = heapq.heappop(heap)
+            if r == n:
+                marking = [0] * n
+                while path is not None:
+                    r -= 1
+                    marking[self._place_at[r]] = path[0]
+                    path = path[1]
+                result.append((sign * g, tuple(marking)))
+                continue
+            if level[u] > r:
+                children = ((u, 0), (u, 1))
+            else:
+                children = ((lo[u], 0), (hi[u], 1))
+            for c, bit in children:
+                if best[c] == inf:
+                    continue
+                g2 = g + cost[r] * bit
+                heapq.heappush(heap, (g2 + free[level[c]] - free[r + 1] + best[c], next(tie), r + 1, c, g2, (bit, path)))
+        return result
@@ -0,0 +1,245 @@
+import heapq
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src.Firing import get_firing_table, pack_marking, unpack_marking
+
+# Ước lượng số byte RAM cho mỗi marking nằm trong bộ đệm (int Python + con trỏ list + set khi khử trùng)
+BYTES_PER_ENTRY = 96
+
+# Số marking tối đa đọc/ghi mỗi lần truy cập file
+IO_BLOCK = 65536
+
+# Số marking tối thiểu trong mỗi bộ đệm đọc/ghi khi trộn; cùng memory_budget quyết định số run trộn cùng lúc
+MIN_MERGE_BLOCK = 1024
+
+# Số run tối đa trộn cùng lúc (giới hạn số file mở đồng thời)
+MAX_FAN_IN = 64
+
+
+def _block_size(memory_budget: int, streams: int, nbytes: int) -> int:
+    """Số marking mỗi bộ đệm đọc/ghi sao cho streams bộ đệm cùng mở không vượt quá memory_budget byte."""
+    return max(1, min(IO_BLOCK, memory_budget // (streams * nbytes)))
+
+
+class _KeyWriter:
+    """Ghi tuần tự marking packed ra file dạng big-endian độ dài cố định, bộ đệm block marking."""
+
+    def __init__(self, path: str, nbytes: int, block: int = IO_BLOCK):
+        self.file = open(path, "wb")
+        self.nbytes = nbytes
+        self.limit = nbytes * block
+        self.buf = bytearray()
+        self.count = 0
+
+    def write(self, key: int):
+        self.buf += key.to_bytes(self.nbytes, "big")
+        self.count += 1
+        if len(self.buf) >= self.limit:
+            self.file.write(self.buf)
+            self.buf.clear()
+
+    def close(self):
+        if self.buf:
+            self.file.write(self.buf)
+            self.buf.clear()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _write_keys(path: str, keys: Iterable[int], nbytes: int, block: int = IO_BLOCK) -> int:
+    """Ghi dãy marking packed (đã sắp xếp) ra file."""
+    with _KeyWriter(path, nbytes, block) as writer:
+        for key in keys:
+            writer.write(key)
+    return writer.count
+
+
+def _read_keys(path: str, nbytes: int, block: int = IO_BLOCK) -> Iterator[int]:
+    """Đọc tuần tự các marking packed từ file (thứ tự byte big-endian = thứ tự số nguyên)."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(nbytes * block)
+            if not chunk:
+                break
+            for i in range(0, len(chunk), nbytes):
+                yield int.from_bytes(chunk[i:i + nbytes], "big")
+
+
+def _unique_sorted(keys: Iterable[int]) -> Iterator[int]:
+    """Bỏ các phần tử trùng liên tiếp của một dãy đã sắp xếp."""
+    last = None
+    for key in keys:
+        if key != last:
+            yield key
+            last = key
+
+
+def _merge_visited(candidates: Iterable[int], visited: Iterable[int], new_writer: "_KeyWriter", visited_writer: "_KeyWriter"):
+    """
+    Một lượt merge hai dãy đã sắp xếp tăng dần: candidates \\ visited ghi vào new_writer (tầng mới),
+    candidates ∪ visited ghi vào visited_writer (tập đã thăm của tầng sau).
+    """
+    visited = iter(visited)
+    current = next(visited, None)
+    for key in candidates:
+        while current is not None and current < key:
+            visited_writer.write(current)
+            current = next(visited, None)
+        if current != key:
+            new_writer.write(key)
+            visited_writer.write(key)
+    while current is not None:
+        visited_writer.write(current)
+        current = next(visited, None)
+
+
+def _merge_runs(runs: List[str], new_path, nbytes: int, fan_in: int, block: int) -> List[str]:
+    """Trộn nhiều lượt, mỗi lượt tối đa fan_in run thành một run (đã khử trùng), đến khi còn <= fan_in run."""
+    while len(runs) > fan_in:
+        merged = []
+        for i in range(0, len(runs), fan_in):
+            group = runs[i:i + fan_in]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            path = new_path()
+            _write_keys(path, _unique_sorted(heapq.merge(*[_read_keys(r, nbytes, block) for r in group])), nbytes, block)
+            for r in group:
+                os.remove(r)
+            merged.append(path)
+        runs = merged
+    return runs
+
+
+class ExternalReachableSet:
+    """
+    Tập reachable được lưu trên đĩa trong một file đã sắp xếp (tập đã thăm của lượt BFS cuối).
+    - count: tổng số marking.
+    - Duyệt (for m in ...) để đọc lần lượt từng marking dạng tuple theo thứ tự packed tăng dần;
+      iter_packed() trả về số nguyên.
+    - close() (hoặc dùng với 'with') để xóa thư mục tạm.
+    """
+
+    def __init__(self, directory: str, path: str, count: int, num_places: int, nbytes: int):
+        self.directory = directory
+        self.path = path
+        self.count = count
+        self.num_places = num_places
+        self.nbytes = nbytes
+        self._finalizer = weakref.finalize(self, shutil.rmtree, directory, True)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def iter_packed(self) -> Iterator[int]:
+        yield from _read_keys(self.path, self.nbytes)
+
+    def __iter__(self) -> Iterator[Tuple[int, ...]]:
+        for key in self.iter_packed():
+            yield unpack_marking(key, self.num_places)
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def bfs_reachable_external(
+    pn,
+    memory_budget: int = 256 * 1024 * 1024,
+    workdir: Optional[str] = None,
+) -> Tuple[int, ExternalReachableSet]:
+    """
+    BFS bộ nhớ ngoài (external-memory BFS) với phát hiện trùng lặp trễ (delayed duplicate detection)
+    cho mạng 1-safe có không gian trạng thái lớn hơn RAM.
+    - Marking được mã hóa packed (bit i <-> place i) và ghi ra file đã sắp xếp.
+    - Marking kế tiếp được gom trong bộ đệm giới hạn bởi memory_budget (byte);
+      đầy thì sắp xếp, khử trùng và ghi thành một run trên đĩa.
+    - Cuối mỗi tầng: trộn các run (nhiều lượt nếu số run vượt fan-in), loại trùng, rồi trong cùng một lượt
+      merge với file visited: phần chưa thăm thành tầng mới, hợp của hai dãy thành file visited mới.
+      Nhờ vậy chỉ có một file visited thay vì mọi tầng trước đó được mở cùng lúc.
+    - Bộ đệm đọc/ghi của mọi file mở đồng thời cũng được tính vào memory_budget.
+    Trả về (số marking, ExternalReachableSet) - đối tượng sau duyệt được như một iterator các marking.
+    """
+    table = get_firing_table(pn)
+    rules = table.packed_rules
+    num_places = table.num_places
+    nbytes = max(1, (num_places + 7) // 8)
+
+    # Lượt trộn cuối mở fan_in run + visited để đọc và hai file để ghi
+    fan_in = max(2, min(MAX_FAN_IN, memory_budget // (MIN_MERGE_BLOCK * nbytes) - 3))
+    block = _block_size(memory_budget, fan_in + 3, nbytes)
+    max_buffer = max(1024, (memory_budget - 2 * block * nbytes) // BYTES_PER_ENTRY)
+
+    initial_m = pack_marking(pn.M0)
+    directory = tempfile.mkdtemp(prefix="petri_bfs_", dir=workdir)
+    counter = [0]
+
+    def new_path(kind: str = "run") -> str:
+        counter[0] += 1
+        return os.path.join(directory, f"{kind}_{counter[0]:06d}.bin")
+
+    frontier = new_path("layer")
+    visited = new_path("visited")
+    total = _write_keys(frontier, [initial_m], nbytes, block)
+    _write_keys(visited, [initial_m], nbytes, block)
+
+    try:
+        while True:
+            runs = []
+            buffer = []
+
+            def spill():
+                path = new_path()
+                _write_keys(path, sorted(set(buffer)), nbytes, block)
+                runs.append(path)
+                buffer.clear()
+
+            # 1. Mở rộng tầng hiện tại (đọc tuần tự từ đĩa), ghi các run đã sắp xếp
+            for m in _read_keys(frontier, nbytes, block):
+                for _, must_one, must_zero, keep, set_bits in rules:
+                    if m & must_one == must_one and not m & must_zero:
+                        buffer.append((m & keep) | set_bits)
+                if len(buffer) >= max_buffer:
+                    spill()
+            if buffer:
+                spill()
+            os.remove(frontier)
+            if not runs:
+                break
+
+            # 2. Trộn các run + khử trùng, rồi trừ tập đã thăm (delayed duplicate detection)
+            runs = _merge_runs(runs, new_path, nbytes, fan_in, block)
+            candidates = _unique_sorted(heapq.merge(*[_read_keys(r, nbytes, block) for r in runs]))
+            frontier = new_path("layer")
+            next_visited = new_path("visited")
+            with _KeyWriter(frontier, nbytes, block) as new_writer, \
+                    _KeyWriter(next_visited, nbytes, block) as visited_writer:
+                _merge_visited(candidates, _read_keys(visited, nbytes, block), new_writer, visited_writer)
+
+            for r in runs:
+                os.remove(r)
+            os.remove(visited)
+            visited = next_visited
+            if new_writer.count == 0:
+                os.remove(frontier)
+                break
+            total += new_writer.count
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    return total, ExternalReachableSet(directory, visited, total, num_places, nbytes)
@@ -0,0 +1,144 @@
+import numpy as np
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class FiringTable:
+    """
+    Bảng bắn (firing table) được biên dịch một lần cho mỗi PetriNet.
+    - Hướng ma trận (P x T hay T x P) được xác định một lần duy nhất.
+    - Mỗi transition chỉ lưu các cung thực sự tồn tại (pre-set / post-set),
+      nên chi phí kiểm tra enable và bắn tỉ lệ với số cung, không phải P x T.
+    """
+
+    def __init__(self, I: np.ndarray, O: np.ndarray, M0: np.ndarray):
+        I = np.asarray(I, dtype=int)
+        O = np.asarray(O, dtype=int)
+        num_places = len(np.asarray(M0).reshape(-1))
+
+        # Xác định hướng ma trận giống hệt logic cũ của BFS/DFS:
+        # mặc định Hàng = Place; chỉ xoay khi số dòng KHÁC số place nhưng số cột BẰNG số place.
+        rows, cols = I.shape
+        if rows != num_places and cols == num_places:
+            I, O = I.T, O.T
+
+        # Lưu lại dạng chuẩn P x T cho các module cần thao tác ma trận
+        self.I = np.ascontiguousarray(I)
+        self.O = np.ascontiguousarray(O)
+        self.num_places = num_places
+        self.num_transitions = I.shape[1]
+
+        # pre[t]   : danh sách (place, trọng số) của các cung vào transition t
+        # delta[t] : danh sách (place, O - I) với các place bị thay đổi khi bắn t
+        # gain[t]  : các place có số token TĂNG khi bắn t (chỉ cần kiểm tra 1-safe ở đây)
+        self.pre: List[List[Tuple[int, int]]] = []
+        self.post: List[List[Tuple[int, int]]] = []
+        self.delta: List[List[Tuple[int, int]]] = []
+        self.gain: List[List[int]] = []
+
+        for t in range(self.num_transitions):
+            in_col = self.I[:, t]
+            out_col = self.O[:, t]
+            self.pre.append([(int(p), int(in_col[p])) for p in np.nonzero(in_col)[0]])
+            self.post.append([(int(p), int(out_col[p])) for p in np.nonzero(out_col)[0]])
+            diff = out_col - in_col
+            self.delta.append([(int(p), int(diff[p])) for p in np.nonzero(diff)[0]])
+            self.gain.append([int(p) for p in np.nonzero(diff > 0)[0]])
+
+        # --- Dạng bit-packed cho marking 1-safe (bit i <-> place i) ---
+        # Với marking nhị phân, mỗi place p của transition t chỉ cho phép m[p] thuộc {0}, {1} hoặc {0, 1}:
+        # - must_one  : các place bắt buộc = 1 (pre-set)
+        # - must_zero : các place bắt buộc = 0 (contact: bắn xong sẽ vượt 1 token)
+        # - set_bits  : giá trị mới (bằng 1) của các place trong must_one | must_zero
+        # Khi đó: enable  <=> (m & must_one) == must_one  và  (m & must_zero) == 0
+        #         bắn     =>  (m & ~(must_one | must_zero)) | set_bits
+        # Transition không bao giờ bắn được trên marking 1-safe sẽ bị loại khỏi packed_rules.
+        self.packed_rules: List[Tuple[int, int, int, int, int]] = []
+        for t in range(self.num_transitions):
+            must_one = must_zero = set_bits = 0
+            never = False
+            for p in set(np.nonzero(self.I[:, t])[0]) | set(np.nonzero(self.O[:, t])[0]):
+                w_in, w_out = int(self.I[p, t]), int(self.O[p, t])
+                allowed = [v for v in (0, 1) if v >= w_in and v - w_in + w_out <= 1]
+                if not allowed:
+                    never = True
+                    break
+                if len(allowed) == 2:
+                    continue
+                v = allowed[0]
+                if v == 1:
+                    must_one |= 1 << int(p)
+                else:
+                    must_zero |= 1 << int(p)
+                if v - w_in + w_out == 1:
+                    set_bits |= 1 << int(p)
+            if not never:
+                keep = ~(must_one | must_zero)
+                self.packed_rules.append((t, must_one, must_zero, keep, set_bits))
+
+    def fire(self, m: Tuple[int, ...], t: int, bound: int = 1) -> Optional[Tuple[int, ...]]:
+        """
+        Bắn transition t tại marking m.
+        Trả về marking mới, hoặc None nếu t không enable hoặc kết quả vượt quá bound.
+        """
+        for p, w in self.pre[t]:
+            if m[p] < w:
+                return None
+
+        next_m = list(m)
+        for p, d in self.delta[t]:
+            next_m[p] += d
+
+        # Nếu m đã thỏa bound thì chỉ các place được tăng token mới có thể vượt bound
+        check = self.gain[t] if max(m, default=0) <= bound else range(self.num_places)
+        for p in check:
+            if next_m[p] > bound:
+                return None
+        return tuple(next_m)
+
+    def successors(self, m: Tuple[int, ...], bound: int = 1) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        """Sinh lần lượt các cặp (t, marking mới) của mọi transition bắn được tại m."""
+        for t in range(self.num_transitions):
+            next_m = self.fire(m, t, bound)
+            if next_m is not None:
+                yield t, next_m
+
+
+def pack_marking(m: Iterable[int]) -> int:
+    """Mã hóa marking 1-safe thành một số nguyên (bit i <-> place i)."""
+    code = 0
+    for i, v in enumerate(m):
+        v = int(v)
+        if v > 1 or v < 0:
+            raise ValueError(f"Packed marking requires 0/1 tokens, place {i} has {v}")
+        if v:
+            code |= 1 << i
+    return code
+
+
+def unpack_marking(code: int, num_places: int) -> Tuple[int, ...]:
+    """Giải mã số nguyên về tuple marking như BFS/DFS vẫn trả về."""
+    if num_places == 0:
+        return ()
+    return tuple(map(int, format(code, f"0{num_places}b")[::-1]))
+
+
+def unpack_markings(codes: Iterable[int], num_places: int) -> Set[Tuple[int, ...]]:
+    """Giải mã cả tập marking packed về Set[Tuple[int, ...]]."""
+    return {unpack_marking(code, num_places) for code in codes}
+
+
+def get_firing_table(pn) -> FiringTable:
+    """
+    Lấy FiringTable của mạng pn, chỉ biên dịch lại khi I/O/M0 bị thay thế.
+    Kết quả được cache ngay trên đối tượng PetriNet để BFS và DFS dùng chung.
+    """
+    table = getattr(pn, "_firing_table", None)
+    key = getattr(pn, "_firing_table_key", None)
+    if table is not None and key is not None:
+        if key[0] is pn.I and key[1] is pn.O and key[2] is pn.M0:
+            return table
+
+    table = FiringTable(pn.I, pn.O, pn.M0)
+    pn._firing_table = table
+    pn._firing_table_key = (pn.I, pn.O, pn.M0)
+    return table
@@ -0,0 +1,244 @@
+import collections
+from math import gcd
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.Firing import get_firing_table
+
+
+def transition_arcs(pn) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Danh sách place vào / ra của từng transition, lấy từ FiringTable (ma trận đã chuẩn hóa P x T,
+    cùng hướng với BFS/DFS).
+    """
+    table = get_firing_table(pn)
+    inputs = [[p for p, _ in table.pre[t]] for t in range(table.num_transitions)]
+    outputs = [[p for p, _ in table.post[t]] for t in range(table.num_transitions)]
+    return inputs, outputs
+
+
+def _hyperedges(pn) -> List[List[int]]:
+    """Mỗi transition là một siêu cạnh nối mọi place vào/ra của nó."""
+    inputs, outputs = transition_arcs(pn)
+    return [sorted(set(i) | set(o)) for i, o in zip(inputs, outputs)]
+
+
+def _place_graph(pn) -> List[Set[int]]:
+    """Đồ thị vô hướng giữa các place: hai place kề nhau nếu cùng tham gia một transition."""
+    adj = [set() for _ in range(len(pn.place_ids))]
+    for edge in _hyperedges(pn):
+        for u in edge:
+            adj[u].update(edge)
+            adj[u].discard(u)
+    return adj
+
+
+def _ids(pn, indices: List[int]) -> List[str]:
+    return [pn.place_ids[i] for i in indices]
+
+
+def order_original(pn) -> List[str]:
+    """Thứ tự place như trong file PNML."""
+    return list(pn.place_ids)
+
+
+def order_bfs(pn) -> List[str]:
+    """Duyệt BFS trên đồ thị place (láng giềng theo chỉ số tăng dần), lần lượt từng thành phần liên thông."""
+    adj = _place_graph(pn)
+    visited = [False] * len(adj)
+    result = []
+    for start in range(len(adj)):
+        if visited[start]:
+            continue
+        visited[start] = True
+        result.append(start)
+        queue = collections.deque([start])
+        while queue:
+            u = queue.popleft()
+            for v in sorted(adj[u]):
+                if not visited[v]:
+                    visited[v] = True
+                    result.append(v)
+                    queue.append(v)
+    return _ids(pn, result)
+
+
+def order_dfs(pn) -> List[str]:
+    """Duyệt DFS (tiền thứ tự) trên đồ thị place: giữ các chuỗi place tuần tự nằm liền nhau."""
+    adj = _place_graph(pn)
+    visited = [False] * len(adj)
+    result = []
+    for start in range(len(adj)):
+        if visited[start]:
+            continue
+        stack = [start]
+        while stack:
+            u = stack.pop()
+            if visited[u]:
+                continue
+            visited[u] = True
+            result.append(u)
+            # Đẩy ngược để láng giềng nhỏ nhất được thăm trước
+            for v in sorted(adj[u], reverse=True):
+                if not visited[v]:
+                    stack.append(v)
+    return _ids(pn, result)
+
+
+def order_cuthill_mckee(pn) -> List[str]:
+    """
+    Reverse Cuthill-McKee: giảm băng thông (bandwidth) của ma trận kề place-place.
+    Mỗi thành phần liên thông bắt đầu từ place có bậc nhỏ nhất; láng giềng được thăm theo bậc tăng dần.
+    """
+    adj = _place_graph(pn)
+    degree = [len(a) for a in adj]
+    visited = [False] * len(adj)
+    result = []
+    for start in sorted(range(len(adj)), key=lambda p: (degree[p], p)):
+        if visited[start]:
+            continue
+        visited[start] = True
+        component = [start]
+        queue = collections.deque([start])
+        while queue:
+            u = queue.popleft()
+            for v in sorted(adj[u], key=lambda p: (degree[p], p)):
+                if not visited[v]:
+                    visited[v] = True
+                    component.append(v)
+                    queue.append(v)
+        result.extend(component)
+    result.reverse()
+    return _ids(pn, result)
+
+
+def _total_span(edges: List[List[int]], position: List[float]) -> float:
+    return sum(max(position[p] for p in e) - min(position[p] for p in e) for e in edges if e)
+
+
+def order_force(pn, iterations: int = 50, initial: Optional[List[str]] = None) -> List[str]:
+    """
+    FORCE (Aloul, Markov, Sakallah): mỗi place được kéo về trọng tâm các transition chứa nó.
+    Lặp: tính trọng tâm (center of gravity) của mỗi siêu cạnh, vị trí mới của place là trung bình
+    trọng tâm các siêu cạnh của nó, sắp xếp lại; giữ thứ tự có tổng độ dài siêu cạnh (span) nhỏ nhất.
+    Thứ tự khởi đầu mặc định là order_bfs.
+    """
+    edges = [e for e in _hyperedges(pn) if len(e) > 1]
+    index = {pid: i for i, pid in enumerate(pn.place_ids)}
+    current = [index[p] for p in (initial if initial is not None else order_bfs(pn))]
+    n = len(current)
+    if n == 0 or not edges:
+        return _ids(pn, current)
+
+    incident = [[] for _ in range(n)]
+    for k, e in enumerate(edges):
+        for p in e:
+            incident[p].append(k)
+
+    position = [0.0] * n
+    for rank, p in enumerate(current):
+        position[p] = float(rank)
+    best, best_span = list(current), _total_span(edges, position)
+
+    for _ in range(iterations):
+        cog = [sum(position[p] for p in e) / len(e) for e in edges]
+        target = [
+            sum(cog[k] for k in incident[p]) / len(incident[p]) if incident[p] else position[p]
+            for p in range(n)
+        ]
+        current = sorted(range(n), key=lambda p: (target[p], position[p]))
+        for rank, p in enumerate(current):
+            position[p] = float(rank)
+        span = _total_span(edges, position)
+        if span >= best_span:
+            break
+        best, best_span = list(current), span
+    return _ids(pn, best)
+
+
+def p_semiflows(pn, limit: int = 2000) -> List[List[int]]:
+    """
+    Các P-bất biến không âm (P-semiflow) có support tối tiểu, tính bằng thuật toán Farkas
+    trên ma trận liên thuộc C = O - I (y^T C = 0, y >= 0).
+    Dừng sớm (trả về các bất biến đã tìm được) nếu số hàng trung gian vượt quá limit.
+    """
+    table = get_firing_table(pn)
+    P, T = table.num_places, table.num_transitions
+    if T == 0:
+        return []
+    C = table.O - table.I
+
+    # Mỗi hàng: (phần incidence còn lại, vector y)
+    rows = [(list(map(int, C[p])), [1 if q == p else 0 for q in range(P)]) for p in range(P)]
+    for t in range(T):
+        zero = [r for r in rows if r[0][t] == 0]
+        pos = [r for r in rows if r[0][t] > 0]
+        neg = [r for r in rows if r[0][t] < 0]
+        combined = []
+        for cp, yp in pos:
+            for cn, yn in neg:
+                a, b = -cn[t], cp[t]
+                c = [a * x + b * y for x, y in zip(cp, cn)]
+                y = [a * x + b * z for x, z in zip(yp, yn)]
+                g = 0
+                for v in y:
+                    g = gcd(g, v)
+                if g > 1:
+                    c = [v // g for v in c]
+                    y = [v // g for v in y]
+                combined.append((c, y))
+        rows = zero + combined
+        # Bỏ các hàng có support không tối tiểu
+        supports = [frozenset(i for i, v in enumerate(y) if v) for _, y in rows]
+        keep = []
+        for i, s in enumerate(supports):
+            if any(supports[j] < s or (supports[j] == s and j < i) for j in range(len(rows)) if j != i):
+                continue
+            keep.append(rows[i])
+        rows = keep
+        if len(rows) > limit:
+            break
+    return [y for c, y in rows if not any(c)]
+
+
+def order_p_invariant(pn) -> List[str]:
+    """
+    Gom nhóm theo P-bất biến: các place cùng một semiflow (vd. các trạng thái của một tiến trình
+    1-safe, luôn có đúng một token) được đặt liền nhau. Các nhóm được xếp theo vị trí BFS của place
+    đầu tiên; place đã thuộc nhóm trước không lặp lại; place không thuộc bất biến nào đi cuối theo BFS.
+    """
+    base = order_bfs(pn)
+    rank = {pid: i for i, pid in enumerate(base)}
+    groups = []
+    for y in p_semiflows(pn):
+        members = sorted((pn.place_ids[p] for p, v in enumerate(y) if v), key=rank.get)
+        groups.append(members)
+    groups.sort(key=lambda g: (rank[g[0]], len(g)))
+
+    result, seen = [], set()
+    for group in groups:
+        for pid in group:
+            if pid not in seen:
+                seen.add(pid)
+                result.append(pid)
+    result.extend(pid for pid in base if pid not in seen)
+    return result
+
+
+# Các heuristic thứ tự biến tĩnh: tên -> hàm(pn) trả về danh sách place id theo thứ tự biến BDD
+ORDERINGS: Dict[str, Callable] = {
+    "bfs": order_bfs,
+    "dfs": order_dfs,
+    "original": order_original,
+    "force": order_force,
+    "cuthill-mckee": order_cuthill_mckee,
+    "p-invariant": order_p_invariant,
+}
+
+
+def compute_order(pn, name: str = "bfs") -> List[str]:
+    """Thứ tự place cho biến BDD theo heuristic có tên name (xem ORDERINGS)."""
+    try:
+        heuristic = ORDERINGS[name]
+    except KeyError:
+        raise ValueError(f"Unknown variable ordering: {name} (choose from {', '.join(ORDERINGS)})")
+    return heuristic(pn)
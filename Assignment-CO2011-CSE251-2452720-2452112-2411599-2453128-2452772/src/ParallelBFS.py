@@ -0,0 +1,166 @@
+import multiprocessing as mp
+import queue
+from typing import List, Set, Tuple
+
+from src.Firing import get_firing_table, pack_marking, unpack_markings
+
+# Số marking tối đa trong một thông điệp gửi giữa các worker
+BATCH_SIZE = 8192
+
+# Chu kỳ (giây) tiến trình cha kiểm tra các worker còn sống trong lúc chờ kết quả
+POLL_INTERVAL = 0.5
+
+# Hằng số cho hàm băm phân vùng (Fibonacci hashing trên modulo 2^61 - 1)
+_MERSENNE61 = (1 << 61) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def owner_of(m: int, workers: int) -> int:
+    """Worker sở hữu marking packed m (phân vùng theo giá trị băm)."""
+    return (((m % _MERSENNE61) * _GOLDEN) >> 32) % workers
+
+
+def _worker(
+    wid: int,
+    workers: int,
+    rules: List[Tuple[int, int, int, int, int]],
+    initial_m: int,
+    inboxes,
+    results,
+    barrier,
+    round_counts,
+):
+    """
+    Một worker của BFS song song, chỉ giữ các marking thuộc phân vùng của mình.
+    Mỗi vòng (một tầng BFS):
+    1. Bắn các marking trong frontier cục bộ, gom marking mới theo worker sở hữu.
+    2. Gửi theo lô (batch) cho các worker khác; lô cuối cùng của mỗi vòng được đánh dấu.
+    3. Nhận đủ lô cuối từ mọi worker khác, lọc trùng với visited cục bộ -> frontier mới.
+    4. Cộng kích thước frontier mới vào bộ đếm chung, chờ barrier:
+       tổng bằng 0 nghĩa là toàn hệ thống đã tĩnh lặng (quiescence) -> dừng.
+    """
+    inbox = inboxes[wid]
+    visited = set()
+    frontier = []
+    if owner_of(initial_m, workers) == wid:
+        visited.add(initial_m)
+        frontier.append(initial_m)
+
+    round_no = 0
+
+    while True:
+        outgoing = [[] for _ in range(workers)]
+        local_new = []
+
+        # 1. Mở rộng frontier cục bộ
+        for m in frontier:
+            for _, must_one, must_zero, keep, set_bits in rules:
+                if m & must_one == must_one and not m & must_zero:
+                    next_m = (m & keep) | set_bits
+                    dest = owner_of(next_m, workers)
+                    if dest == wid:
+                        if next_m not in visited:
+                            visited.add(next_m)
+                            local_new.append(next_m)
+                    else:
+                        batch = outgoing[dest]
+                        batch.append(next_m)
+                        if len(batch) >= BATCH_SIZE:
+                            inboxes[dest].put((round_no, False, batch))
+                            outgoing[dest] = []
+
+        # 2. Gửi lô cuối (có thể rỗng) cho mọi worker khác
+        for dest in range(workers):
+            if dest != wid:
+                inboxes[dest].put((round_no, True, outgoing[dest]))
+
+        # 3. Nhận marking từ các worker khác cho vòng hiện tại
+        # (không worker nào gửi được thông điệp của vòng sau trước khi mọi worker qua barrier)
+        finished = 0
+        while finished < workers - 1:
+            msg_round, last, batch = inbox.get()
+            assert msg_round == round_no
+            for next_m in batch:
+                if next_m not in visited:
+                    visited.add(next_m)
+                    local_new.append(next_m)
+            if last:
+                finished += 1
+
+        # 4. Phát hiện tĩnh lặng: tổng số marking mới của mọi worker trong vòng này
+        slot = round_no % 2
+        with round_counts.get_lock():
+            round_counts[slot] += len(local_new)
+        barrier.wait()
+        total_new = round_counts[slot]
+        barrier.wait()
+        if wid == 0:
+            # Hai ô đếm được dùng xen kẽ theo vòng, nên reset ô này không tranh chấp với vòng kế tiếp
+            round_counts[slot] = 0
+
+        if total_new == 0:
+            break
+        frontier = local_new
+        round_no += 1
+
+    results.put(list(visited))
+
+
+def parallel_bfs_reachable(pn, workers: int, packed: bool = False):
+    """
+    BFS song song nhiều tiến trình, phân vùng không gian marking theo giá trị băm.
+    Mỗi worker sở hữu một phân vùng, trao đổi marking mới theo lô qua multiprocessing.Queue
+    và dừng khi cả hệ thống không còn marking mới (phát hiện tĩnh lặng theo từng tầng).
+    Trả về cùng tập kết quả như bfs_reachable (Set[int] nếu packed=True).
+    Nếu một worker chết (exception, hết bộ nhớ, bị kill) thì các worker còn lại sẽ kẹt ở barrier:
+    tiến trình cha dừng tất cả và báo RuntimeError thay vì chờ mãi.
+    """
+    table = get_firing_table(pn)
+    initial_m = pack_marking(pn.M0)
+
+    ctx = mp.get_context()
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    barrier = ctx.Barrier(workers)
+    round_counts = ctx.Array("q", 2)
+
+    procs = [
+        ctx.Process(
+            target=_worker,
+            args=(wid, workers, table.packed_rules, initial_m, inboxes, results, barrier, round_counts),
+        )
+        for wid in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    # Phải lấy kết quả trước khi join để tránh kẹt khi dữ liệu trong Queue lớn
+    reached: Set[int] = set()
+    received = 0
+    try:
+        while received < workers:
+            try:
+                part = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                failed = [(wid, p.exitcode) for wid, p in enumerate(procs) if p.exitcode not in (None, 0)]
+                if failed:
+                    wid, code = failed[0]
+                    raise RuntimeError(f"Parallel BFS worker {wid} died (exit code {code})")
+                if all(p.exitcode is not None for p in procs) and results.empty():
+                    raise RuntimeError("Parallel BFS workers exited without returning results")
+                continue
+            reached.update(part)
+            received += 1
+    except BaseException:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
+        raise
+    for p in procs:
+        p.join()
+
+    if packed:
+        return reached
+    return unpack_markings(reached, table.num_places)
@@ -0,0 +1,137 @@
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.Firing import get_firing_table
+
+
+class ReachabilityGraph:
+    """
+    Đồ thị reachability lưu theo dạng CSR (compressed sparse row).
+    - markings[i]      : marking có id i (id gán theo thứ tự BFS, id 0 là M0)
+    - indptr[i:i+2]    : đoạn cạnh đi ra của trạng thái i trong indices / transition_id
+    - indices[k]       : id trạng thái đích của cạnh k
+    - transition_id[k] : chỉ số transition gây ra cạnh k
+    """
+
+    def __init__(
+        self,
+        markings: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        transition_id: np.ndarray,
+        place_ids: Optional[List[str]] = None,
+        trans_ids: Optional[List[str]] = None,
+    ):
+        self.markings = markings
+        self.indptr = indptr
+        self.indices = indices
+        self.transition_id = transition_id
+        self.place_ids = list(place_ids) if place_ids is not None else None
+        self.trans_ids = list(trans_ids) if trans_ids is not None else None
+        self._index: Optional[Dict[Tuple[int, ...], int]] = None
+
+    @property
+    def num_states(self) -> int:
+        return self.markings.shape[0]
+
+    @property
+    def num_edges(self) -> int:
+        return self.indices.shape[0]
+
+    def marking(self, i: int) -> Tuple[int, ...]:
+        return tuple(map(int, self.markings[i]))
+
+    def index_of(self, marking) -> Optional[int]:
+        """Id của một marking (None nếu không reachable)."""
+        if self._index is None:
+            self._index = {tuple(row): i for i, row in enumerate(self.markings.tolist())}
+        return self._index.get(tuple(map(int, marking)))
+
+    def successors(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Trả về (id trạng thái đích, id transition) của các cạnh đi ra từ trạng thái i."""
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return self.indices[lo:hi], self.transition_id[lo:hi]
+
+    def dead_states(self) -> np.ndarray:
+        """Các trạng thái không có cạnh đi ra (deadlock)."""
+        return np.nonzero(np.diff(self.indptr) == 0)[0]
+
+    def save(self, path: str):
+        """Lưu đồ thị ra file .npz (nén)."""
+        extra = {}
+        if self.place_ids is not None:
+            extra["place_ids"] = np.array(self.place_ids, dtype=str)
+        if self.trans_ids is not None:
+            extra["trans_ids"] = np.array(self.trans_ids, dtype=str)
+        np.savez_compressed(
+            path,
+            markings=self.markings,
+            indptr=self.indptr,
+            indices=self.indices,
+            transition_id=self.transition_id,
+            **extra,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ReachabilityGraph":
+        """Đọc lại đồ thị đã lưu bằng save()."""
+        with np.load(path) as data:
+            place_ids = data["place_ids"].tolist() if "place_ids" in data else None
+            trans_ids = data["trans_ids"].tolist() if "trans_ids" in data else None
+            return cls(
+                data["markings"],
+                data["indptr"],
+                data["indices"],
+                data["transition_id"],
+                place_ids,
+                trans_ids,
+            )
+
+
+def build_reachability_graph(pn) -> ReachabilityGraph:
+    """
+    Duyệt BFS và dựng đồ thị reachability đầy đủ (cả các cạnh), cùng ngữ nghĩa bắn với bfs_reachable.
+    Vì BFS lấy trạng thái ra theo đúng thứ tự id, các cạnh của trạng thái i được ghi liên tiếp
+    nên mảng CSR được dựng trực tiếp, không cần sắp xếp lại.
+    """
+    table = get_firing_table(pn)
+    initial_m = tuple(map(int, pn.M0))
+
+    ids = {initial_m: 0}
+    order = [initial_m]
+    queue = deque([initial_m])
+
+    indptr = array("q", [0])
+    indices = array("q")
+    transition_id = array("i")
+
+    while queue:
+        current_m = queue.popleft()
+        for t, next_m in table.successors(current_m):
+            j = ids.get(next_m)
+            if j is None:
+                j = len(order)
+                ids[next_m] = j
+                order.append(next_m)
+                queue.append(next_m)
+            indices.append(j)
+            transition_id.append(t)
+        indptr.append(len(indices))
+
+    max_tokens = max((max(m, default=0) for m in order), default=0)
+    dtype = np.int8 if max_tokens < 128 else np.int64
+    markings = np.array(order, dtype=dtype).reshape(len(order), table.num_places)
+
+    graph = ReachabilityGraph(
+        markings,
+        np.frombuffer(indptr, dtype=np.int64).copy(),
+        np.frombuffer(indices, dtype=np.int64).copy(),
+        np.frombuffer(transition_id, dtype=np.int32).copy(),
+        getattr(pn, "place_ids", None),
+        getattr(pn, "trans_ids", None),
+    )
+    graph._index = ids
+    return graph
@@ -0,0 +1,42 @@
+from collections import deque
+from typing import Callable, Iterator, Optional, Tuple
+
+from src.Firing import get_firing_table
+
+
+def iter_reachable(
+    pn,
+    order: str = "bfs",
+    until: Optional[Callable[[Tuple[int, ...]], bool]] = None,
+) -> Iterator[Tuple[int, ...]]:
+    """
+    Phiên bản generator của bfs_reachable / dfs_reachable.
+    - Mỗi marking được yield ngay khi được phát hiện lần đầu (M0 đầu tiên), không chờ duyệt xong.
+    - order: "bfs" (hàng đợi FIFO) hoặc "dfs" (ngăn xếp LIFO, cùng thứ tự phát hiện với dfs_reachable).
+    - until: điều kiện dừng sớm; generator dừng ngay sau khi yield marking đầu tiên thỏa until(m).
+    Có thể dừng bất kỳ lúc nào (break / islice) mà không phải duyệt toàn bộ không gian trạng thái.
+    """
+    if order not in ("bfs", "dfs"):
+        raise ValueError(f"Unknown exploration order '{order}', expected 'bfs' or 'dfs'")
+
+    table = get_firing_table(pn)
+    initial_m = tuple(map(int, pn.M0))
+
+    pending = deque([initial_m])
+    visited = {initial_m}
+    pop = pending.popleft if order == "bfs" else pending.pop
+
+    yield initial_m
+    if until is not None and until(initial_m):
+        return
+
+    while pending:
+        current_m = pop()
+        for _, next_m in table.successors(current_m):
+            if next_m in visited:
+                continue
+            visited.add(next_m)
+            yield next_m
+            if until is not None and until(next_m):
+                return
+            pending.append(next_m)
@@ -0,0 +1,233 @@
+from collections import deque
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.Firing import get_firing_table
+
+
+def _arc_lists(table):
+    """Danh sách kề của đồ thị hai phía place/transition: đỉnh 0..P-1 là place, P..P+T-1 là transition."""
+    P, T = table.num_places, table.num_transitions
+    adj = [[] for _ in range(P + T)]
+    for t in range(T):
+        for p, w in table.pre[t]:
+            adj[p].append((0, w, P + t))       # cung place -> transition
+            adj[P + t].append((1, w, p))
+        for p, w in table.post[t]:
+            adj[P + t].append((2, w, p))       # cung transition -> place
+            adj[p].append((3, w, P + t))
+    return adj
+
+
+def _refine(adj, left: List[int], right: List[int]) -> Optional[Tuple[List[int], List[int]]]:
+    """
+    Làm mịn (color refinement) đồng thời hai phép tô màu của cùng một đồ thị.
+    Nhãn màu mới được đặt theo thứ tự chữ ký, nên hai bên tương ứng khi chúng "đẳng cấu";
+    trả về None ngay khi hai bên khác nhau (nhánh tìm kiếm bị cắt).
+    """
+    while True:
+        sig_l = [(left[v], tuple(sorted((k, w, left[u]) for k, w, u in adj[v]))) for v in range(len(adj))]
+        sig_r = [(right[v], tuple(sorted((k, w, right[u]) for k, w, u in adj[v]))) for v in range(len(adj))]
+        if sorted(sig_l) != sorted(sig_r):
+            return None
+        labels = {sig: i for i, sig in enumerate(sorted(set(sig_l)))}
+        new_left = [labels[s] for s in sig_l]
+        new_right = [labels[s] for s in sig_r]
+        if len(labels) == len(set(left)):
+            return new_left, new_right
+        left, right = new_left, new_right
+
+
+def find_automorphisms(pn, limit: int = 10000) -> List[Tuple[int, ...]]:
+    """
+    Liệt kê các tự đẳng cấu (automorphism) của mạng: hoán vị place (kèm hoán vị transition tương ứng)
+    giữ nguyên mọi cung, trọng số và M0. Trả về danh sách hoán vị place (perm[p] = ảnh của p),
+    phần tử đầu tiên là hoán vị đồng nhất.
+    Thuật toán: cá thể hóa - làm mịn (individualization-refinement). Dãy đỉnh được cá thể hóa
+    bên trái cố định, bên phải thử các ứng viên cùng màu. Chỉ nhánh đầu tiên (đồng nhất) được duyệt
+    sâu; ở mỗi nhánh khác chỉ cần một lá hợp lệ làm phần tử sinh, và ứng viên đã nằm trong quỹ đạo
+    của các phần tử sinh đã có thì bỏ qua. Nhóm được sinh lại bằng _close_group;
+    ValueError nếu nhóm có hơn limit phần tử.
+    """
+    table = get_firing_table(pn)
+    P, T = table.num_places, table.num_transitions
+    adj = _arc_lists(table)
+    M0 = [int(x) for x in np.asarray(pn.M0).reshape(-1)]
+
+    # Màu ban đầu: place theo số token M0, transition tách riêng
+    initial = [M0[p] for p in range(P)] + [max(M0, default=0) + 1] * T
+    start = _refine(adj, initial, list(initial))
+    if start is None:
+        return [tuple(range(P))]
+
+    arcs = {(p, t, w, 0) for t in range(T) for p, w in table.pre[t]}
+    arcs |= {(p, t, w, 1) for t in range(T) for p, w in table.post[t]}
+
+    # Phần tử sinh: ánh xạ đầy đủ trên P + T đỉnh
+    generators: List[List[int]] = []
+
+    def is_automorphism(mapping: List[int]) -> bool:
+        for p, t, w, kind in arcs:
+            if (mapping[p], mapping[P + t] - P, w, kind) not in arcs:
+                return False
+        return all(M0[mapping[p]] == M0[p] for p in range(P))
+
+    def target_vertex(left: List[int]) -> Optional[int]:
+        """Đỉnh đầu tiên của ô nhỏ nhất (ưu tiên place), None nếu phép tô màu đã rời rạc."""
+        cells: Dict[int, List[int]] = {}
+        for v, c in enumerate(left):
+            cells.setdefault(c, []).append(v)
+        target = [c for c in cells.values() if len(c) > 1]
+        if not target:
+            return None
+        return min(target, key=lambda c: (c[0] >= P, len(c)))[0]
+
+    def individualize(left: List[int], right: List[int], v: int, w: int):
+        fresh = len(left) + 1
+        l2 = list(left)
+        r2 = list(right)
+        l2[v] = fresh
+        r2[w] = fresh
+        return _refine(adj, l2, r2)
+
+    def leaf(left: List[int], right: List[int]) -> Optional[List[int]]:
+        pos = {c: v for v, c in enumerate(right)}
+        mapping = [pos[left[v]] for v in range(P + T)]
+        return mapping if is_automorphism(mapping) else None
+
+    def search_one(left: List[int], right: List[int]) -> Optional[List[int]]:
+        """Một automorphism bất kỳ trong nhánh (left, right), None nếu không có."""
+        v = target_vertex(left)
+        if v is None:
+            return leaf(left, right)
+        for w in range(P + T):
+            if right[w] != left[v]:
+                continue
+            refined = individualize(left, right, v, w)
+            if refined is not None:
+                mapping = search_one(*refined)
+                if mapping is not None:
+                    return mapping
+        return None
+
+    def orbit(v: int) -> Set[int]:
+        seen = {v}
+        queue = deque([v])
+        while queue:
+            u = queue.popleft()
+            for g in generators:
+                if g[u] not in seen:
+                    seen.add(g[u])
+                    queue.append(g[u])
+        return seen
+
+    def search(left: List[int]):
+        """Nhánh đồng nhất (left = right). Các phần tử sinh tìm ở mức sâu hơn đều cố định dãy đã cá thể hóa."""
+        v = target_vertex(left)
+        if v is None:
+            return
+        refined = individualize(left, left, v, v)
+        search(refined[0])
+        for w in range(P + T):
+            if w == v or left[w] != left[v] or w in orbit(v):
+                continue
+            refined = individualize(left, left, v, w)
+            if refined is not None:
+                mapping = search_one(*refined)
+                if mapping is not None:
+                    generators.append(mapping)
+
+    search(start[0])
+    return _close_group([g[:P] for g in generators], P, limit)
+
+
+def _close_group(generators: Sequence[Sequence[int]], num_places: int, limit: int) -> List[Tuple[int, ...]]:
+    """Sinh toàn bộ nhóm hoán vị từ các phần tử sinh (generators)."""
+    identity = tuple(range(num_places))
+    group = {identity}
+    queue = deque([identity])
+    gens = [tuple(g) for g in generators]
+    while queue:
+        g = queue.popleft()
+        for h in gens:
+            gh = tuple(h[g[p]] for p in range(num_places))
+            if gh not in group:
+                if len(group) >= limit:
+                    raise ValueError(f"Symmetry group exceeds {limit} elements")
+                group.add(gh)
+                queue.append(gh)
+    return [identity] + sorted(group - {identity})
+
+
+def _check_place_perm(table, perm: Sequence[int], M0: List[int]):
+    """Kiểm tra hoán vị place do người dùng cung cấp có phải automorphism của mạng không."""
+    P = table.num_places
+    if sorted(perm) != list(range(P)):
+        raise ValueError("Symmetry generator is not a permutation of the places")
+    signature = lambda pre, post: (tuple(sorted(pre)), tuple(sorted(post)))
+    transitions = {}
+    for t in range(table.num_transitions):
+        key = signature(table.pre[t], table.post[t])
+        transitions[key] = transitions.get(key, 0) + 1
+    mapped = {}
+    for t in range(table.num_transitions):
+        key = signature([(perm[p], w) for p, w in table.pre[t]], [(perm[p], w) for p, w in table.post[t]])
+        mapped[key] = mapped.get(key, 0) + 1
+    if mapped != transitions or any(M0[perm[p]] != M0[p] for p in range(P)):
+        raise ValueError("Symmetry generator is not an automorphism of the net")
+
+
+def symmetric_reachable(
+    pn,
+    generators: Optional[Sequence[Sequence[int]]] = None,
+    limit: int = 10000,
+) -> Tuple[Set[Tuple[int, ...]], int]:
+    """
+    BFS với rút gọn đối xứng (symmetry reduction): chỉ lưu một đại diện chính tắc cho mỗi quỹ đạo.
+    - generators: danh sách hoán vị place (perm[p] = ảnh của p) do người dùng cung cấp;
+      nếu None thì tự tìm toàn bộ nhóm automorphism bằng find_automorphisms.
+    - Đại diện chính tắc của marking m là ảnh nhỏ nhất (theo thứ tự tuple) của m qua nhóm.
+    Trả về (tập đại diện quỹ đạo, số marking khi khai triển đầy đủ = tổng kích thước các quỹ đạo).
+    """
+    table = get_firing_table(pn)
+    P = table.num_places
+    M0 = [int(x) for x in np.asarray(pn.M0).reshape(-1)]
+
+    if generators is None:
+        group = find_automorphisms(pn, limit=limit)
+    else:
+        for g in generators:
+            _check_place_perm(table, g, M0)
+        group = _close_group(generators, P, limit)
+
+    # Ảnh của m qua g: m'[g[p]] = m[p]  <=>  m' = m lấy theo chỉ số g^-1
+    if P == 0:
+        getters = [lambda m: ()]
+    else:
+        inverses = []
+        for g in group:
+            inv = [0] * P
+            for p, q in enumerate(g):
+                inv[q] = p
+            inverses.append(inv)
+        getters = [itemgetter(*inv) if P > 1 else (lambda m, i=inv[0]: (m[i],)) for inv in inverses]
+
+    def canonical(m):
+        return min(getter(m) for getter in getters)
+
+    initial_m = canonical(tuple(M0))
+    queue = deque([initial_m])
+    reps = {initial_m}
+
+    while queue:
+        current_m = queue.popleft()
+        for _, next_m in table.successors(current_m):
+            rep = canonical(next_m)
+            if rep not in reps:
+                reps.add(rep)
+                queue.append(rep)
+
+    expanded = sum(len({getter(m) for getter in getters}) for m in reps)
+    return reps, expanded
@@ -0,0 +1,100 @@
+from array import array
+from collections import deque
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from src.Firing import get_firing_table, pack_marking
+
+Target = Union[Sequence[int], Callable[[Tuple[int, ...]], bool]]
+
+
+def _trace_back(parent: array, via: array, state: int) -> List[int]:
+    """Lần ngược mảng cha từ state về M0 (id 0), trả về dãy transition theo thứ tự bắn."""
+    path = []
+    while state != 0:
+        path.append(via[state])
+        state = parent[state]
+    path.reverse()
+    return path
+
+
+def shortest_firing_sequence(pn, target: Target) -> Optional[List[int]]:
+    """
+    Tìm dãy bắn ngắn nhất từ M0 tới một marking đích (witness / counterexample).
+    - target: một marking (list/tuple/np.ndarray) hoặc hàm điều kiện f(marking) -> bool.
+    - Trả về danh sách chỉ số transition (dùng pn.trans_ids[t] để lấy ID), [] nếu M0 đã thỏa,
+      None nếu không reachable.
+    BFS chỉ lưu cho mỗi trạng thái: id cha và transition đã bắn (hai mảng số nguyên),
+    không lưu cả đường đi cho từng marking.
+    """
+    table = get_firing_table(pn)
+    initial_m = tuple(map(int, pn.M0))
+
+    parent = array("q", [0])
+    via = array("i", [-1])
+
+    # Đích là một marking cụ thể và mạng 1-safe -> duyệt trên marking packed (ít bộ nhớ hơn)
+    if not callable(target) and max(initial_m, default=0) <= 1:
+        goal = tuple(map(int, target))
+        if len(goal) != table.num_places:
+            raise ValueError(f"Target marking has {len(goal)} places, expected {table.num_places}")
+        if max(goal, default=0) > 1:
+            return None
+        goal_code = pack_marking(goal)
+        start = pack_marking(initial_m)
+        if start == goal_code:
+            return []
+
+        ids = {start: 0}
+        queue = deque([start])
+        while queue:
+            m = queue.popleft()
+            m_id = ids[m]
+            for t, must_one, must_zero, keep, set_bits in table.packed_rules:
+                if m & must_one == must_one and not m & must_zero:
+                    next_m = (m & keep) | set_bits
+                    if next_m in ids:
+                        continue
+                    ids[next_m] = len(parent)
+                    parent.append(m_id)
+                    via.append(t)
+                    if next_m == goal_code:
+                        return _trace_back(parent, via, ids[next_m])
+                    queue.append(next_m)
+        return None
+
+    if callable(target):
+        is_goal = target
+    else:
+        goal = tuple(map(int, target))
+        is_goal = lambda m: m == goal
+
+    if is_goal(initial_m):
+        return []
+
+    ids = {initial_m: 0}
+    queue = deque([initial_m])
+    while queue:
+        m = queue.popleft()
+        m_id = ids[m]
+        for t, next_m in table.successors(m):
+            if next_m in ids:
+                continue
+            ids[next_m] = len(parent)
+            parent.append(m_id)
+            via.append(t)
+            if is_goal(next_m):
+                return _trace_back(parent, via, ids[next_m])
+            queue.append(next_m)
+    return None
+
+
+def replay_firing_sequence(pn, sequence: Sequence[int]) -> Tuple[int, ...]:
+    """Bắn lần lượt dãy transition từ M0, trả về marking cuối (ValueError nếu có bước không bắn được)."""
+    table = get_firing_table(pn)
+    m = tuple(map(int, pn.M0))
+    for step, t in enumerate(sequence):
+        next_m = table.fire(m, t)
+        if next_m is None:
+            raise ValueError(f"Transition {t} is not enabled at step {step}")
+        m = next_m
+    return m
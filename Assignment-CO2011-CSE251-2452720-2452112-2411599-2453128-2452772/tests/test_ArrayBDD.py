@@ -0,0 +1,149 @@
+import itertools
+
+import pytest
+
+from src.ArrayBDD import FREE, BDDManager
+
+
+def truth_table(f, variables):
+    rows = []
+    for bits in itertools.product([0, 1], repeat=len(variables)):
+        rows.append(int(f.restrict(dict(zip(variables, bits))).is_one()))
+    return rows
+
+
+def test_001():
+    mgr = BDDManager(capacity=16, cache_bits=4)
+    a, b, c, d = [mgr.add_var(name) for name in "abcd"]
+    f = (a & b) | (~c & d)
+    g = (a ^ d) | (b & ~c)
+
+    for h, op in [
+        (f & g, lambda x, y: x & y),
+        (f | g, lambda x, y: x | y),
+        (f ^ g, lambda x, y: x ^ y),
+        (f - g, lambda x, y: x & (1 - y)),
+    ]:
+        expected = [op(x, y) for x, y in zip(truth_table(f, [a, b, c, d]), truth_table(g, [a, b, c, d]))]
+        assert truth_table(h, [a, b, c, d]) == expected
+
+    # Bảng node đã phải nhân đôi nhiều lần (capacity=16) mà kết quả vẫn chính tắc
+    assert (f & g) | (f & ~g) == f
+    assert f.satisfy_count() == sum(truth_table(f, [a, b, c, d]))
+    assert mgr.satcount(f.node) == 7
+    assert f.smoothing([a, b]).is_one()
+    assert f.smoothing(a) == b | (~c & d)
+    assert str(f.top) == "a"
+    assert {str(v) for v in f.support} == {"a", "b", "c", "d"}
+
+
+def test_002():
+    mgr = BDDManager()
+    x0, y0, x1, y1 = [mgr.add_var(name) for name in ["x0", "y0", "x1", "y1"]]
+
+    # Quan hệ: y0 = x1, y1 = x0 (hoán đổi hai bit)
+    rel = ~(y0 ^ x1) & ~(y1 ^ x0)
+    S = x0 & ~x1
+    cube = mgr.cube([x0.top.index, x1.top.index])
+    image = mgr.relprod(S.node, rel.node, cube)
+    assert image == mgr.exists((S & rel).node, cube)
+
+    renamed = mgr.rename(image, {y0.top.index: x0.top.index, y1.top.index: x1.top.index})
+    assert renamed == (~x0 & x1).node
+
+    # compose: thay x0 bằng (x1 | y1)
+    composed = (x0 & y0).compose({x0: x1 | y1})
+    assert composed == (x1 | y1) & y0
+    assert sorted(p[x0.top] for p in (x0 | x1).satisfy_all()) == [0, 1, 1]
+
+
+def test_003():
+    mgr = BDDManager(capacity=16)
+    xs = [mgr.add_var(f"x{i}") for i in range(4)]
+    ys = [mgr.add_var(f"y{i}") for i in range(4)]
+    f = xs[0] & ys[0]
+    for x, y in zip(xs[1:], ys[1:]):
+        f = f | (x & y)
+    g = xs[0] ^ ys[2]
+    variables = xs + ys
+    f_table, g_table = truth_table(f, variables), truth_table(g, variables)
+    assert f.node_count() == 32
+
+    mgr.sift([f.node, g.node])
+
+    # Thứ tự xen kẽ x_i, y_i là tối ưu cho hàm này; node id cũ vẫn biểu diễn đúng hàm cũ
+    assert f.node_count() == 10
+    assert truth_table(f, variables) == f_table
+    assert truth_table(g, variables) == g_table
+    assert truth_table(f & g, variables) == [a & b for a, b in zip(f_table, g_table)]
+    assert sorted(mgr.order()) == sorted(str(v.top) for v in variables)
+
+
+def test_004():
+    mgr = BDDManager()
+    a, b, c, d = [mgr.add_var(name) for name in "abcd"]
+    f = (a & b) | (~a & c & d)
+    care = (a & ~b) | (~a & d) | (b & c)
+
+    # Trên tập chăm sóc, restrict / constrain trùng với f
+    for g in (f.simplify(care), f.constrain(care)):
+        assert g & care == f & care
+    assert f.simplify(a) == b
+    assert f.constrain(~a) == c & d
+    assert f.simplify(f).is_one()
+    assert f.simplify(1) == f
+    # restrict không đưa thêm biến chỉ có trong tập chăm sóc
+    assert f.simplify(a & ~b | d).support <= f.support
+
+
+def check_unique_table(mgr):
+    """Mỗi node còn sống nằm đúng một lần trong unique table, không có hai node cùng khóa."""
+    live = [u for u in range(2, mgr.size) if mgr.var[u] != FREE]
+    slots = [u for u in mgr._slots.tolist() if u > 0]
+    assert sorted(slots) == live
+    keys = {(int(mgr.var[u]), int(mgr.lo[u]), int(mgr.hi[u])) for u in live}
+    assert len(keys) == len(live)
+    for u in live:
+        assert mgr.mk(int(mgr.var[u]), int(mgr.lo[u]), int(mgr.hi[u])) == u
+        for w in (mgr.lo[u], mgr.hi[u]):
+            assert mgr.var[w] != FREE and mgr.var[w] > mgr.var[u]
+    return live
+
+
+def test_005():
+    # capacity nhỏ để mảng node và unique table phải nới trong lúc sift
+    mgr = BDDManager(capacity=16)
+    xs = [mgr.add_var(f"x{i}") for i in range(5)]
+    ys = [mgr.add_var(f"y{i}") for i in range(5)]
+    f = xs[0] & ys[0]
+    for x, y in zip(xs[1:], ys[1:]):
+        f = f | (x & y)
+    garbage = (xs[0] ^ xs[1] ^ ys[3]) | (xs[2] & ~ys[4])
+    variables = xs + ys
+    f_table = truth_table(f, variables)
+
+    mgr.sift([f.node])
+    live = check_unique_table(mgr)
+    assert truth_table(f, variables) == f_table
+
+    # Node bị thu hồi được mk dùng lại thay vì cấp id mới
+    size = mgr.size
+    assert len(live) < size - 2
+    g = (xs[0] ^ ys[1]) & (xs[3] | ~ys[2])
+    assert mgr.size == size
+    check_unique_table(mgr)
+    assert truth_table(g & f, variables) == [a & b for a, b in zip(truth_table(g, variables), f_table)]
+
+
+def test_006():
+    mgr = BDDManager()
+    a, b = mgr.add_var("a"), mgr.add_var("b")
+    f = a & ~b
+    var, lo, hi = mgr.node_arrays()
+
+    # Node gốc của f: a ? (b ? 0 : 1) : 0
+    u = f.node
+    assert var[u] == a.top.index and lo[u] == 0
+    assert var[hi[u]] == b.top.index and (lo[hi[u]], hi[hi[u]]) == (1, 0)
+    with pytest.raises(TypeError):
+        var[u] = 0
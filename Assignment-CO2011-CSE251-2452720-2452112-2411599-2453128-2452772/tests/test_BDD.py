@@ -1,6 +1,14 @@
+import json
+import os
 import numpy as np
+import pytest
+from pathlib import Path
 from PetriNet import PetriNet
-from src.BDD import bdd_reachable
+from src.PetriNet import PetriNet as SrcPetriNet
+from src.BFS import bfs_reachable
+from src.DFS import dfs_reachable
+from src.ArrayBDD import BDDManager
+from src.BDD import bdd_minus, bdd_reachable, bdd_reachable_cached, load_reachable, node_count, save_reachable
 from pyeda.inter import *
 
 def test_001():
@@ -150,4 +158,280 @@ def test_007():
     )
 
     assert count == 6
-    assert bdd2expr(bdd).equivalent(expected_expr) 
\ No newline at end of file
+    assert bdd2expr(bdd).equivalent(expected_expr) 
+
+def test_008():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    base, base_count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0))
+
+    for strategy in ("chaining", "level-fixpoint"):
+        stats = {}
+        bdd, count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0), strategy=strategy, stats=stats)
+        assert count == base_count == 8
+        assert bdd.equivalent(base)
+        assert stats['iterations'] >= 1 and stats['peak_nodes'] >= stats['final_nodes']
+    # Chế độ gom theo tầng không còn được gọi là "saturation"
+    with pytest.raises(ValueError):
+        bdd_reachable(PetriNet(P, T, P, T, I, O, M0), strategy="saturation")
+
+
+def test_009():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5']
+    T = ['T1', 'T2', 'T3', 'T4']
+    I = np.array([
+        [1, 0, 0, 0, 0],
+        [0, 1, 0, 0, 0],
+        [0, 0, 0, 1, 1],
+        [0, 0, 1, 0, 0]
+    ])
+    O = np.array([
+        [0, 1, 1, 1, 0],
+        [1, 0, 0, 0, 0],
+        [1, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1]
+    ])
+    M0 = np.array([1, 0, 0, 0, 0])
+    base, base_count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0))
+
+    for threshold in (0, 10, 1000):
+        for strategy in ("bfs", "chaining"):
+            stats = {}
+            bdd, count = bdd_reachable(
+                PetriNet(P, T, P, T, I, O, M0), strategy=strategy, stats=stats, cluster_threshold=threshold
+            )
+            assert count == base_count == 6
+            assert bdd.equivalent(base)
+            assert sum(c['transitions'] for c in stats['clusters']) == 4
+
+
+def test_010():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 1, 0])
+    base, base_count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0))
+
+    for kwargs in ({}, {'strategy': 'chaining'}, {'strategy': 'level-fixpoint', 'cluster_threshold': 100}):
+        bdd, count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0), backend="array", **kwargs)
+        assert count == base_count == 6
+        markings = {tuple(point[v] for v in sorted(point, key=str)) for point in bdd.satisfy_all()}
+        expected = {tuple(point[v] for v in sorted(point, key=str)) for point in base.satisfy_all()}
+        assert markings == expected
+
+
+def test_011(tmp_path):
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    cache = str(tmp_path / "orders.json")
+    base, base_count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0), backend="array")
+
+    for kwargs in ({}, {'cluster_threshold': 100}):
+        stats = {}
+        bdd, count = bdd_reachable(
+            PetriNet(P, T, P, T, I, O, M0), backend="array", reorder=True, reorder_threshold=0,
+            order_cache=cache, stats=stats, **kwargs
+        )
+        assert count == base_count == 8
+        assert stats['reorderings'] >= 1
+        points = {tuple(sorted((str(v), val) for v, val in p.items())) for p in bdd.satisfy_all()}
+        expected = {tuple(sorted((str(v), val) for v, val in p.items())) for p in base.satisfy_all()}
+        assert points == expected
+
+    # Lần chạy sau dùng lại thứ tự đã lưu
+    with open(cache) as f:
+        saved = list(json.load(f).values())[0]
+    assert sorted(saved) == sorted(P)
+    bdd, count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0), backend="array", order_cache=cache)
+    assert count == 8
+    assert [str(v) for v in sorted(bdd.support)] == [p for p in saved if p in {str(v) for v in bdd.support}]
+
+
+def test_012():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+
+    # Frontier rút gọn chỉ thay đổi kích thước frontier, không thay đổi tập reachable
+    for backend in ("pyeda", "array"):
+        for strategy in ("bfs", "chaining"):
+            base, base_count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0), backend=backend, strategy=strategy)
+            stats = {}
+            bdd, count = bdd_reachable(
+                PetriNet(P, T, P, T, I, O, M0), backend=backend, strategy=strategy,
+                simplify_frontier=True, stats=stats
+            )
+            assert count == base_count == 8
+            points = {tuple(sorted((str(v), val) for v, val in p.items())) for p in bdd.satisfy_all()}
+            expected = {tuple(sorted((str(v), val) for v, val in p.items())) for p in base.satisfy_all()}
+            assert points == expected
+            assert stats['frontier_nodes'] > 0
+
+
+def test_013():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+
+    for backend in ("pyeda", "array"):
+        for kwargs in ({}, {'strategy': 'level-fixpoint', 'cluster_threshold': 100}):
+            history = []
+            stats = {}
+            bdd, count = bdd_reachable(
+                PetriNet(P, T, P, T, I, O, M0), backend=backend, on_iteration=history.append, stats=stats, **kwargs
+            )
+            # Mỗi vòng lặp được báo đúng một lần; tổng trạng thái mới + M0 = số marking reachable
+            assert [h.iteration for h in history] == list(range(1, stats['iterations'] + 1))
+            assert 1 + sum(h.new_states for h in history) == count == 8
+            assert history[-1].new_states == 0 and history[-1].frontier_nodes == 0
+            assert history[-1].reach_nodes == stats['final_nodes']
+            assert all(len(h.image_time) == len(history[0].image_time) for h in history)
+            assert all(h.unique_table_size > 0 for h in history)
+
+
+def test_014(tmp_path):
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    def points(bdd):
+        return {tuple(sorted((str(v), val) for v, val in p.items())) for p in bdd.satisfy_all()}
+
+    for backend in ("pyeda", "array"):
+        reach, count = bdd_reachable(pn, backend=backend)
+        path = str(tmp_path / f"{backend}.npz")
+        save_reachable(path, pn, reach, count)
+        loaded, loaded_count = load_reachable(path)
+        assert loaded_count == count == 8
+        assert points(loaded) == points(reach)
+        assert load_reachable(path, fingerprint="other net") is None
+    assert load_reachable(str(tmp_path / "missing.npz")) is None
+
+    # Lần gọi thứ hai đọc lại từ cache thay vì tính lại
+    cache = str(tmp_path / "cache")
+    first, n1 = bdd_reachable_cached(pn, cache, backend="array")
+    files = os.listdir(cache)
+    assert len(files) == 1 and files[0].endswith(".npz")
+    second, n2 = bdd_reachable_cached(pn, cache, backend="array")
+    assert n1 == n2 == 8
+    assert points(first) == points(second)
+
+
+def test_015():
+    # Producer / consumer có trọng số: prod thêm 2 token vào buf, cons lấy 1 token
+    P = ['idle', 'buf', 'done']
+    T = ['prod', 'cons']
+    I = np.array([[1, 0, 0],
+                [0, 1, 0]])
+    O = np.array([[1, 2, 0],
+                [0, 0, 1]])
+    M0 = np.array([1, 0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    for k in (2, 3, 5):
+        expected = bfs_reachable(pn, bound=k)
+        assert expected == dfs_reachable(pn, bound=k)
+        for backend in ("pyeda", "array"):
+            for strategy in ("bfs", "chaining", "level-fixpoint"):
+                bdd, count = bdd_reachable(pn, backend=backend, strategy=strategy, bound=k)
+                assert count == len(expected), (k, backend, strategy)
+    assert len(bfs_reachable(pn, bound=3)) == 8
+
+    with pytest.raises(ValueError):
+        bdd_reachable(PetriNet(P, T, P, T, I, O, np.array([1, 4, 0])), bound=3)
+    with pytest.raises(ValueError):
+        bdd_reachable(pn, bound=0)
+
+
+def test_016():
+    # Mạng vuông (4 place x 4 transition, PNML lưu P x T): phải cùng ngữ nghĩa với BFS
+    pn = SrcPetriNet.from_pnml(str(Path(__file__).parent.parent / "choice_merge.pnml"))
+
+    for k in (1, 2, 3):
+        expected = bfs_reachable(pn, bound=k)
+        for backend in ("pyeda", "array"):
+            bdd, count = bdd_reachable(pn, backend=backend, bound=k)
+            assert count == len(expected), (k, backend)
+            for m in expected:
+                # k = 1: một biến mỗi place; k > 1: biến "p[j]" là bit j của place p
+                if k == 1:
+                    keys = [(pid, None, v) for pid, v in zip(pn.place_ids, m)]
+                else:
+                    keys = [(pid, j, (v >> j) & 1) for pid, v in zip(pn.place_ids, m) for j in range(k.bit_length())]
+                if backend == "pyeda":
+                    point = {(bddvar(pid) if j is None else bddvar(pid, j)): v for pid, j, v in keys}
+                else:
+                    point = {(pid if j is None else f"{pid}[{j}]"): v for pid, j, v in keys}
+                assert bdd.restrict(point).is_one(), (k, backend, m)
+
+def test_017():
+    # Các hàm công khai dùng chung cho hai backend (Deadlock không cần chạm vào node PyEDA)
+    a, b = bddvar("minus_a"), bddvar("minus_b")
+    assert bdd_minus(a | b, b).equivalent(a & ~b)
+    assert node_count(a & b) == 4
+    mgr = BDDManager()
+    x, y = mgr.add_var("x"), mgr.add_var("y")
+    assert bdd_minus(x | y, y) == x & ~y
+    assert node_count(x & y) == 4
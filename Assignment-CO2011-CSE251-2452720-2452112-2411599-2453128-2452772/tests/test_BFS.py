@@ -1,6 +1,19 @@
+import os
+import time
 import numpy as np
+import pytest
 from src.PetriNet import PetriNet
 from src.BFS import bfs_reachable
+from src.Firing import unpack_markings
+import src.ParallelBFS as parallel
+
+_worker = parallel._worker
+
+def _failing_worker(wid, *args):
+    # Worker 1 chết giữa chừng (như bị kill / hết bộ nhớ); các worker khác kẹt ở vòng trao đổi đầu tiên
+    if wid == 1:
+        os._exit(3)
+    _worker(wid, *args)
 
 def test_001():
     P = ["p1", "p2", "p3"]
@@ -139,3 +152,151 @@ def test_005():
     }
 
     assert output == expected, f"Expected {expected}, but got {output}"
+
+def test_006():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 1, 0])
+
+    output = bfs_reachable(PetriNet(P, T, P, T, I, O, M0), packed=True)
+
+    assert all(isinstance(m, int) for m in output)
+    assert (1 << 0) | (1 << 5) in output
+
+    expected = {
+        (0, 0, 0, 0, 0, 1, 1),
+        (0, 0, 0, 0, 1, 0, 1),
+        (0, 0, 0, 1, 1, 1, 0),
+        (0, 0, 1, 0, 1, 1, 0),
+        (0, 1, 0, 0, 1, 1, 0),
+        (1, 0, 0, 0, 0, 1, 0),
+    }
+
+    assert unpack_markings(output, len(P)) == expected, f"Expected {expected}, but got {output}"
+
+def test_007():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    output = bfs_reachable(pn, layered=True)
+
+    expected = {
+        (0, 0, 0, 0, 0, 0, 1),
+        (0, 0, 0, 1, 0, 1, 0),
+        (0, 0, 0, 1, 1, 0, 0),
+        (0, 0, 1, 0, 0, 1, 0),
+        (0, 0, 1, 0, 1, 0, 0),
+        (0, 1, 0, 0, 0, 1, 0),
+        (0, 1, 0, 0, 1, 0, 0),
+        (1, 0, 0, 0, 0, 0, 0),
+    }
+
+    assert output == expected, f"Expected {expected}, but got {output}"
+    assert bfs_reachable(pn, layered=True, packed=True) == bfs_reachable(pn, packed=True)
+
+def test_008():
+    P = ["p1", "p2", "p3"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[1,0,0],
+                  [0,1,0],
+                  [0,0,1]])
+    O = np.array([[0,1,0],
+                  [0,0,1],
+                  [1,0,0]])
+    # M0 không 1-safe: chỉ M0 được giữ lại, mọi marking kế tiếp đều vượt 1 token
+    M0 = np.array([2,1,1])
+
+    output = bfs_reachable(PetriNet(P, T, P, T, I, O, M0), layered=True)
+
+    assert output == bfs_reachable(PetriNet(P, T, P, T, I, O, M0))
+    assert (2, 1, 1) in output
+
+def test_009():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    output = bfs_reachable(pn, workers=3)
+
+    assert output == bfs_reachable(pn), f"Expected {bfs_reachable(pn)}, but got {output}"
+
+def test_010():
+    P = ["p1", "p2"]
+    T = ["t1", "t2", "t3"]
+    # t1 sinh token vào p1, t2 chuyển p1 -> p2, t3 tiêu thụ 2 token ở p2
+    I = np.array([[0,0],
+                  [1,0],
+                  [0,2]])
+    O = np.array([[1,0],
+                  [0,1],
+                  [0,0]])
+    M0 = np.array([0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    output = bfs_reachable(pn, bound=2)
+
+    assert output == {(a, b) for a in range(3) for b in range(3)}
+    assert bfs_reachable(pn) == {(0, 0), (1, 0), (0, 1), (1, 1)}
+
+def test_011():
+    P = ["p1", "p2"]
+    T = ["t1"]
+    I = np.array([[1, 0]])
+    O = np.array([[0, 1]])
+    # M0 có place 2 token: BFS song song không được âm thầm chạy tuần tự
+    pn = PetriNet(P, T, P, T, I, O, np.array([2, 0]))
+
+    with pytest.raises(ValueError):
+        bfs_reachable(pn, workers=2)
+    assert bfs_reachable(pn) == {(2, 0), (1, 1)}
+
+def test_012(monkeypatch):
+    P = ["p1", "p2", "p3"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[1,0,0],
+                  [0,1,0],
+                  [0,0,1]])
+    O = np.array([[0,1,0],
+                  [0,0,1],
+                  [1,0,0]])
+    pn = PetriNet(P, T, P, T, I, O, np.array([1, 0, 0]))
+    monkeypatch.setattr(parallel, "_worker", _failing_worker)
+
+    # Worker chết -> RuntimeError thay vì treo mãi ở results.get / barrier
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        bfs_reachable(pn, workers=3)
+    assert time.perf_counter() - start < 30
@@ -0,0 +1,75 @@
+import itertools
+import pytest
+import numpy as np
+from pathlib import Path
+from PetriNet import PetriNet
+from src.ArrayBDD import BDDManager
+from src.BDD import bdd_reachable
+from src.BFS import bfs_reachable
+from src.Counting import SatCounter, count_states
+
+def test_001():
+    mgr = BDDManager()
+    a, b, c, d, e = [mgr.add_var(name) for name in "abcde"]
+    f = (a & ~c) | (b & e)
+    rows = [bits for bits in itertools.product([0, 1], repeat=5)
+            if f.restrict(dict(zip([a, b, c, d, e], bits))).is_one()]
+
+    counter = SatCounter(f, "abcde")
+    assert counter.count() == len(rows) == 14
+    for k, name in enumerate("abcde"):
+        assert counter.count_where(name) == sum(r[k] for r in rows)
+        assert counter.count_where(name, 0) == sum(1 - r[k] for r in rows)
+    assert counter.marginals()["d"] == 7
+    assert counter.count_point({"a": 1, "d": 0}) == sum(1 for r in rows if r[0] == 1 and r[3] == 0)
+
+    # Số lớn hơn 64 bit: hằng TRUE trên 100 biến
+    names = [f"x{i}" for i in range(100)]
+    for name in names:
+        mgr.add_var(name)
+    assert count_states(mgr.add_var("x0") | ~mgr.add_var("x0"), names) == 1 << 100
+
+def test_002():
+    # c bật / tắt độc lập với a, b nên không nằm trong support của Reach
+    P = ["a", "b", "c"]
+    T = ["t1", "t2", "t3", "t4"]
+    I = np.array([[1, 0, 0],
+                  [0, 1, 0],
+                  [0, 0, 1],
+                  [0, 0, 0]])
+    O = np.array([[0, 1, 0],
+                  [1, 0, 0],
+                  [0, 0, 0],
+                  [0, 0, 1]])
+    M0 = np.array([1, 0, 0])
+    for backend in ("pyeda", "array"):
+        bdd, count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0), backend=backend)
+        assert count == 4
+        assert SatCounter(bdd, P).count_where("c") == 2
+
+def test_003():
+    pn = PetriNet.from_pnml(str(Path(__file__).parent.parent / "philosophers_N5.pnml"))
+    markings = bfs_reachable(pn)
+    bdd, count = bdd_reachable(pn, backend="array")
+
+    counter = SatCounter(bdd, pn.place_ids)
+    assert counter.count() == count == len(markings)
+    for k, pid in enumerate(pn.place_ids):
+        assert counter.count_where(pid) == sum(1 for m in markings if m[k])
+
+def test_004():
+    from pyeda.boolalg.boolfunc import VARIABLES
+
+    P = ["a", "b", "c"]
+    T = ["t1", "t2", "t3", "t4"]
+    I = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [0, 0, 0]])
+    O = np.array([[0, 1, 0], [1, 0, 0], [0, 0, 0], [0, 0, 1]])
+    M0 = np.array([1, 0, 0])
+    for backend in ("pyeda", "array"):
+        bdd, count = bdd_reachable(PetriNet(P, T, P, T, I, O, M0), backend=backend)
+        # Tên không có trong BDD bị từ chối, không tạo biến mới
+        before = len(VARIABLES)
+        with pytest.raises(ValueError):
+            SatCounter(bdd, P + ["no_such_place_xyz"])
+        assert len(VARIABLES) == before
+        assert ((("no_such_place_xyz",), ())) not in VARIABLES
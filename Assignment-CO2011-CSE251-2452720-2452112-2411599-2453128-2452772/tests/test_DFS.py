@@ -1,6 +1,8 @@
 import numpy as np
+from pathlib import Path
 from src.PetriNet import PetriNet
 from src.DFS import dfs_reachable
+from src.Firing import get_firing_table, unpack_markings
 
 def test_001():
     P = ["p1", "p2", "p3"]
@@ -139,3 +141,79 @@ def test_005():
     }
 
     assert output == expected, f"Expected {expected}, but got {output}"
+
+def test_006():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 1, 0])
+
+    output = dfs_reachable(PetriNet(P, T, P, T, I, O, M0), packed=True)
+
+    assert all(isinstance(m, int) for m in output)
+    assert (1 << 0) | (1 << 5) in output
+
+    expected = {
+        (0, 0, 0, 0, 0, 1, 1),
+        (0, 0, 0, 0, 1, 0, 1),
+        (0, 0, 0, 1, 1, 1, 0),
+        (0, 0, 1, 0, 1, 1, 0),
+        (0, 1, 0, 0, 1, 1, 0),
+        (1, 0, 0, 0, 0, 1, 0),
+    }
+
+    assert unpack_markings(output, len(P)) == expected, f"Expected {expected}, but got {output}"
+
+def _dead_markings(pn, markings):
+    table = get_firing_table(pn)
+    return {m for m in markings
+            if all(table.fire(m, t) is None for t in range(table.num_transitions))}
+
+def test_007():
+    base_dir = Path(__file__).parent.parent
+    files = ["testcase1.pnml", "testcase2.pnml", "testcase3.pnml", "testcase4.pnml",
+             "testcase6.pnml", "deadlock.pnml", "choice_merge.pnml", "philosophers_N5.pnml"]
+
+    for name in files:
+        pn = PetriNet.from_pnml(str(base_dir / name))
+        full = dfs_reachable(pn)
+        reduced = dfs_reachable(pn, stubborn=True)
+
+        assert reduced <= full, name
+        assert _dead_markings(pn, reduced) == _dead_markings(pn, full), name
+
+def test_008():
+    base_dir = Path(__file__).parent.parent
+    pn = PetriNet.from_pnml(str(base_dir / "testcase2.pnml"))
+    visible = [0, 3]
+
+    full = dfs_reachable(pn)
+    reduced = dfs_reachable(pn, stubborn=True, visible=visible)
+
+    # Mọi tổ hợp giá trị của các place visible vẫn được giữ nguyên
+    project = lambda ms: {tuple(m[i] for i in visible) for m in ms}
+    assert project(reduced) == project(full)
+
+def test_009():
+    P = ["p1", "p2"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[0,0],
+                  [1,0],
+                  [0,2]])
+    O = np.array([[1,0],
+                  [0,1],
+                  [0,0]])
+    M0 = np.array([0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    assert dfs_reachable(pn, bound=2) == {(a, b) for a in range(3) for b in range(3)}
+    assert dfs_reachable(pn, bound=3) == {(a, b) for a in range(4) for b in range(4)}
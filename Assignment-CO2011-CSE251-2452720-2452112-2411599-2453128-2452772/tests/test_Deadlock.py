@@ -1,6 +1,12 @@
 import numpy as np
-from src.Deadlock import deadlock_reachable_marking
+import pytest
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from src.Deadlock import DeadlockSet, deadlock_reachable_marking, is_free_choice, minimal_siphons, structural_deadlock_check
 from src.PetriNet import PetriNet
+from src.BDD import bdd_reachable
+from src.BFS import bfs_reachable
+from src.ReachGraph import build_reachability_graph
 from pyeda.inter import *
 
 def test_001():
@@ -36,7 +42,8 @@ def test_002():
                   [0,0,1],
                   [1,0,0]])
     M0 = np.array([1,0,0])
-    pn = PetriNet(P, T, P, T, I, O, M0)
+    # Ma trận vuông được hiểu là P x T (như BFS/DFS): các dòng trên viết theo transition nên chuyển vị
+    pn = PetriNet(P, T, P, T, I.T, O.T, M0)
 
     p1, p2, p3 = exprvar('p1'), exprvar('p2'), exprvar('p3')
     expected_expr = Or(And(~p1, ~p2, p3),
@@ -136,3 +143,251 @@ def test_006():
     assert marking == [1, 1]
 
 
+
+def test_007():
+    # Mỗi nghiệm ILP giả (marking chết nhưng không reachable) chỉ bị loại bởi một cut;
+    # chế độ bdd trả lời chính xác trong một lượt trên cả hai backend
+    base_dir = Path(__file__).parent.parent
+    for name, has_deadlock in (("philosophers_N5.pnml", False), ("testcase2.pnml", True)):
+        pn = PetriNet.from_pnml(str(base_dir / name))
+        reachable = bfs_reachable(pn)
+        for backend in ("pyeda", "array"):
+            bdd, count = bdd_reachable(pn, backend=backend)
+            marking = deadlock_reachable_marking(pn, bdd, method="bdd")
+            assert (marking is not None) == has_deadlock, (name, backend)
+            if marking is not None:
+                assert tuple(marking) in reachable
+                assert marking == deadlock_reachable_marking(pn, bdd)
+
+def test_008():
+    P = ["p1", "p2"]
+    T = ["t1"]
+    I = np.array([[1, 0]])
+    O = np.array([[1, 1]])
+    M0 = np.array([1,0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    bdd = expr2bdd(exprvar('p1'))
+
+    assert deadlock_reachable_marking(pn, bdd, method="bdd") == [1, 1]
+    assert deadlock_reachable_marking(pn, bdd, method="ilp") == [1, 1]
+    # Giới hạn node quá nhỏ: chế độ auto chuyển sang ILP và vẫn cho cùng kết quả
+    assert deadlock_reachable_marking(pn, bdd, bdd_node_limit=0) == [1, 1]
+    with pytest.raises(ValueError):
+        deadlock_reachable_marking(pn, None, method="bdd")
+    with pytest.raises(ValueError):
+        deadlock_reachable_marking(pn, bdd, method="smt")
+
+def test_009():
+    base_dir = Path(__file__).parent.parent
+    pn = PetriNet.from_pnml(str(base_dir / "deadlock.pnml"))
+    bdd, count = bdd_reachable(pn)
+
+    solvers = ["cbc"]
+    try:
+        import highspy
+        solvers.append("highs")
+    except ImportError:
+        pass
+    for solver in solvers:
+        stats = {}
+        marking = deadlock_reachable_marking(pn, bdd, method="ilp", solver=solver, stats=stats)
+        # Mỗi lần lặp gọi solver đúng một lần trên cùng một model
+        assert stats['solver'] == solver
+        assert len(stats['solve_times']) == stats['attempts'] >= 1
+        assert marking is not None
+        assert tuple(marking) in bfs_reachable(pn)
+    with pytest.raises(ValueError):
+        deadlock_reachable_marking(pn, bdd, method="ilp", solver="gurobi")
+
+def test_010():
+    base_dir = Path(__file__).parent.parent
+    pn = PetriNet.from_pnml(str(base_dir / "philosophers_N5.pnml"))
+
+    # Phương trình trạng thái loại mọi marking chết ngay lần giải đầu, không cần BDD
+    stats = {}
+    assert deadlock_reachable_marking(pn, None, method="ilp", stats=stats) is None
+    assert stats['attempts'] == 1
+
+    # t1 là self-loop trên p2 (luôn bắn được): không có deadlock, nhưng ILP chỉ có ràng buộc
+    # "mọi transition bị chặn" vẫn trả về marking chết [1, 0, 1] không reachable
+    P = ["p1", "p2", "p3"]
+    T = ["t1"]
+    I = np.array([[0, 1, 0]])
+    O = np.array([[0, 1, 0]])
+    pn = PetriNet(P, T, P, T, I, O, np.array([0, 1, 0]))
+    assert deadlock_reachable_marking(pn, None, method="ilp", strengthen=False) is not None
+    assert deadlock_reachable_marking(pn, None, method="ilp") is None
+
+    # M0 chết ngay từ đầu; {p1, p3} là trap có token nên mọi nghiệm để trống nó bị cắt
+    I = np.array([[1, 0, 1]])
+    O = np.array([[1, 1, 0]])
+    pn = PetriNet(P, T, P, T, I, O, np.array([0, 0, 1]))
+    assert deadlock_reachable_marking(pn, None, method="ilp") == [0, 0, 1]
+
+def test_011():
+    base_dir = Path(__file__).parent.parent
+
+    # Triết gia: mọi siphon tối tiểu chứa trap có token -> không có deadlock (khớp với BDD)
+    pn = PetriNet.from_pnml(str(base_dir / "philosophers_N5.pnml"))
+    result = structural_deadlock_check(pn)
+    assert result['complete'] and result['safe']
+    assert len(result['siphons']) == 10 and not result['bad_siphons']
+    assert result['commoner'] and result['deadlock_free']
+    bdd, count = bdd_reachable(pn)
+    assert deadlock_reachable_marking(pn, bdd, method="bdd") is None
+
+    # Chuỗi tuyến tính free-choice: siphon {p1} không chứa trap có token -> không live
+    pn = PetriNet.from_pnml(str(base_dir / "testcase1.pnml"))
+    result = structural_deadlock_check(pn)
+    assert result['free_choice'] and result['safe']
+    assert result['commoner'] is False and result['live'] is False
+    assert result['deadlock_free'] is None
+
+def test_012():
+    # Mọi siphon tìm được thỏa •S ⊆ S• và là tối tiểu
+    P = ["p1", "p2", "p3", "p4"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[1, 0, 0, 0],
+                  [0, 1, 1, 0],
+                  [0, 0, 0, 1]])
+    O = np.array([[0, 1, 0, 0],
+                  [0, 0, 0, 1],
+                  [1, 0, 1, 0]])
+    pn = PetriNet(P, T, P, T, I, O, np.array([1, 0, 1, 0]))
+
+    siphons, complete = minimal_siphons(pn)
+    assert complete and siphons
+    for S in siphons:
+        for t in range(len(T)):
+            if any(O[t][p] for p in S):
+                assert any(I[t][p] for p in S)
+    sets = [set(S) for S in siphons]
+    assert not any(a < b for a in sets for b in sets)
+    assert sorted(map(sorted, sets)) == [[0, 1, 3], [2, 3]]
+
+    # t2 và t3 cùng lấy từ p3 nhưng tập place vào khác nhau -> không free-choice
+    assert is_free_choice(pn)
+    I[2] = [0, 0, 1, 1]
+    assert not is_free_choice(PetriNet(P, T, P, T, I, O, np.array([1, 0, 1, 0])))
+
+def _choice_net(n):
+    # n tiến trình độc lập, mỗi tiến trình chọn một trong hai nhánh rồi dừng: 2^n deadlock
+    P, T = [], []
+    for i in range(n):
+        P += [f"p{i}", f"a{i}", f"b{i}"]
+        T += [f"ta{i}", f"tb{i}"]
+    I = np.zeros((2 * n, 3 * n), dtype=int)
+    O = np.zeros((2 * n, 3 * n), dtype=int)
+    for i in range(n):
+        I[2 * i][3 * i] = I[2 * i + 1][3 * i] = 1
+        O[2 * i][3 * i + 1] = 1
+        O[2 * i + 1][3 * i + 2] = 1
+    return PetriNet(P, T, P, T, I, O, np.array([1, 0, 0] * n))
+
+def test_013():
+    pn = _choice_net(4)
+    for backend in ("pyeda", "array"):
+        bdd, count = bdd_reachable(pn, backend=backend)
+        deadlocks = DeadlockSet(pn, bdd)
+
+        markings = set(deadlocks)
+        assert deadlocks.count() == len(markings) == 16
+        assert markings <= bfs_reachable(pn)
+        # Trong mỗi deadlock mọi tiến trình đã chọn đúng một nhánh
+        for m in markings:
+            assert all(m[3 * i] == 0 and m[3 * i + 1] + m[3 * i + 2] == 1 for i in range(4))
+        points = 0
+        for cube in deadlocks.cubes():
+            points += 2 ** (len(pn.place_ids) - len(cube))
+        assert points == 16
+
+        # Chi phí = số token ở các nhánh b: top 3 theo thứ tự tăng dần, khớp với xếp hạng vét cạn
+        weights = [1 if pid.startswith("b") else 0 for pid in pn.place_ids]
+        cost = lambda m: sum(w * v for w, v in zip(weights, m))
+        ranked = sorted(cost(m) for m in markings)
+        top = deadlocks.top_k(3, weights)
+        assert [c for c, m in top] == ranked[:3] == [0, 1, 1]
+        assert all(cost(m) == c and m in markings for c, m in top)
+        assert [c for c, m in deadlocks.top_k(2, weights, maximize=True)] == [4, 3]
+        assert [c for c, m in deadlocks.top_k(2, key=cost)] == [0, 1]
+
+def test_014():
+    base_dir = Path(__file__).parent.parent
+    pn = PetriNet.from_pnml(str(base_dir / "philosophers_N5.pnml"))
+    bdd, count = bdd_reachable(pn, backend="array")
+
+    deadlocks = DeadlockSet(pn, bdd)
+    assert deadlocks.is_empty() and deadlocks.count() == 0
+    assert list(deadlocks) == [] and deadlocks.top_k(5, [1] * len(pn.place_ids)) == []
+    with pytest.raises(ValueError):
+        deadlocks.top_k(5)
+
+
+def test_015():
+    # Số deadlock của Reach ∧ Dead khớp với số trạng thái chết của đồ thị reachability tường minh,
+    # trên mọi mạng mẫu đọc được (kể cả mạng vuông như choice_merge.pnml). Bỏ qua các mạng quá lớn
+    # để duyệt tường minh trong unit test (testcase5: ~5.5e5, testcase8: ~1.9e6 trạng thái)
+    base_dir = Path(__file__).parent.parent
+    checked = 0
+    for path in sorted(base_dir.glob("*.pnml")):
+        try:
+            pn = PetriNet.from_pnml(str(path))
+        except ET.ParseError:
+            continue
+        bdd, count = bdd_reachable(pn, backend="array")
+        if count > 20000:
+            continue
+        graph = build_reachability_graph(pn)
+        dead = {tuple(int(v) for v in graph.markings[i]) for i in graph.dead_states()}
+
+        deadlocks = DeadlockSet(pn, bdd)
+        assert deadlocks.count() == len(dead), path.name
+        assert set(deadlocks) == dead, path.name
+        marking = deadlock_reachable_marking(pn, bdd, method="bdd")
+        assert (marking is None) == (not dead) and (marking is None or tuple(marking) in dead), path.name
+        checked += 1
+    assert checked >= 12
+
+def test_016():
+    base_dir = Path(__file__).parent.parent
+
+    # Mạng vuông: {start} là siphon có token ban đầu nhưng không chứa trap nào -> vi phạm Commoner
+    pn = PetriNet.from_pnml(str(base_dir / "choice_merge.pnml"))
+    result = structural_deadlock_check(pn)
+    assert result['siphons'] == [["start"]] and result['bad_siphons'] == [["start"]]
+    assert result['safe'] and result['ordinary'] and result['free_choice']
+    assert result['commoner'] is False and result['live'] is False and result['deadlock_free'] is None
+
+    # Vòng p1 <-> p2 với cung trọng số 1: Commoner thỏa -> không có deadlock
+    P = ["p1", "p2"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[1, 0], [0, 1], [0, 1]])
+    O = np.array([[0, 1], [1, 0], [1, 0]])
+    pn = PetriNet(P, T, P, T, I, O, np.array([1, 0]))
+    assert structural_deadlock_check(pn)['deadlock_free'] is True
+
+    # Cùng cấu trúc nhưng cung trọng số 2: Commoner vẫn thỏa, nhưng M0 đã chết (t1 cần 2 token)
+    pn = PetriNet(P, T, P, T, 2 * I, 2 * O, np.array([1, 0]))
+    result = structural_deadlock_check(pn)
+    assert result['commoner'] and result['safe'] and not result['ordinary']
+    assert result['deadlock_free'] is None
+    assert build_reachability_graph(pn).dead_states().tolist() == [0]
+
+def test_017():
+    pytest.importorskip("highspy")
+    base_dir = Path(__file__).parent.parent
+    pn = PetriNet.from_pnml(str(base_dir / "deadlock.pnml"))
+    bdd, count = bdd_reachable(pn)
+
+    # "auto" giữ model trong tiến trình HiGHS, cho cùng kết quả với CBC
+    stats = {}
+    marking = deadlock_reachable_marking(pn, bdd, method="ilp", solver="auto", stats=stats)
+    assert stats['solver'] == "highs"
+    assert len(stats['solve_times']) == stats['attempts'] >= 1
+    assert marking == deadlock_reachable_marking(pn, bdd, method="ilp", solver="cbc")
+
+    pn = PetriNet.from_pnml(str(base_dir / "philosophers_N5.pnml"))
+    stats = {}
+    assert deadlock_reachable_marking(pn, None, method="ilp", stats=stats) is None
+    assert stats['solver'] == "highs"
@@ -0,0 +1,84 @@
+import os
+import numpy as np
+from src.PetriNet import PetriNet
+from src.BFS import bfs_reachable
+from src.ExternalBFS import bfs_reachable_external
+
+def test_001():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    count, markings = bfs_reachable_external(pn, memory_budget=1)
+
+    assert count == 8
+    assert set(markings) == bfs_reachable(pn)
+
+    directory = markings.directory
+    markings.close()
+    assert not os.path.exists(directory)
+
+def test_002(tmp_path):
+    P = ["p1", "p2", "p3"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[1,0,0],
+                  [0,1,0],
+                  [0,0,1]])
+    O = np.array([[0,1,0],
+                  [0,0,1],
+                  [1,0,0]])
+    M0 = np.array([1,0,1])
+
+    count, markings = bfs_reachable_external(PetriNet(P, T, P, T, I, O, M0), workdir=str(tmp_path))
+
+    with markings:
+        assert count == 3
+        assert sorted(markings.iter_packed()) == [0b011, 0b101, 0b110]
+
+def test_003(monkeypatch):
+    import src.ExternalBFS as external
+
+    # 12 cặp place độc lập a_i <-> b_i: 4096 marking, mỗi tầng sinh nhiều run cần trộn nhiều lượt
+    k = 12
+    P = [f"a{i}" for i in range(k)] + [f"b{i}" for i in range(k)]
+    T = [f"t{i}" for i in range(2 * k)]
+    I = np.zeros((2 * k, 2 * k), dtype=int)
+    O = np.zeros((2 * k, 2 * k), dtype=int)
+    for i in range(k):
+        I[i, i] = O[i, k + i] = 1
+        I[k + i, k + i] = O[k + i, i] = 1
+    M0 = np.array([1] * k + [0] * k)
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    # Đếm số file đang được đọc đồng thời
+    read_keys = external._read_keys
+    live = [0, 0]
+    def counting_read_keys(*args):
+        live[0] += 1
+        live[1] = max(live[1], live[0])
+        try:
+            yield from read_keys(*args)
+        finally:
+            live[0] -= 1
+    monkeypatch.setattr(external, "_read_keys", counting_read_keys)
+
+    count, markings = bfs_reachable_external(pn, memory_budget=1)
+    with markings:
+        assert count == 2 ** k
+        assert sorted(markings.iter_packed()) == list(markings.iter_packed())
+        assert set(markings) == bfs_reachable(pn)
+        # Chỉ còn lại file visited
+        assert os.listdir(markings.directory) == [os.path.basename(markings.path)]
+    # fan-in 2 + file visited, không phụ thuộc độ sâu BFS
+    assert live[1] <= 3
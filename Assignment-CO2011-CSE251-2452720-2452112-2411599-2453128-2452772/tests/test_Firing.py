@@ -0,0 +1,50 @@
+import numpy as np
+from src.PetriNet import PetriNet
+from src.Firing import get_firing_table
+
+def test_001():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    table = get_firing_table(PetriNet(P, T, P, T, I, O, M0))
+
+    # Ma trận dạng T x P được xoay về P x T
+    assert table.num_places == 7
+    assert table.num_transitions == 5
+    assert table.pre[1] == [(3, 1), (5, 1)]
+    assert table.delta[0] == [(0, -1), (1, 1), (4, 1)]
+
+    assert table.fire((1, 0, 0, 0, 0, 0, 0), 0) == (0, 1, 0, 0, 1, 0, 0)
+    assert table.fire((1, 0, 0, 0, 0, 0, 0), 1) is None
+    # Vi phạm 1-safe: P2 đã có token
+    assert table.fire((1, 1, 0, 0, 0, 0, 0), 0) is None
+
+def test_002():
+    P = ["p1", "p2", "p3"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[1,0,0],
+                  [0,1,0],
+                  [0,0,1]])
+    O = np.array([[0,1,0],
+                  [0,0,1],
+                  [1,0,0]])
+    pn = PetriNet(P, T, P, T, I, O, np.array([1,0,0]))
+
+    # Bảng bắn được cache trên pn và chỉ biên dịch lại khi ma trận bị thay thế
+    table = get_firing_table(pn)
+    assert get_firing_table(pn) is table
+
+    pn.O = np.array([[0,0,1],
+                     [1,0,0],
+                     [0,1,0]])
+    assert get_firing_table(pn) is not table
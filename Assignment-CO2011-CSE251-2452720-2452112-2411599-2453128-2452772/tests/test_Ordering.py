@@ -0,0 +1,50 @@
+import pytest
+from pathlib import Path
+from src.PetriNet import PetriNet
+from src.BDD import bdd_reachable, reorder_places_bfs
+from src.Ordering import ORDERINGS, compute_order, p_semiflows
+
+def _load(name):
+    return PetriNet.from_pnml(str(Path(__file__).parent.parent / name))
+
+def test_001():
+    pn = _load("philosophers_N5.pnml")
+
+    for name in ORDERINGS:
+        order = compute_order(pn, name)
+        assert sorted(order) == sorted(pn.place_ids), name
+    assert compute_order(pn, "original") == list(pn.place_ids)
+    assert compute_order(pn, "bfs") == reorder_places_bfs(pn)
+    with pytest.raises(ValueError):
+        compute_order(pn, "random")
+
+def test_002():
+    pn = _load("philosophers_N5.pnml")
+
+    # Mỗi semiflow thỏa y^T C = 0 và có hệ số không âm (ma trận của PetriNet là P x T)
+    flows = p_semiflows(pn)
+    assert flows
+    for y in flows:
+        assert min(y) >= 0 and max(y) > 0
+        for t in range(len(pn.trans_ids)):
+            delta = sum(y[p] * (int(pn.O[p][t]) - int(pn.I[p][t])) for p in range(len(pn.place_ids)))
+            assert delta == 0
+
+def test_003():
+    pn = _load("philosophers_N5.pnml")
+
+    counts = set()
+    for name in ORDERINGS:
+        bdd, count = bdd_reachable(pn, backend="array", order=name)
+        counts.add(count)
+    assert counts == {11}
+    with pytest.raises(ValueError):
+        bdd_reachable(pn, order="random")
+
+def test_004():
+    # Mạng vuông (4 place x 4 transition): ma trận PNML là P x T, không được đọc thành T x P
+    pn = _load("choice_merge.pnml")
+
+    assert p_semiflows(pn) == [[1, 1, 1, 1]]
+    assert compute_order(pn, "bfs") == ["start", "mid_a", "mid_b", "end"]
+    assert compute_order(pn, "p-invariant") == ["start", "mid_a", "mid_b", "end"]
@@ -0,0 +1,60 @@
+import numpy as np
+from src.PetriNet import PetriNet
+from src.BFS import bfs_reachable
+from src.ReachGraph import ReachabilityGraph, build_reachability_graph
+
+def test_001():
+    P = ["p1", "p2", "p3"]
+    T = ["t1", "t2", "t3"]
+    I = np.array([[1,0,0],
+                  [0,1,0],
+                  [0,0,1]])
+    O = np.array([[0,1,0],
+                  [0,0,1],
+                  [1,0,0]])
+    M0 = np.array([1,0,0])
+
+    graph = build_reachability_graph(PetriNet(P, T, P, T, I, O, M0))
+
+    assert graph.num_states == 3
+    assert graph.num_edges == 3
+    assert graph.marking(0) == (1, 0, 0)
+    assert list(graph.indptr) == [0, 1, 2, 3]
+
+    # Ma trận vuông được hiểu là P x T: chu trình p1 -> p3 -> p2 -> p1
+    targets, trans = graph.successors(0)
+    assert graph.marking(targets[0]) == (0, 0, 1)
+    assert trans.tolist() == [0]
+    assert graph.successors(graph.index_of((0, 1, 0)))[0].tolist() == [0]
+    assert len(graph.dead_states()) == 0
+
+def test_002(tmp_path):
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    pn = PetriNet(P, T, P, T, I, O, M0)
+
+    graph = build_reachability_graph(pn)
+    path = str(tmp_path / "graph.npz")
+    graph.save(path)
+    loaded = ReachabilityGraph.load(path)
+
+    assert {loaded.marking(i) for i in range(loaded.num_states)} == bfs_reachable(pn)
+    assert np.array_equal(loaded.indptr, graph.indptr)
+    assert np.array_equal(loaded.indices, graph.indices)
+    assert np.array_equal(loaded.transition_id, graph.transition_id)
+    assert loaded.place_ids == P
+
+    # Deadlock duy nhất: P7 có token
+    dead = loaded.dead_states()
+    assert [loaded.marking(i) for i in dead] == [(0, 0, 0, 0, 0, 0, 1)]
@@ -0,0 +1,46 @@
+import itertools
+import numpy as np
+from src.PetriNet import PetriNet
+from src.BFS import bfs_reachable
+from src.DFS import dfs_reachable
+from src.Stream import iter_reachable
+
+def _net():
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    M0 = np.array([1, 0, 0, 0, 0, 0, 0])
+    return PetriNet(P, T, P, T, I, O, M0)
+
+def test_001():
+    pn = _net()
+
+    bfs_list = list(iter_reachable(pn, order="bfs"))
+    dfs_list = list(iter_reachable(pn, order="dfs"))
+
+    assert bfs_list[0] == (1, 0, 0, 0, 0, 0, 0)
+    assert len(bfs_list) == len(set(bfs_list)) == 8
+    assert set(bfs_list) == bfs_reachable(pn)
+    assert set(dfs_list) == dfs_reachable(pn)
+
+def test_002():
+    pn = _net()
+
+    # Dừng ngay tại marking đầu tiên có token ở P3
+    output = list(iter_reachable(pn, until=lambda m: m[2] == 1))
+
+    assert output[-1][2] == 1
+    assert all(m[2] == 0 for m in output[:-1])
+    assert len(output) < 8
+
+    # Dừng sớm bằng islice
+    assert len(list(itertools.islice(iter_reachable(pn, order="dfs"), 3))) == 3
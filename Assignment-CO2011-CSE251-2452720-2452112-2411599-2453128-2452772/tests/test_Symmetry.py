@@ -0,0 +1,46 @@
+import pytest
+from pathlib import Path
+from src.PetriNet import PetriNet
+from src.BFS import bfs_reachable
+from src.Symmetry import find_automorphisms, symmetric_reachable
+
+def _philosophers(n):
+    return PetriNet.from_pnml(str(Path(__file__).parent.parent / f"philosophers_N{n}.pnml"))
+
+def test_001():
+    pn = _philosophers(5)
+
+    group = find_automorphisms(pn)
+    reps, expanded = symmetric_reachable(pn)
+
+    # Nhóm nhị diện của vòng 5 triết gia
+    assert len(group) == 10
+    assert group[0] == tuple(range(15))
+    assert expanded == len(bfs_reachable(pn)) == 11
+    assert len(reps) == 3
+
+def test_002():
+    pn = _philosophers(5)
+
+    # Phép quay: triết gia i -> i + 1 (mỗi triết gia gồm 3 place think/eat/fork)
+    rotation = [(p + 3) % 15 for p in range(15)]
+    reps, expanded = symmetric_reachable(pn, generators=[rotation])
+
+    assert expanded == 11
+    assert len(reps) < expanded
+
+    # Hoán vị không phải automorphism bị từ chối
+    swap = list(range(15))
+    swap[0], swap[1] = swap[1], swap[0]
+    with pytest.raises(ValueError):
+        symmetric_reachable(pn, generators=[swap])
+
+def test_003():
+    pn = _philosophers(5)
+
+    # Nhóm có 10 phần tử: vượt limit thì báo lỗi thay vì trả về một phần của nhóm
+    with pytest.raises(ValueError):
+        find_automorphisms(pn, limit=5)
+    with pytest.raises(ValueError):
+        symmetric_reachable(pn, limit=5)
+    assert len(find_automorphisms(pn, limit=10)) == 10
@@ -0,0 +1,40 @@
+import numpy as np
+from src.PetriNet import PetriNet
+from src.Witness import replay_firing_sequence, shortest_firing_sequence
+
+def _net(M0):
+    P = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7']
+    T = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'T8']
+    I = np.array([[1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 1, 0],
+                [0, 1, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 1, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0, 1],
+                [0, 0, 1, 0, 0, 0, 0],
+                [0, 0, 0, 1, 0, 0, 0],
+                [0, 0, 0, 0, 0, 1, 0]])
+    return PetriNet(P, T, P, T, I, O, np.array(M0))
+
+def test_001():
+    pn = _net([1, 0, 0, 0, 0, 0, 0])
+    target = (0, 0, 0, 0, 0, 0, 1)
+
+    path = shortest_firing_sequence(pn, target)
+
+    # T1 -> T3 -> T4 -> T5 -> T2 (T3, T4 và T5 có thể xen kẽ)
+    assert len(path) == 5
+    assert path[0] == 0 and path[-1] == 1
+    assert replay_firing_sequence(pn, path) == target
+
+def test_002():
+    pn = _net([1, 0, 0, 0, 0, 0, 0])
+
+    assert shortest_firing_sequence(pn, (1, 0, 0, 0, 0, 0, 0)) == []
+    assert shortest_firing_sequence(pn, (1, 1, 0, 0, 0, 0, 0)) is None
+
+    # Đích là một điều kiện: marking đầu tiên có token ở P4
+    path = shortest_firing_sequence(pn, lambda m: m[3] == 1)
+    assert path == [0, 2, 3]
+    assert replay_firing_sequence(pn, path)[3] == 1